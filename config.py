@@ -27,6 +27,82 @@ class Config:
     # may want to skip them.
     CONJUGATION_PRACTICE_EXCLUDE_JUSSIVE_AND_COHORTATIVES = True
 
+    # Where to keep the state of flashcard runs: "memory" (per-process,
+    # single worker only) or "database" (shared by all worker processes,
+    # at the cost of a write transaction per click). Runs expire after
+    # the given number of seconds without use.
+    FLASHCARD_RUN_STORE = "memory"
+    FLASHCARD_RUN_TTL = 7 * 24 * 60 * 60
+    FLASHCARD_RUN_STORE_CAPACITY = 1024
+
+    # How many upcoming cards of a vocabulary run to load (and render)
+    # at once, and how long to keep them in memory, in seconds. Each
+    # process checks whether words were modified by another process at
+    # most every FLASHCARD_PREFETCH_CHECK_INTERVAL seconds.
+    FLASHCARD_PREFETCH_WINDOW = 16
+    FLASHCARD_PREFETCH_TTL = 10 * 60
+    FLASHCARD_PREFETCH_CHECK_INTERVAL = 5
+
+    # How many of the cards due for review (see /practice/due) to go
+    # through per session, at most. Cards answered incorrectly are added
+    # back to the session.
+    SPACED_REPETITION_SESSION_SIZE = 50
+
+    # Answers to flashcards are logged in the background, in batches:
+    # once this many are buffered, or every so many seconds, whichever
+    # comes first. At most REVIEW_EVENTS_CAPACITY answers are kept
+    # waiting (e.g., while the database is locked), the oldest ones
+    # being dropped.
+    REVIEW_EVENTS_BATCH_SIZE = 100
+    REVIEW_EVENTS_FLUSH_INTERVAL = 5
+    REVIEW_EVENTS_CAPACITY = 10_000
+
+    # Fail requests to views that execute more SQL statements than they
+    # declare (see limud.backend.query_budget). Meant for tests, which
+    # enable it.
+    ENFORCE_QUERY_BUDGETS = False
+
+    # How many rendered descriptions (backs of flashcards) to cache.
+    DESCRIPTION_CACHE_CAPACITY = 4096
+
+    # How often (in seconds) each process checks whether the chapters
+    # listed in the main menu were changed by another process.
+    CHAPTERS_CACHE_CHECK_INTERVAL = 5
+
+    # Where to scrape Words Of The Moment from, and how: seconds to
+    # wait for a connection and for a response, requests per second
+    # on average (in bursts of at most WIKTIONARY_BURST), retries of
+    # failed requests (waiting up to WIKTIONARY_BACKOFF * 2^n seconds
+    # before the n-th retry), concurrent connections, and how many
+    # random pages to request at once, keeping the first parsable one.
+    WIKTIONARY_URL = "https://en.wiktionary.org"
+    WIKTIONARY_TIMEOUT = (3.05, 10)
+    WIKTIONARY_RATE = 5
+    WIKTIONARY_BURST = 10
+    WIKTIONARY_RETRIES = 3
+    WIKTIONARY_BACKOFF = 0.5
+    WIKTIONARY_POOL_SIZE = 8
+    WIKTIONARY_HEDGE = 3
+
+    # Where to cache the pages scraped from Wiktionary (None disables
+    # the cache), for how long to use them without checking whether
+    # they changed, when to evict them if unused, and the maximum size
+    # of the cache.
+    WIKTIONARY_CACHE_PATH = str(_basedir / "instance" / "wiktionary.sqlite3")
+    WIKTIONARY_CACHE_FRESHNESS = 24 * 60 * 60
+    WIKTIONARY_CACHE_TTL = 30 * 24 * 60 * 60
+    WIKTIONARY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    # How many random pages to keep scraped in advance by how many
+    # background threads. The queue is refilled when it drops below
+    # the low-water mark (a capacity of 0 scrapes every page on demand
+    # instead). Workers give up on a page after failing to parse that
+    # many random pages in a row.
+    WOTM_PREFETCH_CAPACITY = 8
+    WOTM_PREFETCH_LOW_WATER = 4
+    WOTM_PREFETCH_WORKERS = 2
+    WOTM_PREFETCH_MAX_ATTEMPTS = 5
+
     # Database settings
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(_basedir / _dbname)
     SQLALCHEMY_ECHO = False
@@ -0,0 +1,104 @@
+"""In-process caches shared by the backend.
+
+These are per-process: when the application is served by several
+worker processes, each of them holds its own copy.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Tuple
+
+
+class LRUCache:
+    """A bounded mapping which evicts its least recently used entries,
+    and optionally entries older than some time-to-live.
+
+    All operations are O(1) and thread-safe. Hits, misses and evictions
+    are counted (see stats()).
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of entries.
+    ttl : float | None
+        If specified, entries expire this many seconds after they were
+        last stored.
+    """
+    def __init__(self, capacity: int, ttl: Optional[float] = None):
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity: {capacity}")
+
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retrieves an entry and marks it as the most recently used."""
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Stores an entry, evicting the least recently used entry if
+        the cache is full. Storing an entry resets its time-to-live.
+        """
+        if self.ttl is None:
+            expires_at = float("inf")
+        else:
+            expires_at = time.monotonic() + self.ttl
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Removes an entry (e.g., to invalidate it) and returns it."""
+        with self._lock:
+            try:
+                _, value = self._entries.pop(key)
+            except KeyError:
+                return default
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,77 @@
+"""Ordering of Hebrew strings with respect to the abjad.
+
+Sorting by code point gets the order of the abjad wrong: final forms
+(ך ם ן ף ץ) have their own code points, which come before the regular
+forms of the same letters, and niqqudot interleave with consonants.
+
+Strings are instead compared on three levels:
+
+    1. Consonants, with final forms equal to the regular forms, and any
+       other character (e.g., spaces) except diacritics.
+    2. Diacritics (niqqudot, dagesh, shin/sin dots...), as a
+       tiebreaker between words with the same consonants.
+    3. Code points, so that distinct strings never compare equal.
+
+The same order is available in SQLite as the HEBREW collation, which
+is registered on every new connection (see _register_collation()),
+e.g., for 'ORDER BY hebrew COLLATE HEBREW' or for an index built on
+that collation.
+
+Since the vocabulary table has such an index, SQLite refuses any
+statement on it (even reads) from connections that lack the collation,
+e.g., from the sqlite3 shell. Other connections must register it first
+(see register_collation()).
+"""
+
+import functools
+import sqlite3
+import unicodedata
+from typing import Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+COLLATION_NAME = "HEBREW"
+
+_FINAL_FORMS = str.maketrans("ךםןףץ", "כמנפצ")
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def hebrew_collation_key(text: str) -> Tuple[str, str, str]:
+    """Sort key of a string in the Hebrew collation (see above)."""
+    decomposed = unicodedata.normalize("NFD", text)
+    consonants = "".join(
+        c for c in decomposed if not unicodedata.combining(c)
+    )
+    diacritics = "".join(
+        c if unicodedata.combining(c) else " " for c in decomposed
+    )
+    return consonants.translate(_FINAL_FORMS), diacritics, text
+
+
+def compare_hebrew(a: str, b: str) -> int:
+    """Collation function: negative, zero or positive depending on
+    whether a sorts before, with or after b.
+    """
+    if a == b:
+        return 0
+
+    key_a = hebrew_collation_key(a)
+    key_b = hebrew_collation_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+
+def register_collation(connection: sqlite3.Connection):
+    """Registers the HEBREW collation on a connection made outside of
+    the application, e.g.:
+
+        connection = sqlite3.connect("vocabulary.db.sqlite3")
+        register_collation(connection)
+    """
+    connection.create_collation(COLLATION_NAME, compare_hebrew)
+
+
+@event.listens_for(Engine, "connect")
+def _register_collation(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        register_collation(dbapi_connection)
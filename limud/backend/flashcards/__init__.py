@@ -1,6 +1,9 @@
 from .formatting import description_as_html
 from .formatting import format_any_stray_hebrew
+from .formatting import get_description_cache
+from .formatting import invalidate_description
 from .state import FlashcardSide
 from .state import FlashcardSorting
+from .state import FlashcardRunSpec
 from .state import FlashcardRunState
 from .state import make_flashcard_run
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""State of practice sessions of the cards due for review.
+
+Unlike flashcard runs (see state.py), these sessions do not list their
+cards up front: the next card is whichever is due first when the last
+one was answered (see limud.backend.models.schedule), so only the
+current card and the progress of the session are kept, in the Flask
+session.
+"""
+
+from dataclasses import dataclass
+from typing import List
+from typing import Optional
+
+from flask import current_app as app
+from flask import session
+
+from limud.backend.flashcards.state import FlashcardSide
+from limud.backend.models.schedule import Deck
+
+# Key of the state in the Flask session
+_SESSION_KEY = "due_practice"
+
+
+@dataclass
+class DuePracticeState:
+    """Represents a practice session of the due cards of a deck.
+
+    Attributes
+    ----------
+    deck : Deck
+    side : FlashcardSide (boolean enum.Flag flag)
+        The side of the flashcard to be presented.
+    progress : [int, int]
+        How many cards have been answered so far, and how many cards
+        the session holds (answering a card incorrectly adds it back).
+    schedule_id : int | None
+        Row identifier of the schedule of the current card, or None if
+        the next due card has not been picked yet.
+    card_id : int | None
+        Row identifier of the current card in the table of its deck.
+    """
+    deck: Deck
+    side: FlashcardSide
+    progress: List[int]
+    schedule_id: Optional[int] = None
+    card_id: Optional[int] = None
+
+    @classmethod
+    def from_flask_session(cls, deck: Deck) -> Optional["DuePracticeState"]:
+        """The state of the current session, if it practices the given
+        deck.
+        """
+        fields = session.get(_SESSION_KEY)
+        if fields is None or fields["deck"] != deck.value:
+            return None
+
+        instance = cls(
+            deck=deck,
+            side=FlashcardSide(fields["side"]),
+            progress=fields["progress"],
+            schedule_id=fields["schedule_id"],
+            card_id=fields["card_id"],
+        )
+
+        app.logger.debug("Retrieved %s from session", instance)
+
+        return instance
+
+    def to_flask_session(self):
+        session[_SESSION_KEY] = {
+            "deck": self.deck.value,
+            "side": bool(self.side),
+            "progress": self.progress,
+            "schedule_id": self.schedule_id,
+            "card_id": self.card_id,
+        }
+
+        app.logger.debug("Saved %s to session", self)
+
+    @property
+    def finished(self) -> bool:
+        return self.progress[0] >= self.progress[1]
+
+    def answer(self, correct: bool, prompt_side: FlashcardSide):
+        """Moves on from the current card, once it was answered (and
+        rescheduled).
+        """
+        self.progress[0] += 1
+        if not correct:
+            self.progress[1] += 1
+
+        self.schedule_id = None
+        self.card_id = None
+        self.side = prompt_side
@@ -0,0 +1,233 @@
+"""Write-behind logging of the answers to flashcards.
+
+Requests only append events to an in-memory buffer (see
+record_answer()). A background thread writes the buffer to the
+'review_event' table (see limud.backend.models.events) in one batched
+insert, whenever it holds REVIEW_EVENTS_BATCH_SIZE events, or every
+REVIEW_EVENTS_FLUSH_INTERVAL seconds, whichever comes first. The
+buffer is also drained when the process exits.
+
+Events that could not be written (e.g., while the database is locked)
+are kept for the next flush, unless too many events are pending, in
+which case the oldest ones are dropped (see stats()).
+
+The card an answer refers to is the last card shown to the user (see
+show_card()), which also dates the latency of the answer.
+"""
+
+import atexit
+import datetime
+import logging
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from flask import Flask
+from flask import current_app as app
+from flask import session
+
+from limud.backend.models.events import ReviewEvent
+from limud.backend.models.events import ReviewMode
+from limud.backend.models.events import ReviewOutcome
+from limud.backend.models.schedule import Deck
+from limud.extensions import database
+
+# Key of the log in the application's extensions
+_EXTENSION_KEY = "review_event_log"
+
+# Key of the card on display in the Flask session
+_SESSION_KEY = "card_shown"
+
+
+class ReviewEventLog:
+    """Buffers events, and writes them in batches from a background
+    thread, started on the first event.
+
+    Parameters
+    ----------
+    write : callable
+        Inserts a list of events (as dictionaries of column values) in
+        one transaction. May raise any exception, in which case the
+        events are kept for the next attempt.
+    batch_size : int
+        Number of buffered events that triggers a write.
+    interval : float
+        Maximum number of seconds between writes of buffered events.
+    capacity : int
+        Maximum number of buffered events, beyond which the oldest
+        events are dropped.
+    """
+    def __init__(self,
+                 write: Callable[[List[Dict[str, Any]]], None],
+                 batch_size: int,
+                 interval: float,
+                 capacity: int):
+        if not 0 < batch_size <= capacity:
+            raise ValueError(
+                f"Invalid batch size {batch_size} for a buffer of capacity "
+                f"{capacity}"
+            )
+
+        self.batch_size = batch_size
+        self.interval = interval
+        self.capacity = capacity
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+        self._write = write
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, **fields: Any):
+        """Buffers an event, given its column values (except its ID and
+        creation date, which is now). Never touches the database.
+        """
+        fields["created_at"] = datetime.datetime.utcnow()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The review event log is closed")
+
+            self._buffer.append(fields)
+            self._drop_overflow()
+            full = len(self._buffer) >= self.batch_size
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="review-events", daemon=True)
+                self._thread.start()
+
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Writes every buffered event now.
+
+        Returns
+        -------
+        int
+            Number of events written.
+        """
+        with self._lock:
+            events, self._buffer = self._buffer, []
+
+        if not events:
+            return 0
+
+        try:
+            self._write(events)
+        except Exception:
+            logging.exception("Could not write %i review event(s)",
+                              len(events))
+            with self._lock:
+                self.failures += 1
+                self._buffer[:0] = events
+                self._drop_overflow()
+            return 0
+
+        with self._lock:
+            self.flushes += 1
+            self.written += len(events)
+
+        return len(events)
+
+    def close(self):
+        """Stops the background thread, and writes the remaining events.
+        Events can no longer be recorded.
+        """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+
+        self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "buffered": len(self),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def _drop_overflow(self):
+        """Drops the oldest events beyond the capacity (with the lock
+        held).
+        """
+        overflow = len(self._buffer) - self.capacity
+        if overflow > 0:
+            del self._buffer[:overflow]
+            self.dropped += overflow
+
+
+def show_card(deck: Deck, card_id: int):
+    """Remembers the card on display, and when it was first shown (i.e.,
+    not counting flips, or showing the same card again).
+    """
+    shown = session.get(_SESSION_KEY)
+    if shown is None or shown[:2] != [deck.value, card_id]:
+        session[_SESSION_KEY] = [deck.value, card_id, time.time()]
+
+
+def record_answer(mode: ReviewMode, outcome: ReviewOutcome):
+    """Logs an answer to the card on display (see show_card()), if any."""
+    shown = session.get(_SESSION_KEY)
+    if shown is None:
+        app.logger.warning("No card on display, dropping %s", outcome)
+        return
+
+    deck, card_id, shown_at = shown
+    get_review_log().record(
+        deck=Deck(deck),
+        card_id=card_id,
+        mode=mode,
+        outcome=outcome,
+        latency_ms=round(1e3 * (time.time() - shown_at)),
+    )
+
+
+def init_review_log(app: Flask):
+    """Creates the review event log of an application, as configured,
+    which is drained when the process exits.
+    """
+    table = ReviewEvent.__table__
+
+    def write(events: List[Dict[str, Any]]):
+        with database.get_engine(app).begin() as connection:
+            connection.execute(table.insert(), events)
+
+    log = ReviewEventLog(
+        write=write,
+        batch_size=app.config["REVIEW_EVENTS_BATCH_SIZE"],
+        interval=app.config["REVIEW_EVENTS_FLUSH_INTERVAL"],
+        capacity=app.config["REVIEW_EVENTS_CAPACITY"],
+    )
+
+    app.extensions[_EXTENSION_KEY] = log
+    atexit.register(log.close)
+
+
+def get_review_log() -> ReviewEventLog:
+    """The review event log of the current application."""
+    return app.extensions[_EXTENSION_KEY]
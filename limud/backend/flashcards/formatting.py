@@ -1,15 +1,81 @@
 import re
 import textwrap
+from typing import Hashable
 from typing import Optional
 
+from flask import Flask
 from flask import Markup
 from flask import current_app as app
 
+from limud.backend.cache import LRUCache
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
 
 
-def description_as_html(word: Word) -> Markup:
+# Key of the cache of descriptions in the application's extensions
+_EXTENSION_KEY = "description_cache"
+
+
+def description_as_html(word: Word,
+                        cache_key: Optional[Hashable] = None) -> Markup:
+    """Formats a word's description as an HTML string, or retrieves it
+    from the cache of descriptions (see get_description_cache()).
+
+    Words of the database are cached under their ID and version, so
+    that a new rendering is made whenever the word is updated. Other
+    words (e.g., parsed from Wiktionary) are only cached if given an
+    explicit cache key.
+
+    Parameters
+    ----------
+    word : Word
+    cache_key : hashable | None
+        Key under which to cache the description of a word that is not
+        (yet) in the database, such as the URL it was parsed from.
+
+    Returns
+    -------
+    flask.Markup
+        Valid HTML string.
+    """
+    if cache_key is None and word.id is not None:
+        cache_key = (word.id, word.version)
+
+    if cache_key is None:
+        return render_description_as_html(word)
+
+    cache = get_description_cache()
+    html = cache.get(cache_key)
+
+    if html is None:
+        html = render_description_as_html(word)
+        cache.put(cache_key, html)
+        app.logger.debug("Description cache: %s", cache.stats())
+
+    return html
+
+
+def invalidate_description(word: Word):
+    """Drops the cached description of a word, e.g., before it is
+    updated or deleted from the database.
+    """
+    get_description_cache().pop((word.id, word.version))
+
+
+def init_description_cache(app: Flask):
+    """Creates the cache of descriptions of an application."""
+    app.extensions[_EXTENSION_KEY] = LRUCache(
+        capacity=app.config["DESCRIPTION_CACHE_CAPACITY"])
+
+
+def get_description_cache() -> LRUCache:
+    """The cache of descriptions of the current application. See also
+    LRUCache.stats() for its hit, miss and eviction counts.
+    """
+    return app.extensions[_EXTENSION_KEY]
+
+
+def render_description_as_html(word: Word) -> Markup:
     """Formats a word's description as an HTML string.
 
     Useful to inject into a template with the correct formatting,
@@ -25,16 +91,6 @@ def description_as_html(word: Word) -> Markup:
     flask.Markup
         Valid HTML string.
     """
-    template = textwrap.dedent("""
-        <div style="white-space-collapse: discard;">
-        <span style="font-size: 400; color: var(--flashcard-text-minor);">
-        ({category_text}{gender_text})
-        </span>
-        {description_html}
-        {endings_html}
-        </div>
-    """)
-
     values = {
         "category_text": word.category.value,
         "description_html": make_html_for_description(word.description),
@@ -54,51 +110,110 @@ def description_as_html(word: Word) -> Markup:
     if word.category is GrammaticalCategory.VERB:
         values["description_html"] = make_html_for_verb_binyanim(word)
 
-    app.logger.debug("Assembled word description. Template:\n%s", template)
-    html = template.format(**values)
+    html = _DESCRIPTION_TEMPLATE.format(**values)
     app.logger.debug("Formatted word description. HTML:\n%s", html)
 
     return Markup(html)
 
 
-def make_html_for_noun_endings(word: Word) -> Markup:
-    """If a noun has irregular declension, create an HTML string
-    presenting that information in the correct formatting.
+class _Fragment:
+    """An HTML template, dedented once and for all at import time.
+
+    Formatting a fragment gives the same output as dedenting the
+    template after interpolating the values (as in the f-strings this
+    replaces), but skips the dedent whenever the values cannot affect
+    it: that is, when none of them spans several lines or is blank.
+
+    Parameters
+    ----------
+    template : str
+        Template with positional fields ('{}').
+    single_line : bool
+        Whether to remove all line breaks from the output.
     """
-    assert word.category is GrammaticalCategory.NOUN
-    snippets = []
-    html = ""
+    def __init__(self, template: str, single_line: bool = False):
+        self.template = template
+        self.single_line = single_line
+        self.dedented = textwrap.dedent(template)
 
-    if word.sgcst:
-        snippets.append(textwrap.dedent(f"""
+        if single_line:
+            self.dedented = self.dedented.replace("\n", "")
+
+    def format(self, *values: str) -> str:
+        if all("\n" not in value and value.strip(" \t") for value in values):
+            return self.dedented.format(*values)
+
+        html = textwrap.dedent(self.template.format(*values))
+        if self.single_line:
+            html = html.replace("\n", "")
+
+        return html
+
+
+_DESCRIPTION_TEMPLATE = textwrap.dedent("""
+        <div style="white-space-collapse: discard;">
+        <span style="font-size: 400; color: var(--flashcard-text-minor);">
+        ({category_text}{gender_text})
+        </span>
+        {description_html}
+        {endings_html}
+        </div>
+    """)
+
+_SINGULAR_CONSTRUCT = _Fragment("""
             cst.&nbsp;
             <span class="flashcard-back-hebrew">
-            {word.sgcst}
+            {}
             </span>
-        """).replace("\n", ""))
+        """, single_line=True)
 
-    if word.plabs:
-        snippets.append(textwrap.dedent(f"""
+_PLURAL = _Fragment("""
             pl.&nbsp;
             <span class="flashcard-back-hebrew">
-            {word.plabs}
+            {}
             </span>
-        """).replace("\n", ""))
+        """, single_line=True)
 
-    if word.plcst:
-        snippets.append(textwrap.dedent(f"""
+_PLURAL_CONSTRUCT = _Fragment("""
             pl.&nbsp;cst.&nbsp;
             <span class="flashcard-back-hebrew">
-            {word.plcst}
+            {}
             </span>
-        """).replace("\n", ""))
+        """, single_line=True)
 
-    if snippets:
-        html = textwrap.dedent(f"""
+_FEMININE = _Fragment("""
+            fem.&nbsp;
+            <span class="flashcard-back-hebrew">
+            {}
+            </span>
+        """, single_line=True)
+
+_ENDINGS = _Fragment("""
         <span style="font-size: 400; color: var(--flashcard-text-minor);">
-        ({', '.join(snippets)})
+        ({})
         </span>
-        """).replace("\n", "")
+        """, single_line=True)
+
+
+def make_html_for_noun_endings(word: Word) -> Markup:
+    """If a noun has irregular declension, create an HTML string
+    presenting that information in the correct formatting.
+    """
+    assert word.category is GrammaticalCategory.NOUN
+    snippets = []
+    html = ""
+
+    if word.sgcst:
+        snippets.append(_SINGULAR_CONSTRUCT.format(word.sgcst))
+
+    if word.plabs:
+        snippets.append(_PLURAL.format(word.plabs))
+
+    if word.plcst:
+        snippets.append(_PLURAL_CONSTRUCT.format(word.plcst))
+
+    if snippets:
+        html = _ENDINGS.format(", ".join(snippets))
 
     return Markup(html)
 
@@ -112,31 +227,38 @@ def make_html_for_adjective_endings(word: Word) -> Markup:
     html = ""
 
     if word.pladj:
-        snippets.append(textwrap.dedent(f"""
-            pl.&nbsp;
-            <span class="flashcard-back-hebrew">
-            {word.pladj}
-            </span>
-        """).replace("\n", ""))
+        snippets.append(_PLURAL.format(word.pladj))
 
     if word.femadj:
-        snippets.append(textwrap.dedent(f"""
-            fem.&nbsp;
-            <span class="flashcard-back-hebrew">
-            {word.femadj}
-            </span>
-        """).replace("\n", ""))
+        snippets.append(_FEMININE.format(word.femadj))
 
     if snippets:
-        html = textwrap.dedent(f"""
-        <span style="font-size: 400; color: var(--flashcard-text-minor);">
-        ({', '.join(snippets)})
-        </span>
-        """).replace("\n", "")
+        html = _ENDINGS.format(", ".join(snippets))
 
     return Markup(html)
 
 
+_BINYAN_MEANING = _Fragment("""
+                <span style="font-size: 600;
+                            color: var(--flashcard-text-minor);
+                            font-style: italic;">
+                {}:&nbsp;&nbsp;
+                </span>
+                {}
+            """, single_line=True)
+
+_BINYAN_SEPARATOR = textwrap.dedent("""
+            <span style="font-size: 400; color: var(--flashcard-text-minor);">
+            &nbsp;&semi;&nbsp;
+            </span>
+        """).replace("\n", "")
+
+_BINYANIM_ATTRIBUTES = (
+    "qal", "nifal", "piel", "pual",
+    "hifil", "hofal", "hitpael",
+)
+
+
 def make_html_for_verb_binyanim(word: Word) -> Markup:
     """Create an HTML to represent the various meanings of a verbal
     stem per binyan.
@@ -145,34 +267,18 @@ def make_html_for_verb_binyanim(word: Word) -> Markup:
     snippets = []
     html = ""
 
-    binyanim_attributes = (
-        "qal", "nifal", "piel", "pual",
-        "hifil", "hofal", "hitpael",
-    )
-
-    for attribute in binyanim_attributes:
+    for attribute in _BINYANIM_ATTRIBUTES:
         if attribute == "qal":
             text = getattr(word, "description")
         else:
             text = getattr(word, attribute)
 
         if text:
-            snippets.append(textwrap.dedent(f"""
-                <span style="font-size: 600;
-                            color: var(--flashcard-text-minor);
-                            font-style: italic;">
-                {attribute}:&nbsp;&nbsp;
-                </span>
-                {make_html_for_description(text)}
-            """).replace("\n", ""))
+            snippets.append(_BINYAN_MEANING.format(
+                attribute, make_html_for_description(text)))
 
     if snippets:
-        separator = textwrap.dedent("""
-            <span style="font-size: 400; color: var(--flashcard-text-minor);">
-            &nbsp;&semi;&nbsp;
-            </span>
-        """).replace("\n", "")
-        html = textwrap.dedent(f"""{separator.join(snippets)}""")
+        html = textwrap.dedent(_BINYAN_SEPARATOR.join(snippets))
 
     return Markup(html)
 
@@ -184,6 +290,21 @@ _regex_multiple_meanings = re.compile(
     r"(?P<number>(0|[1-9][0-9]*\.))\s(?P<text>[^\.0-9]+\s*)"
 )
 
+_MEANING = _Fragment("""
+            <span style="font-size: 400; color: var(--flashcard-text-minor);">
+            {}&nbsp;
+            </span>
+            <span style="font-size: 600; color: var(--flashcard-text);">
+            {}
+            </span>
+        """)
+
+_SINGLE_MEANING = _Fragment("""
+            <span style="font-size: 600; color: var(--flashcard-text);">
+            {}
+            </span>
+        """)
+
 def make_html_for_description(text: str) -> Markup:
     """Formats a word's description accordingly.
     
@@ -207,21 +328,13 @@ def make_html_for_description(text: str) -> Markup:
     snippets = []
 
     for match in _regex_multiple_meanings.finditer(text):
-        snippets.append(textwrap.dedent(f"""
-            <span style="font-size: 400; color: var(--flashcard-text-minor);">
-            {match["number"]}&nbsp;
-            </span>
-            <span style="font-size: 600; color: var(--flashcard-text);">
-            {format_any_stray_hebrew(match["text"]).capitalize()}
-            </span>
-        """))
+        snippets.append(_MEANING.format(
+            match["number"],
+            format_any_stray_hebrew(match["text"]).capitalize(),
+        ))
 
     if not snippets:
-        return Markup(textwrap.dedent(f"""
-            <span style="font-size: 600; color: var(--flashcard-text);">
-            {format_any_stray_hebrew(text)}
-            </span>
-        """))
+        return Markup(_SINGLE_MEANING.format(format_any_stray_hebrew(text)))
 
     return Markup("&nbsp;&nbsp;".join(snippets).replace("\n", ""))
 
@@ -229,6 +342,10 @@ def make_html_for_description(text: str) -> Markup:
 # Matches any Hebrew characters, including all Hebrew diacritics
 _regex_hebrew = re.compile(u"[\u0590-\u05ff\ufb1d-\ufb4f]+")
 
+# Hebrew characters never include whitespace, so that this is exactly
+# the dedented template.
+_STRAY_HEBREW = "\n<span class=\"flashcard-back-hebrew\">{}</span>\n"
+
 def format_any_stray_hebrew(text: str) -> Markup:
     """Encases any contiguous Hebrew characters with a <span> tag with
     a 'flashcard-back-hebrew' CSS class.
@@ -252,8 +369,6 @@ def format_any_stray_hebrew(text: str) -> Markup:
         means peace.'
     """
     def _set_proper_css_class(match: re.Match) -> str:
-        return textwrap.dedent(f"""
-            <span class="flashcard-back-hebrew">{match.group(0)}</span>
-        """)
+        return _STRAY_HEBREW.format(match.group(0))
 
     return Markup(_regex_hebrew.sub(_set_proper_css_class, text))
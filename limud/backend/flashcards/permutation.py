@@ -0,0 +1,73 @@
+"""Deterministic, lazily evaluated permutations of range(size).
+
+Shuffling a run of flashcards does not require materializing the
+shuffled list: the card shown at some position is found by permuting
+that position, given a per-run seed. The permutation is a small Feistel
+network over the smallest even number of bits covering range(size),
+restricted to range(size) by cycle-walking. Each evaluation costs O(1)
+on average, and the permutation can be inverted as cheaply.
+
+Note this is meant to look random to a human, not to be
+cryptographically secure.
+"""
+
+_ROUNDS = 4
+_MASK64 = (1 << 64) - 1
+
+
+def permute(position: int, size: int, seed: int) -> int:
+    """Maps a position in range(size) to its image by the permutation
+    determined by the seed.
+    """
+    _check(position, size)
+    half, mask = _halves(size)
+    value = position
+
+    while True:
+        left, right = value >> half, value & mask
+        for round_ in range(_ROUNDS):
+            left, right = right, left ^ (_mix(right, seed, round_) & mask)
+        value = (left << half) | right
+
+        if value < size:
+            return value
+
+
+def unpermute(value: int, size: int, seed: int) -> int:
+    """Converse of permute(): finds the position that is mapped to the
+    given value by the permutation determined by the seed.
+    """
+    _check(value, size)
+    half, mask = _halves(size)
+    position = value
+
+    while True:
+        left, right = position >> half, position & mask
+        for round_ in reversed(range(_ROUNDS)):
+            left, right = right ^ (_mix(left, seed, round_) & mask), left
+        position = (left << half) | right
+
+        if position < size:
+            return position
+
+
+def _check(value: int, size: int):
+    if not 0 <= value < size:
+        raise IndexError(f"{value} is out of range({size})")
+
+
+def _halves(size: int):
+    """Number of bits and mask of each half of the Feistel network."""
+    bits = max(2, (size - 1).bit_length())
+    bits += bits % 2
+    half = bits // 2
+    return half, (1 << half) - 1
+
+
+def _mix(value: int, seed: int, round_: int) -> int:
+    """Round function: a 64-bit integer hash (from splitmix64)."""
+    z = (value + seed * 0x9E3779B97F4A7C15 + round_ * 0xD1B54A32D192ED03)
+    z &= _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
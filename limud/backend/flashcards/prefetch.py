@@ -0,0 +1,208 @@
+"""Prefetching of the upcoming cards of vocabulary runs.
+
+When a card is displayed, the next FLASHCARD_PREFETCH_WINDOW cards of
+the run are loaded from the database in a single query, and both of
+their sides are rendered. Moving on to the next card is then served
+from memory, until the window is exhausted.
+
+Windows are kept in a per-process LRU cache, keyed by run ID, and
+expire after FLASHCARD_PREFETCH_TTL seconds. Whenever words are
+modified or deleted, by any process, the version counter of cached
+words is bumped (see invalidate_cached_words()). Each process checks
+it at most every FLASHCARD_PREFETCH_CHECK_INTERVAL seconds, and drops
+all of its windows when it changed (see check_version()).
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from flask import Flask
+from flask import Markup
+from flask import current_app as app
+
+from limud.backend.cache import LRUCache
+from limud.backend.flashcards.formatting import description_as_html
+from limud.backend.flashcards.state import FlashcardRunState
+from limud.backend.models.cache import get_cache_version
+from limud.backend.models.vocabulary import WORDS_CACHE_NAME
+from limud.backend.models.vocabulary import Word
+
+# Key of the prefetcher in the application's extensions
+_EXTENSION_KEY = "flashcard_prefetcher"
+
+
+@dataclass
+class PrefetchedCard:
+    """Everything needed to display a word of the vocabulary on either
+    side of a flashcard.
+
+    Attributes
+    ----------
+    id : int
+        Row identifier of the word in the database.
+    front : str
+        Hebrew side of the card.
+    back : flask.Markup
+        Description of the word, as HTML.
+    favorite : bool
+        Whether the word is favorited.
+    """
+    id: int
+    front: str
+    back: Markup
+    favorite: bool
+
+    @classmethod
+    def from_word(cls, word: Word) -> "PrefetchedCard":
+        return cls(
+            id=word.id,
+            front=word.hebrew,
+            back=description_as_html(word),
+            favorite=word.favorite,
+        )
+
+
+class CardPrefetcher:
+    """Keeps a sliding window of upcoming cards for each run.
+
+    Lookups of cards within the window are counted as hits, other
+    lookups as misses (see stats()).
+
+    Parameters
+    ----------
+    window : int
+        Number of cards loaded at once, starting at the current one.
+    capacity : int
+        Maximum number of runs for which a window is kept.
+    ttl : float
+        Number of seconds after which a window expires.
+    check_interval : float
+        Minimum number of seconds between checks of the version of
+        cached words.
+    """
+    def __init__(self,
+                 window: int,
+                 capacity: int,
+                 ttl: float,
+                 check_interval: float):
+        if window < 1:
+            raise ValueError(f"Invalid prefetch window: {window}")
+
+        self.window = window
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._windows = LRUCache(capacity=capacity, ttl=ttl)
+        self._version: Optional[int] = None
+        self._checked_at = -math.inf
+
+    def card(self, state: FlashcardRunState) -> Optional[PrefetchedCard]:
+        """The card at the current position of a run, or None if its
+        word was deleted since the run started.
+        """
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.check_version()
+
+        rank = state.rank()
+        cards = self._windows.get(state.run_id, {})
+
+        if rank in cards:
+            self.hits += 1
+            return cards[rank]
+
+        self.misses += 1
+        upcoming = self._upcoming_ranks(state)
+        cards = {r: cards[r] for r in upcoming if r in cards}
+        missing = [r for r in upcoming if r not in cards]
+        cards.update(self._load(state, missing))
+        self._windows.put(state.run_id, cards)
+
+        app.logger.info(
+            "Prefetched cards %s of run %s (hit rate: %.1f%%)",
+            upcoming, state.run_id, 100 * self.hit_rate,
+        )
+
+        return cards.get(rank)
+
+    def invalidate(self, run_id: str):
+        """Drops the window of a run, e.g., after one of its words was
+        removed from the run.
+        """
+        self._windows.pop(run_id)
+
+    def check_version(self):
+        """Drops every window if words were modified or deleted since
+        the windows were loaded (see invalidate_cached_words()).
+        """
+        version = get_cache_version(WORDS_CACHE_NAME)
+        if version != self._version:
+            self._windows.clear()
+            self._version = version
+        self._checked_at = time.monotonic()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "window": self.window,
+            "runs": len(self._windows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    def _upcoming_ranks(self, state: FlashcardRunState) -> List[int]:
+        """Ranks of the current card and of the following ones that
+        were not completed, within the current pass.
+        """
+        ranks: List[int] = []
+        position = state.index
+
+        while position < state.size and len(ranks) < self.window:
+            rank = state.rank(position)
+            if not state.is_completed(rank):
+                ranks.append(rank)
+            position += 1
+
+        return ranks
+
+    @staticmethod
+    def _load(state: FlashcardRunState, ranks: List[int]) \
+            -> Dict[int, PrefetchedCard]:
+        if not ranks:
+            return {}
+
+        ids = {state.words[rank]: rank for rank in ranks}
+        words = {
+            ids[word.id]: word
+            for word in Word.query
+                .with_polymorphic("*")
+                .filter(Word.id.in_(list(ids)))
+        }
+
+        return {
+            rank: PrefetchedCard.from_word(word)
+            for rank, word in words.items()
+        }
+
+
+def init_prefetcher(app: Flask):
+    """Creates the card prefetcher of an application, as configured."""
+    app.extensions[_EXTENSION_KEY] = CardPrefetcher(
+        window=app.config["FLASHCARD_PREFETCH_WINDOW"],
+        capacity=app.config["FLASHCARD_RUN_STORE_CAPACITY"],
+        ttl=app.config["FLASHCARD_PREFETCH_TTL"],
+        check_interval=app.config["FLASHCARD_PREFETCH_CHECK_INTERVAL"],
+    )
+
+
+def get_prefetcher() -> CardPrefetcher:
+    """The card prefetcher of the current application."""
+    return app.extensions[_EXTENSION_KEY]
@@ -1,11 +1,11 @@
 import enum
-import random
-import re
-import unicodedata
+import secrets
 from dataclasses import dataclass
+from dataclasses import field
+from typing import List
 from typing import Optional
-from typing import Sequence
 from typing import SupportsInt
+from typing import Tuple
 from typing import Union
 
 from flask import Blueprint
@@ -18,21 +18,25 @@ from flask import url_for
 from sqlalchemy.orm import Query
 from werkzeug import Response
 
+from limud.backend.collation import COLLATION_NAME
 from limud.backend.flashcards.formatting import description_as_html
+from limud.backend.flashcards.permutation import permute
+from limud.backend.flashcards.permutation import unpermute
+from limud.backend.flashcards.store import get_run_store
+from limud.backend.models.search import fts
+from limud.backend.models.search import match_words
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
-from limud.backend.models.conjugation import ConjugatedVerb
 from limud.backend.wiktionary import WiktionaryWordParse
-from limud.extensions import database
 
 
 class FlashcardSorting(enum.Enum):
     """Represents a desired word order when displaying flashcards.
 
-    NONE: Do not sort, take the words in whatever order the query
-      returned them (presumably ordered by database ID).
-    ALPHABETICAL: Sort with respect to the Hebrew abjad.
-    SHUFFLE: Randomly shuffle the cards.
+    NONE: Do not sort, take the words ordered by database ID.
+    ALPHABETICAL: Sort with respect to the Hebrew abjad (see
+        limud.backend.collation).
+    SHUFFLE: Randomly shuffle the cards, differently on every pass.
     """
     NONE = 1
     ALPHABETICAL = 2
@@ -65,72 +69,292 @@ class FlashcardSide(enum.Flag):
         return ~cls.prompt_side()
 
 
+@dataclass
+class FlashcardRunSpec:
+    """Describes which words of the vocabulary belong to a run, without
+    retrieving them.
+
+    Attributes
+    ----------
+    category : str | None
+        If specified, only words of that grammatical category (see the
+        values of GrammaticalCategory).
+    chapter : int | None
+        If specified, only words introduced in that chapter.
+    favorites : bool
+        Whether to only include favorited words.
+    search : str | None
+        If specified, only words whose meanings match this free text
+        (see limud.backend.models.search).
+    """
+    category: Optional[str] = None
+    chapter: Optional[int] = None
+    favorites: bool = False
+    search: Optional[str] = None
+
+    def query(self) -> Query:
+        """Query for the words of the run, in no particular order."""
+        query = Word.query
+        if self.category is not None:
+            query = query.filter_by(
+                category=GrammaticalCategory(self.category))
+        if self.chapter is not None:
+            query = query.filter_by(chapter=self.chapter)
+        if self.favorites:
+            query = query.filter_by(favorite=True)
+        if self.search is not None:
+            query = match_words(query, self.search)
+
+        return query
+
+
 @dataclass
 class FlashcardRunState:
     """Represents the state of a flashcard 'run'.
+
+    The state is kept server-side, in the flashcard run store (see
+    limud.backend.flashcards.store). Only the ID of the run is kept in
+    the Flask session.
+
+    Only the identifiers of the words of a run are kept: the card shown
+    at some position is only loaded when it is displayed. If the run is
+    shuffled, each pass through the run presents the cards in the
+    order given by a deterministic permutation of the positions, seeded
+    by the run's seed and the number of the pass (see permutation.py).
     
     Attributes
     ----------
-    words : Sequence[int] | Sequence[WiktionaryWordParse] | 
-            Sequence[ConjugatedVerb]
-        Most often, words represented as row identifiers in the
-        database.
-        Sometimes, we need to store words in the state as parses from
-        Wiktionary, which do not always neatly conform to the ORM.
+    words : [int] | [WiktionaryWordParse] | [(str, int)]
+        The cards of the run, as one of:
+        * Words of the vocabulary, represented as row identifiers in
+          the database, fixed when the run starts (see
+          make_flashcard_run()). Words deleted since are skipped.
+        * Parses from Wiktionary, which do not always neatly conform
+          to the ORM.
+        * Conjugations, represented by their binyan and bitfield.
     index : int
-        The index of the word ID to be presented on the flashcard.
+        The position of the card to be presented on the flashcard,
+        within the current pass.
     side : FlashcardSide (boolean enum.Flag flag)
         The side of the flashcard to be presented.
     progress : [int, int]
         Represents how many words have been reviewed so far (first
         item) and how many remain in the current run (second item).
+    sorting : FlashcardSorting
+        SHUFFLE to permute the cards on every pass. Other values
+        present the cards in the order of 'words'.
+    seed : int
+        Seed of the permutations of a shuffled run.
+    passes : int
+        Number of completed passes through the run.
+    completed : bytearray
+        Bitmap of the cards removed from the run (by their position
+        in the order of 'words'), e.g., when the user got them right
+        in practice mode.
+    run_id : str | None
+        ID of the run in the store, or None if it was never stored.
     """
     words: Union[
-        Sequence[int],
-        Sequence[WiktionaryWordParse],
-        Sequence[ConjugatedVerb],
+        List[int],
+        List[WiktionaryWordParse],
+        List[Tuple[str, int]],
     ]
     index: int
     side: FlashcardSide
     progress: [int, int]
+    sorting: FlashcardSorting = FlashcardSorting.NONE
+    seed: int = 0
+    passes: int = 0
+    completed: bytearray = field(default_factory=bytearray)
+    run_id: Optional[str] = None
 
     @classmethod
     def from_flask_session(cls) -> "FlashcardRunState":
-        """Initializes an instance from the Flask session."""
+        """Initializes an instance from the run store, given the ID of
+        the run kept in the Flask session.
+
+        Raises
+        ------
+        KeyError
+            If there is no current run, or if it has expired.
+        """
+        run_id = session["run_id"]
+        run = get_run_store().get(run_id)
+
+        if run is None:
+            raise KeyError(f"Flashcard run {run_id} has expired")
+
         instance = cls(
-            words=session["words"],
-            index=session["index"],
-            side=FlashcardSide(session["side"]),
-            progress=session["progress"],
+            words=run["words"],
+            index=run["index"],
+            side=FlashcardSide(run["side"]),
+            progress=run["progress"],
+            sorting=FlashcardSorting(run["sorting"]),
+            seed=run["seed"],
+            passes=run["passes"],
+            completed=bytearray(run["completed"]),
+            run_id=run_id,
         )
 
-        app.logger.debug("Retrieved %s from Flask session", instance)
+        app.logger.debug("Retrieved %s from run store", instance)
 
         return instance
 
     def to_flask_session(self):
-        """Serializes an instance into the Flask session"""
-        session["words"] = self.words
-        session["index"] = self.index
-        session["side"] = bool(self.side)
-        session["progress"] = self.progress
-        app.logger.debug("Serialized %s to Flask session", self)
+        """Saves an instance into the run store, and its ID into the
+        Flask session.
+
+        The words are only written if this is a new run, or if they
+        were modified in place since the run was retrieved.
+        """
+        store = get_run_store()
+        fields = {
+            "index": self.index,
+            "side": bool(self.side),
+            "progress": self.progress,
+            "size": self.size,
+            "passes": self.passes,
+            "completed": bytes(self.completed),
+        }
+
+        if self.run_id is None:
+            fields["words"] = self.words
+            fields["sorting"] = self.sorting.value
+            fields["seed"] = self.seed
+            self.run_id = store.create(fields)
+        else:
+            if getattr(self.words, "changed", False):
+                fields["words"] = self.words
+            store.update(self.run_id, fields)
+
+        session["run_id"] = self.run_id
+        app.logger.debug("Saved %s to run store", self)
+
+    @property
+    def size(self) -> int:
+        """Number of cards in the run (whether completed or not)."""
+        return len(self.words)
+
+    def rank(self, position: Optional[int] = None) -> int:
+        """Position in the order of 'words' of the card presented at
+        some position (by default, the current one) in this pass.
+        """
+        if position is None:
+            position = self.index
+
+        if self.sorting is FlashcardSorting.SHUFFLE:
+            return permute(position, self.size, self._pass_seed())
+
+        return position
+
+    def position_of(self, rank: int) -> int:
+        """Converse of rank()."""
+        if self.sorting is FlashcardSorting.SHUFFLE:
+            return unpermute(rank, self.size, self._pass_seed())
+
+        return rank
+
+    def current(self):
+        """The card at the current position, for explicit lists of
+        cards (see 'words').
+        """
+        return self.words[self.rank()]
+
+    def current_word(self) -> Optional[Word]:
+        """The word of the vocabulary at the current position, or None
+        if it was deleted since the run started.
+        """
+        return Word.query.get(self.current())
+
+    def remove_word(self, word_id: int):
+        """Removes a word of the vocabulary from the run, e.g., after it
+        has been deleted from the database. The previous card becomes
+        the current one.
+        """
+        for rank, card in enumerate(self.words):
+            if card == word_id:
+                self.remove(rank)
+                break
+
+    def remove(self, rank: int):
+        """Removes the card of some rank from the run (see rank()), and
+        makes the previous card the current one.
+        """
+        del self.words[rank]
+
+        # Cards after the removed one move down a rank, and so do their
+        # completion flags
+        flags = int.from_bytes(self.completed, "little")
+        below = flags & ((1 << rank) - 1)
+        above = flags >> (rank + 1) << rank
+        self.completed = bytearray(
+            (below | above).to_bytes(len(self.completed), "little"))
+
+        if self.size:
+            self.index = (self.index - 1) % self.size
+
+    @property
+    def remaining(self) -> int:
+        """Number of cards that have not been completed."""
+        completed = sum(bin(byte).count("1") for byte in self.completed)
+        return self.size - completed
+
+    def is_completed(self, rank: int) -> bool:
+        byte, bit = divmod(rank, 8)
+        if byte >= len(self.completed):
+            return False
+        return bool(self.completed[byte] >> bit & 1)
+
+    def complete(self):
+        """Removes the current card from the run, and moves on to the
+        next card that was not completed.
+        """
+        byte, bit = divmod(self.rank(), 8)
+        if byte >= len(self.completed):
+            self.completed.extend(bytes(byte + 1 - len(self.completed)))
+        self.completed[byte] |= 1 << bit
+        self.skip()
+
+    def skip(self):
+        """Moves on to the next card that was not completed. Once all
+        cards in the pass have been seen, the index equals the size of
+        the run (see new_pass()).
+        """
+        self.index += 1
+        while self.index < self.size and self.is_completed(self.rank()):
+            self.index += 1
+
+    def new_pass(self):
+        """Starts over with the remaining cards, in a new order if the
+        run is shuffled.
+        """
+        self.passes += 1
+        self.index = -1
+        self.skip()
+        self.progress = [0, self.remaining]
+
+    def _pass_seed(self) -> int:
+        return self.seed * 1_000_003 + self.passes
 
 
 def make_flashcard_run(endpoint: str,
-                       query: Query,
+                       spec: FlashcardRunSpec,
                        sorting: FlashcardSorting = FlashcardSorting.NONE,
                        start_at_word_id: Optional[SupportsInt] = None) \
                        -> Response:
-    """Uses a query to fetch a set of words from the database, and
+    """Describes a set of words from the database as a new run, and
     redirects to the correct endpoint.
 
+    Only the IDs of the words are retrieved at this point (see
+    FlashcardRunState), and each run is shuffled according to its own
+    random seed.
+
     Parameters
     ----------
     endpoint : str
-        Endpoint to be redirected to after words have been fetched.
-    query : sqlalchemy.orm.Query
-        Query used to retrieve words from the database.
+        Endpoint to be redirected to after the run has been created.
+    spec : FlashcardRunSpec
+        Description of the words to include.
     sorting : FlashcardSorting
         In what order should the words be presented. See documentation
         for FlashcardSorting for more information.
@@ -138,71 +362,58 @@ def make_flashcard_run(endpoint: str,
         ID of the word to display first. If not specified, start with
         the first word available. If you specify some integer, make
         sure the word with that ID is actually present among the words
-        retrieved by the input query!
+        described by the input spec!
 
     Returns
     -------
     werkzeug.Response
     """
-    words = [word for word in query.all()]
-    if not words:
-        app.logger.error("Query %s returned no words!", query)
-        return redirect(url_for("home.index"))
-    
-    if sorting is FlashcardSorting.NONE:
-        app.logger.debug("No sorting required")
-    elif sorting is FlashcardSorting.ALPHABETICAL:
+    # The words are fixed at this point, as words may be deleted, moved
+    # to another chapter or category, or unfavorited during the run,
+    # which would change the words described by the spec, and the
+    # positions of the others. This only retrieves their IDs, in one
+    # indexed query.
+    if sorting is FlashcardSorting.ALPHABETICAL:
         app.logger.debug("Alphabetical sorting required")
-        words.sort(key=lambda word: remove_niqqudot(word.hebrew))
-    elif sorting is FlashcardSorting.SHUFFLE:
-        app.logger.debug("Random sorting (shuffling) required")
-        random.shuffle(words)
+        order: Tuple = (Word.hebrew.collate(COLLATION_NAME), Word.id)
+    elif spec.search is not None:
+        # Best matches first, since the rank of a match is not stored
+        # in the vocabulary
+        order = (fts.c.rank,)
     else:
-        raise ValueError
-
-    words_ids = [word.id for word in words]
-
-    try:
-        start_index = words_ids.index(int(start_at_word_id))  # type: ignore
-    except TypeError:  # start_at_word_id is None
-        start_index = 0
-    except ValueError:  # start_at_word_id is int-castable
-        app.logger.error(
-            "Could not find word with desired ID %i "
-            "among words queried from the database",
-            start_at_word_id
-        )
+        order = (Word.id,)
+
+    rows = spec.query().with_entities(Word.id).order_by(*order).all()
+    words = [word_id for word_id, in rows]
+    size = len(words)
+
+    if not size:
+        app.logger.error("Spec %s matched no words!", spec)
         return redirect(url_for("home.index"))
 
-    # Set word list and reset other state
-    FlashcardRunState(
-        words=words_ids,
-        index=start_index,
+    state = FlashcardRunState(
+        words=words,
+        index=0,
         side=FlashcardSide.prompt_side(),
-        progress=[0, len(words)],
-    ).to_flask_session()
+        progress=[0, size],
+        sorting=sorting,
+        seed=secrets.randbits(32),
+    )
 
-    return redirect(url_for(endpoint))
+    if start_at_word_id is not None:
+        try:
+            rank = words.index(int(start_at_word_id))
+        except ValueError:
+            app.logger.error(
+                "Could not find word with desired ID %i "
+                "among words described by the spec",
+                start_at_word_id
+            )
+            return redirect(url_for("home.index"))
 
+        state.index = state.position_of(rank)
 
-def remove_niqqudot(hebrew: str) -> str:
-    """Helper method thast removes niqqudot, to enable sorting Hebrew
-    words alphabetically.
+    state.to_flask_session()
 
-    The data must be normalized since a consonant followed by a niqqud
-    may very well be represented by a single character.
-
-    Parameters
-    ----------
-    hebrew : str
-        String with diacritics.
+    return redirect(url_for(endpoint))
 
-    Returns
-    -------
-    str
-        String without diacritics.
-    """
-    normalized = unicodedata.normalize("NFD", hebrew)
-    stripped = re.sub(r"[^\u05d0-\u05f4]", "", normalized)
-    app.logger.debug("Stripped word: %s -> %s", hebrew, stripped)
-    return stripped
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""Server-side storage for the state of flashcard runs.
+
+Only a short run ID is kept in the (cookie-based) Flask session. The
+run itself is kept in one of the following backends, selected by the
+FLASHCARD_RUN_STORE configuration flag:
+
+    * "memory" (the default): A per-process LRU cache. Fastest, but
+      only suitable when the application is served by a single process.
+    * "database": A table in the application database. Runs are shared
+      by all worker processes and survive restarts, but every update
+      (e.g., flipping a card) is a write transaction of its own, which
+      SQLite serializes across users.
+
+In both cases, runs expire FLASHCARD_RUN_TTL seconds after they were
+last updated. Reads and updates of the index, side and progress of a
+run are O(1): the words are only written when they change.
+"""
+
+import datetime
+import secrets
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from flask import Flask
+from flask import current_app as app
+from flask import json
+
+from limud.backend.cache import LRUCache
+from limud.backend.models.runs import FlashcardRun
+from limud.extensions import database
+
+# Key of the store in the application's extensions
+_EXTENSION_KEY = "flashcard_run_store"
+
+
+def _tracked(name: str):
+    """Method of list that also marks the list as changed."""
+    def method(self, *args, **kwargs):
+        self.changed = True
+        return getattr(list, name)(self, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+class ChangeTrackingList(list):
+    """A list that remembers whether it was modified in place (e.g., by
+    list.pop() or random.shuffle()), so that unchanged words need not
+    be written back to the store.
+    """
+    changed = False
+
+    append = _tracked("append")
+    extend = _tracked("extend")
+    insert = _tracked("insert")
+    pop = _tracked("pop")
+    remove = _tracked("remove")
+    reverse = _tracked("reverse")
+    sort = _tracked("sort")
+    __setitem__ = _tracked("__setitem__")
+    __delitem__ = _tracked("__delitem__")
+    __iadd__ = _tracked("__iadd__")
+
+
+class FlashcardRunStore:
+    """Interface of a server-side store for flashcard runs.
+
+    A run is represented as a dictionary with the keys 'words',
+    'sorting', 'seed', 'size', 'index', 'side', 'progress', 'passes'
+    and 'completed' (see FlashcardRunState). Words must be serializable
+    as JSON, and are returned as deserialized from JSON regardless of
+    the backend (e.g., dataclasses become dictionaries).
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    def create(self, run: Dict[str, Any]) -> str:
+        """Stores a new run, and returns its ID."""
+        raise NotImplementedError
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieves a run, or None if it does not exist or expired."""
+        raise NotImplementedError
+
+    def update(self, run_id: str, fields: Dict[str, Any]):
+        """Updates some of the fields of a run, and resets its TTL."""
+        raise NotImplementedError
+
+    def delete(self, run_id: str):
+        raise NotImplementedError
+
+    @staticmethod
+    def new_run_id() -> str:
+        return secrets.token_urlsafe(12)
+
+
+class MemoryRunStore(FlashcardRunStore):
+    """Keeps runs in a per-process LRU cache."""
+    def __init__(self, ttl: float, capacity: int):
+        super().__init__(ttl)
+        self._runs = LRUCache(capacity=capacity, ttl=ttl)
+
+    def create(self, run: Dict[str, Any]) -> str:
+        run_id = self.new_run_id()
+        run = dict(run, words=_load_words(json.dumps(run["words"])))
+        self._runs.put(run_id, run)
+        return run_id
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return self._runs.get(run_id)
+
+    def update(self, run_id: str, fields: Dict[str, Any]):
+        run = self._runs.get(run_id)
+        if run is None:
+            raise KeyError(f"No such flashcard run: {run_id}")
+
+        run.update(fields)
+        self._runs.put(run_id, run)
+
+    def delete(self, run_id: str):
+        self._runs.pop(run_id)
+
+
+class DatabaseRunStore(FlashcardRunStore):
+    """Keeps runs in the 'flashcard_run' table of the database.
+
+    Each operation runs in its own short transaction, so that it
+    neither commits nor expires the objects of the request's session.
+    Expired runs are purged whenever a new run is created, using the
+    index on their expiry date.
+    """
+    table = FlashcardRun.__table__
+
+    def create(self, run: Dict[str, Any]) -> str:
+        run_id = self.new_run_id()
+        now = datetime.datetime.utcnow()
+
+        with database.engine.begin() as connection:
+            connection.execute(
+                self.table.delete().where(self.table.c.expires_at < now))
+            connection.execute(self.table.insert(), {
+                "id": run_id,
+                "words": json.dumps(run["words"]),
+                "sorting": run["sorting"],
+                "seed": run["seed"],
+                "size": run["size"],
+                "index": run["index"],
+                "side": run["side"],
+                "progress_done": run["progress"][0],
+                "progress_total": run["progress"][1],
+                "passes": run["passes"],
+                "completed": run["completed"],
+                "expires_at": now + datetime.timedelta(seconds=self.ttl),
+            })
+
+        return run_id
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with database.engine.connect() as connection:
+            row = connection.execute(
+                self.table.select().where(self.table.c.id == run_id)
+            ).first()
+
+        if row is None or row.expires_at < datetime.datetime.utcnow():
+            return None
+
+        return {
+            "words": _load_words(row.words),
+            "sorting": row.sorting,
+            "seed": row.seed,
+            "size": row.size,
+            "index": row.index,
+            "side": row.side,
+            "progress": [row.progress_done, row.progress_total],
+            "passes": row.passes,
+            "completed": row.completed,
+        }
+
+    def update(self, run_id: str, fields: Dict[str, Any]):
+        values: Dict[str, Any] = {
+            "expires_at": datetime.datetime.utcnow() +
+                          datetime.timedelta(seconds=self.ttl),
+        }
+
+        for key, value in fields.items():
+            if key == "words":
+                values[key] = json.dumps(value)
+            elif key != "progress":
+                values[key] = value
+
+        if "progress" in fields:
+            values["progress_done"], values["progress_total"] = \
+                fields["progress"]
+
+        with database.engine.begin() as connection:
+            connection.execute(
+                self.table.update()
+                          .where(self.table.c.id == run_id)
+                          .values(**values)
+            )
+
+    def delete(self, run_id: str):
+        with database.engine.begin() as connection:
+            connection.execute(
+                self.table.delete().where(self.table.c.id == run_id))
+
+
+def _load_words(serialized: str):
+    """Deserializes the words of a run, tracking changes to lists."""
+    words = json.loads(serialized)
+
+    if isinstance(words, list):
+        return ChangeTrackingList(words)
+    return words
+
+
+def init_run_store(app: Flask):
+    """Creates the store selected by the app's configuration."""
+    backend = app.config.get("FLASHCARD_RUN_STORE", "memory")
+    ttl = app.config.get("FLASHCARD_RUN_TTL", 7 * 24 * 60 * 60)
+
+    if backend == "database":
+        store: FlashcardRunStore = DatabaseRunStore(ttl=ttl)
+    elif backend == "memory":
+        store = MemoryRunStore(
+            ttl=ttl,
+            capacity=app.config.get("FLASHCARD_RUN_STORE_CAPACITY", 1024),
+        )
+    else:
+        raise ValueError(f"Unknown flashcard run store: {backend}")
+
+    app.logger.info("Storing flashcard runs in: %s", backend)
+    app.extensions[_EXTENSION_KEY] = store
+
+
+def get_run_store() -> FlashcardRunStore:
+    """Retrieves the store of the current app."""
+    return app.extensions[_EXTENSION_KEY]
@@ -0,0 +1,245 @@
+"""Instrumentation of requests: latency and SQL queries per endpoint.
+
+Every request is timed, and every SQL statement it executes is counted
+and timed (by cursor events on the application's engine, so that
+queries issued by templates and context processors count too). Both
+are attached to the response in a Server-Timing header, which browsers
+show along with the request, e.g.:
+
+    Server-Timing: app;dur=12.3, db;dur=4.1;desc="5 queries"
+
+and aggregated per endpoint, in memory, into histograms of latency and
+of queries per request. These are served at /metrics (see
+routes.metrics) in the Prometheus text format, along with the
+statistics of the caches and background workers of the application.
+
+Metrics are per process: each worker process serves its own.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Sequence
+from typing import Tuple
+
+from flask import Flask
+from flask import Response
+from flask import current_app as app
+from flask import g
+from flask import has_request_context
+from flask import request
+from sqlalchemy import event
+
+from limud.extensions import database
+
+# Key of the metrics in the application's extensions
+_EXTENSION_KEY = "request_metrics"
+
+# Content type of the Prometheus text format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of the buckets of the histograms, in seconds and queries
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Counts of observations falling in buckets (each counting the
+    observations up to its upper bound, Prometheus-style), with their
+    sum and total count.
+    """
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """The upper bound of each bucket (as a label, the last one
+        being "+Inf"), and the number of observations up to it.
+        """
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return list(zip(bounds, counts))
+
+
+class RequestMetrics:
+    """Aggregates the latency, number of SQL queries and SQL time of
+    requests, per endpoint.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Histogram] = {}
+        self._queries: Dict[str, Histogram] = {}
+        self._sql_seconds: Dict[str, float] = {}
+        self._responses: Dict[Tuple[str, int], int] = {}
+
+    def observe(self,
+                endpoint: str,
+                status: int,
+                latency_s: float,
+                queries: int,
+                sql_s: float):
+        with self._lock:
+            if endpoint not in self._latency:
+                self._latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self._queries[endpoint] = Histogram(QUERY_BUCKETS)
+                self._sql_seconds[endpoint] = 0.
+
+            self._latency[endpoint].observe(latency_s)
+            self._queries[endpoint].observe(queries)
+            self._sql_seconds[endpoint] += sql_s
+            key = (endpoint, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def render(self, stats: Mapping[str, Mapping[str, float]] = {}) -> str:
+        """The metrics in the Prometheus text format.
+
+        Parameters
+        ----------
+        stats : dict
+            Statistics of components of the application (e.g., caches),
+            by name, exported as gauges named after the component and
+            the statistic. Non-numeric statistics are left out.
+        """
+        lines: List[str] = []
+
+        with self._lock:
+            _histogram(
+                lines, "limud_request_duration_seconds",
+                "Time to serve requests, by endpoint.", self._latency)
+            _histogram(
+                lines, "limud_request_queries",
+                "SQL queries per request, by endpoint.", self._queries)
+
+            lines.append(
+                "# HELP limud_request_sql_seconds_total Time spent in SQL "
+                "queries, by endpoint.")
+            lines.append("# TYPE limud_request_sql_seconds_total counter")
+            for endpoint, seconds in sorted(self._sql_seconds.items()):
+                lines.append(
+                    f"limud_request_sql_seconds_total"
+                    f"{_labels(endpoint=endpoint)} {seconds:.6f}")
+
+            lines.append(
+                "# HELP limud_responses_total Responses, by endpoint and "
+                "status.")
+            lines.append("# TYPE limud_responses_total counter")
+            for (endpoint, status), count in sorted(self._responses.items()):
+                lines.append(
+                    f"limud_responses_total"
+                    f"{_labels(endpoint=endpoint, status=status)} {count}")
+
+        for component, values in sorted(stats.items()):
+            for stat, value in sorted(values.items()):
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"limud_{component}_{stat}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value):g}")
+
+        return "\n".join(lines) + "\n"
+
+
+def init_metrics(app: Flask):
+    """Instruments the requests of an application, and the queries to
+    its database.
+    """
+    app.extensions[_EXTENSION_KEY] = RequestMetrics()
+
+    engine = database.get_engine(app)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def get_metrics() -> RequestMetrics:
+    """The request metrics of the current application."""
+    return app.extensions[_EXTENSION_KEY]
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.
+
+
+def _finish_request(response: Response) -> Response:
+    if "request_started" not in g:
+        # e.g., a before_request function returned early
+        return response
+
+    latency_s = time.perf_counter() - g.request_started
+    get_metrics().observe(
+        endpoint=request.endpoint or "unmatched",
+        status=response.status_code,
+        latency_s=latency_s,
+        queries=g.sql_queries,
+        sql_s=g.sql_seconds,
+    )
+
+    response.headers.add(
+        "Server-Timing",
+        f"app;dur={1e3 * latency_s:.1f}, "
+        f"db;dur={1e3 * g.sql_seconds:.1f};desc=\"{g.sql_queries} queries\"",
+    )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed_s = time.perf_counter() - conn.info["query_started"].pop()
+
+    # Queries outside of requests (e.g., from background threads, or
+    # command-line tools) are not attributed to any endpoint
+    if has_request_context() and "sql_queries" in g:
+        g.sql_queries += 1
+        g.sql_seconds += elapsed_s
+
+
+def _histogram(lines: List[str],
+               name: str,
+               help: str,
+               histograms: Mapping[str, Histogram]):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} histogram")
+
+    for endpoint, histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative_counts():
+            lines.append(
+                f"{name}_bucket{_labels(endpoint=endpoint, le=bound)} {count}")
+        lines.append(
+            f"{name}_sum{_labels(endpoint=endpoint)} {histogram.sum:g}")
+        lines.append(
+            f"{name}_count{_labels(endpoint=endpoint)} {histogram.count}")
+
+
+def _labels(**labels) -> str:
+    escaped = (
+        str(value).replace("\\", r"\\").replace("\"", r"\"")
+                  .replace("\n", r"\n")
+        for value in labels.values()
+    )
+    return "{" + ",".join(
+        f"{name}=\"{value}\"" for name, value in zip(labels, escaped)) + "}"
@@ -0,0 +1,75 @@
+"""Object-relational mapping for the version counters of cached data.
+
+Some data changes so rarely (e.g., conjugation paradigms) that each
+worker process keeps its own copy in memory. Whenever such data is
+written, its counter in the database is incremented, so that every
+process can tell that its copy has gone stale.
+
+The counters are read at most once per request (or application
+context), and a missing counter reads as zero.
+"""
+
+from flask import g
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import select
+
+from limud.extensions import database
+
+
+class CacheVersion(database.Model):  # type: ignore
+    __tablename__ = "cache_version"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name}: {self.version}>"
+
+
+def get_cache_version(name: str) -> int:
+    """Retrieves the current version of some cached data.
+
+    The value is memoized for the rest of the request, so that looking
+    up many cached items costs a single primary key query.
+    """
+    versions = g.setdefault("cache_versions", {})
+
+    if name not in versions:
+        row = CacheVersion.query.get(name)
+        versions[name] = 0 if row is None else row.version
+
+    return versions[name]
+
+
+def bump_cache_version(name: str) -> int:
+    """Increments the version of some cached data, marking every copy
+    held by any process as stale.
+
+    Important: this does not commit, so that the new version becomes
+    visible to other processes in the same transaction as the write
+    that made their copies stale. The parent caller is responsible for
+    committing.
+
+    Returns
+    -------
+    int
+        The new version.
+    """
+    table = CacheVersion.__table__
+    updated = database.session.execute(
+        table.update()
+             .where(table.c.name == name)
+             .values(version=table.c.version + 1)
+    )
+
+    if updated.rowcount == 0:
+        database.session.execute(table.insert(), {"name": name, "version": 1})
+
+    version = database.session.execute(
+        select([table.c.version]).where(table.c.name == name)
+    ).scalar()
+
+    g.setdefault("cache_versions", {})[name] = version
+    return version
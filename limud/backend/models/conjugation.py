@@ -3,20 +3,34 @@
 Note that the integer values associated with each enumeration may be
 combined and encoded as a bitfield to compactly label cells in the
 conjugation table, so do not change these!
+
+Paradigms almost never change, so each process caches them in memory,
+per application (see get_paradigm()). Writes go through save_paradigm(), which bumps a
+version counter in the database so that every process reloads them.
 """
 
 import enum
+from typing import Dict
 from typing import Optional
 from typing import Tuple
 
+from flask import current_app
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import Enum
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
+from sqlalchemy import bindparam
 
+from limud.backend.models.cache import bump_cache_version
+from limud.backend.models.cache import get_cache_version
 from limud.extensions import database
 
+# Name of the version counter of cached paradigms (see models.cache),
+# and key of the cache in the application's extensions
+PARADIGM_CACHE_NAME = "conjugation"
+
 
 @enum.unique
 class Binyan(enum.Enum):
@@ -84,6 +98,24 @@ class ConjugatedVerb(database.Model):  # type: ignore
     gender = Column(Enum(Gender), nullable=True)
     number = Column(Enum(Number), nullable=True)
 
+    # Bitfield representation of the tense, person, gender and number
+    # (see pack()), persisted so that any single cell of a conjugation
+    # table can be found with one probe of the (binyan, bitfield) index.
+    bitfield = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_conjugation_binyan_bitfield",
+            "binyan", "bitfield",
+            unique=True,
+        ),
+        Index(
+            "ix_conjugation_binyan_tense_person_gender_number",
+            "binyan", "tense", "person", "gender", "number",
+            unique=True,
+        ),
+    )
+
     def __repr__(self) -> str:
         return (
             f"<{self.__class__.__name__} {self.id}: '{self.hebrew}' ("
@@ -128,25 +160,142 @@ def get_conjugation(binyan: Binyan,
     (ConjugatedVerb) and a tuple of binyan, tense, person, gender,
     number.
     
-    This function retrieves that row from the database and ensures
-    that there is exactly zero or one such row.
+    This function retrieves that row from the cached paradigm of the
+    binyan (see get_paradigm()), so it does not usually query the
+    database at all.
+    """
+    return get_paradigm(binyan).get(pack(tense, person, gender, number))
+
+
+def get_paradigm(binyan: Binyan) -> Dict[int, ConjugatedVerb]:
+    """Retrieves every conjugation of a binyan (its full paradigm).
+
+    The result maps the bitfield representation of each conjugation
+    (see pack()) to its row in the database, so that rendering a whole
+    conjugation table costs at most one query rather than one per cell.
+
+    Paradigms are cached in memory by each process (in the extensions
+    of the current application), and only reloaded
+    when their version counter in the database has changed since they
+    were loaded. Cached rows are detached from the database session and
+    shared between requests: do not modify them.
+    """
+    version = get_cache_version(PARADIGM_CACHE_NAME)
+    cache = _paradigm_cache()
+
+    try:
+        cached_version, paradigm = cache[binyan]
+    except KeyError:
+        pass
+    else:
+        if cached_version == version:
+            return paradigm
+
+    paradigm = _load_paradigm(binyan)
+    for conjugation in paradigm.values():
+        database.session.expunge(conjugation)
+
+    cache[binyan] = (version, paradigm)
+    return paradigm
+
+
+def _paradigm_cache() -> Dict[Binyan, Tuple[int, Dict[int, ConjugatedVerb]]]:
+    """Cached paradigms of the current application, as a mapping from
+    each binyan to the cache version it was loaded at and its paradigm.
+    """
+    return current_app.extensions.setdefault(PARADIGM_CACHE_NAME, {})
+
+
+def _load_paradigm(binyan: Binyan) -> Dict[int, ConjugatedVerb]:
+    """Retrieves every conjugation of a binyan in a single query,
+    bypassing the cache.
     """
-    fetched = ConjugatedVerb.query.filter_by(
-        binyan=binyan,
-        tense=tense,
-        person=person,
-        gender=gender,
-        number=number,
-    ).all()
-
-    if len(fetched) == 0:
-        return None
-
-    if len(fetched) == 1:
-        conjugation, = fetched
-        return conjugation
-
-    raise ValueError(f"Unexpected: Query returned > 1 rows: {fetched}")
+    return {
+        conjugation.bitfield: conjugation
+        for conjugation in ConjugatedVerb.query.filter_by(binyan=binyan)
+    }
+
+
+def save_paradigm(binyan: Binyan, cells: Dict[int, str]) -> Tuple[int, int, int]:
+    """Saves the cells of a conjugation table in bulk.
+
+    The binyan's existing rows are loaded once, bypassing the cache,
+    and diffed against the submitted cells, keyed by bitfield:
+
+    * A non-empty cell without a matching row is inserted.
+    * A non-empty cell whose text differs from its row is updated.
+    * An empty cell with a matching row is deleted.
+
+    Each kind of change is then applied as a single executemany
+    statement. Rows whose bitfield is absent from the cells are left
+    untouched. If anything changed, the cached paradigms are marked as
+    stale in every process.
+
+    Important: like the helpers for the vocabulary, this does not
+    commit. The parent caller is responsible for committing, so that
+    all changes happen in a single transaction.
+
+    Parameters
+    ----------
+    binyan : Binyan
+    cells : {int: str}
+        Hebrew text for each conjugation, keyed by its bitfield
+        representation (see pack()).
+
+    Returns
+    -------
+    (int, int, int)
+        Number of inserted, updated and deleted rows, respectively.
+    """
+    existing = _load_paradigm(binyan)
+    inserts, updates, deletes = [], [], []
+
+    for bitfield, hebrew in cells.items():
+        conjugation = existing.get(bitfield)
+
+        if conjugation is None:
+            if not hebrew:
+                continue
+
+            tense, person, gender, number = unpack(bitfield)
+            inserts.append({
+                "hebrew": hebrew,
+                "binyan": binyan,
+                "bitfield": bitfield,
+                "tense": tense,
+                "person": person,
+                "gender": gender,
+                "number": number,
+            })
+        elif not hebrew:
+            deletes.append({"_id": conjugation.id})
+        elif conjugation.hebrew != hebrew:
+            updates.append({"_id": conjugation.id, "_hebrew": hebrew})
+
+    table = ConjugatedVerb.__table__
+
+    if inserts:
+        database.session.execute(table.insert(), inserts)
+
+    if updates:
+        database.session.execute(
+            table.update()
+                 .where(table.c.id == bindparam("_id"))
+                 .values(hebrew=bindparam("_hebrew")),
+            updates,
+        )
+
+    if deletes:
+        database.session.execute(
+            table.delete().where(table.c.id == bindparam("_id")),
+            deletes,
+        )
+
+    if inserts or updates or deletes:
+        bump_cache_version(PARADIGM_CACHE_NAME)
+        _paradigm_cache().pop(binyan, None)
+
+    return len(inserts), len(updates), len(deletes)
 
 
 def label_tense(tense: Tense) -> str:
@@ -0,0 +1,75 @@
+"""Object-relational mapping for the history of answers to flashcards.
+
+The 'review_event' table is append-only: events are inserted in
+batches, in the background (see limud.backend.flashcards.events), and
+a trigger rejects any update.
+"""
+
+import enum
+
+from sqlalchemy import Column
+from sqlalchemy import DDL
+from sqlalchemy import DateTime
+from sqlalchemy import Enum
+from sqlalchemy import Integer
+from sqlalchemy import event
+
+from limud.backend.models.schedule import Deck
+from limud.extensions import database
+
+
+@enum.unique
+class ReviewMode(enum.Enum):
+    # Going through a run, card after card (see /vocabulary/review)
+    REVIEW = "review"
+    # Answering the cards of a run until they are all answered correctly
+    PRACTICE = "practice"
+    # Answering the cards due for review (see models.schedule)
+    DUE = "due"
+
+
+@enum.unique
+class ReviewOutcome(enum.Enum):
+    CORRECT = "correct"
+    INCORRECT = "incorrect"
+    FAVORITE = "favorite"
+    UNFAVORITE = "unfavorite"
+
+
+class ReviewEvent(database.Model):  # type: ignore
+    __tablename__ = "review_event"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    deck = Column(Enum(Deck), nullable=False)
+
+    # Row identifier of the card in the table of its deck
+    card_id = Column(Integer, nullable=False)
+
+    mode = Column(Enum(ReviewMode), nullable=False)
+    outcome = Column(Enum(ReviewOutcome), nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
+
+    # Milliseconds from when the card was first shown, if known
+    latency_ms = Column(Integer, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.id}: "
+            f"{self.mode.value} {self.deck.value} {self.card_id} "
+            f"{self.outcome.value}, "
+            f"at {self.created_at}>"
+        )
+
+
+event.listen(
+    ReviewEvent.__table__, "after_create",
+    DDL(
+        """
+        CREATE TRIGGER review_event_append_only
+        BEFORE UPDATE ON review_event
+        BEGIN
+            SELECT RAISE(ABORT, 'review_event is append-only');
+        END
+        """
+    ).execute_if(dialect="sqlite"),
+)
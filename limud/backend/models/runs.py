@@ -0,0 +1,47 @@
+"""Object-relational mapping for flashcard runs kept server-side.
+
+See limud.backend.flashcards.store for how runs are stored and evicted.
+"""
+
+from sqlalchemy import Boolean
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Integer
+from sqlalchemy import LargeBinary
+from sqlalchemy import String
+from sqlalchemy import Text
+
+from limud.extensions import database
+
+
+class FlashcardRun(database.Model):  # type: ignore
+    __tablename__ = "flashcard_run"
+
+    id = Column(String, primary_key=True)
+
+    # Either a description of the words or an explicit list of cards,
+    # serialized as JSON, and only rewritten when the words change
+    words = Column(Text, nullable=False)
+    sorting = Column(Integer, nullable=False)
+    seed = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+
+    index = Column(Integer, nullable=False)
+    side = Column(Boolean, nullable=False)
+    progress_done = Column(Integer, nullable=False)
+    progress_total = Column(Integer, nullable=False)
+    passes = Column(Integer, nullable=False)
+
+    # Bitmap of completed cards (see FlashcardRunState)
+    completed = Column(LargeBinary, nullable=False)
+
+    # Runs that have not been touched for a while are evicted
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.id}: "
+            f"index {self.index}, "
+            f"progress {self.progress_done}/{self.progress_total}, "
+            f"expires {self.expires_at}>"
+        )
@@ -0,0 +1,280 @@
+"""Object-relational mapping for the spaced-repetition schedule of
+flashcards.
+
+Every card of a deck (each word of the vocabulary, and each non-empty
+cell of the conjugation tables) has a row in the 'card_schedule' table,
+holding its SM-2 state (see review_card()) and when it is next due.
+Picking the next due card of a deck is a single probe of the (deck,
+due_at) index, followed by a scan of as many rows as needed (see
+next_due_card()): it never reads the whole deck.
+
+Rows are kept in sync with the decks by triggers on the vocabulary and
+conjugation tables (whether they are written by the ORM or not). These
+triggers are created along with the schedule table, which is then
+filled with the existing cards, due right away (see the 'after_create'
+listener below). New cards are also due as soon as they are added.
+"""
+
+import datetime
+import enum
+from typing import Iterable
+from typing import Optional
+
+from sqlalchemy import Column
+from sqlalchemy import DDL
+from sqlalchemy import DateTime
+from sqlalchemy import Enum
+from sqlalchemy import Float
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.orm import Query
+
+from limud.backend.models.conjugation import ConjugatedVerb
+from limud.backend.models.conjugation import Tense
+from limud.extensions import database
+
+# Ease factor of new cards, and the lowest one of any card (see SM-2)
+INITIAL_EASE = 2.5
+MINIMUM_EASE = 1.3
+
+
+@enum.unique
+class Deck(enum.Enum):
+    VOCABULARY = "vocabulary"
+    CONJUGATION = "conjugation"
+
+
+@enum.unique
+class Grade(enum.IntEnum):
+    """Quality of a response, on the scale of SM-2 (from 0 to 5).
+
+    Only two grades are used, as flashcards are answered either
+    correctly or incorrectly.
+    """
+    # Incorrect response, but the correct one seemed easy to recall
+    AGAIN = 1
+    # Correct response, recalled after some hesitation
+    GOOD = 4
+
+
+class CardSchedule(database.Model):  # type: ignore
+    __tablename__ = "card_schedule"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    deck = Column(Enum(Deck), nullable=False)
+
+    # Row identifier of the card in the table of its deck
+    card_id = Column(Integer, nullable=False)
+
+    # State of SM-2: number of correct responses in a row, days until
+    # the next review after the last one, and ease factor
+    repetitions = Column(Integer, nullable=False, default=0)
+    interval = Column(Float, nullable=False, default=0.)
+    ease = Column(Float, nullable=False, default=INITIAL_EASE)
+
+    # Number of times the card was forgotten after being learned
+    lapses = Column(Integer, nullable=False, default=0)
+
+    due_at = Column(DateTime, nullable=False)
+    reviewed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_card_schedule_deck_card_id", "deck", "card_id",
+              unique=True),
+        # Serves 'WHERE deck = ? AND due_at <= ? ORDER BY due_at, id'
+        Index("ix_card_schedule_deck_due_at", "deck", "due_at"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.deck.value} {self.card_id}: "
+            f"due {self.due_at}, "
+            f"interval {self.interval:g} day(s), "
+            f"ease {self.ease:.2f}>"
+        )
+
+
+def next_due_card(deck: Deck,
+                  now: Optional[datetime.datetime] = None,
+                  excluded_tenses: Iterable[Tense] = ()) \
+                  -> Optional[CardSchedule]:
+    """The card of a deck that has been due for the longest, if any.
+
+    Parameters
+    ----------
+    deck : Deck
+    now : datetime.datetime | None
+        Time (in UTC) at which cards must be due. Defaults to now.
+    excluded_tenses : iterable of Tense
+        Conjugations of these tenses are never picked (e.g., those
+        excluded from practice by configuration).
+    """
+    return _due_cards(deck, now, excluded_tenses).first()
+
+
+def count_due_cards(deck: Deck,
+                    now: Optional[datetime.datetime] = None,
+                    excluded_tenses: Iterable[Tense] = (),
+                    limit: Optional[int] = None) -> int:
+    """Number of cards of a deck that are due (see next_due_card()),
+    counting no further than some limit, if specified.
+    """
+    query = _due_cards(deck, now, excluded_tenses).with_entities(
+        CardSchedule.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return database.session.query(func.count()) \
+        .select_from(query.subquery()) \
+        .scalar()
+
+
+def review_card(schedule_id: int,
+                grade: Grade,
+                now: Optional[datetime.datetime] = None) \
+                -> Optional[CardSchedule]:
+    """Reschedules a card after a review, as per SM-2, and commits.
+
+    Cards answered correctly are next due after 1 day, then 6 days,
+    then after intervals growing by their ease factor. Cards answered
+    incorrectly start over, and are due again right away (i.e., after
+    the other cards due at this point).
+
+    Returns
+    -------
+    CardSchedule | None
+        The card, or None if it was removed meanwhile.
+    """
+    card = CardSchedule.query.get(schedule_id)
+    if card is None:
+        return None
+
+    now = now or datetime.datetime.utcnow()
+
+    if grade >= 3:
+        if card.repetitions == 0:
+            card.interval = 1.
+        elif card.repetitions == 1:
+            card.interval = 6.
+        else:
+            card.interval = card.interval * card.ease
+        card.repetitions += 1
+    else:
+        if card.repetitions > 0:
+            card.lapses += 1
+        card.repetitions = 0
+        card.interval = 0.
+
+    # The ease factor does not change for a grade of 4
+    penalty = 5 - grade
+    card.ease = max(
+        MINIMUM_EASE,
+        card.ease + 0.1 - penalty * (0.08 + penalty * 0.02),
+    )
+
+    card.due_at = now + datetime.timedelta(days=card.interval)
+    card.reviewed_at = now
+    database.session.commit()
+
+    return card
+
+
+def _due_cards(deck: Deck,
+               now: Optional[datetime.datetime],
+               excluded_tenses: Iterable[Tense]) -> Query:
+    now = now or datetime.datetime.utcnow()
+    query = CardSchedule.query.filter(
+        CardSchedule.deck == deck,
+        CardSchedule.due_at <= now,
+    )
+
+    excluded_tenses = list(excluded_tenses)
+    if excluded_tenses:
+        query = query.filter(~CardSchedule.card_id.in_(
+            select([ConjugatedVerb.id])
+            .where(ConjugatedVerb.tense.in_(excluded_tenses))
+        ))
+
+    return query.order_by(CardSchedule.due_at, CardSchedule.id)
+
+
+# Triggers keeping the schedule in sync with the decks. Note that the
+# deck column stores the names of the members of Deck. The timestamps
+# of SQLite are in UTC, like those written by review_card().
+_COLUMNS = "deck, card_id, repetitions, interval, ease, lapses, due_at"
+_VOCABULARY = f"'{Deck.VOCABULARY.name}'"
+_CONJUGATION = f"'{Deck.CONJUGATION.name}'"
+_NEW_CARD = f"0, 0.0, {INITIAL_EASE}, 0, datetime('now')"
+
+SCHEDULE_DDL = (
+    f"""
+    CREATE TRIGGER card_schedule_word_insert AFTER INSERT ON vocabulary
+    BEGIN
+        INSERT INTO card_schedule ({_COLUMNS})
+        VALUES ({_VOCABULARY}, new.id, {_NEW_CARD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER card_schedule_word_delete AFTER DELETE ON vocabulary
+    BEGIN
+        DELETE FROM card_schedule
+        WHERE deck = {_VOCABULARY} AND card_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER card_schedule_conjugation_insert
+    AFTER INSERT ON conjugation
+    WHEN coalesce(new.hebrew, '') != ''
+    BEGIN
+        INSERT OR IGNORE INTO card_schedule ({_COLUMNS})
+        VALUES ({_CONJUGATION}, new.id, {_NEW_CARD});
+    END
+    """,
+    # Cells emptied are no longer cards, and cells filled become cards
+    f"""
+    CREATE TRIGGER card_schedule_conjugation_update
+    AFTER UPDATE OF hebrew ON conjugation
+    BEGIN
+        DELETE FROM card_schedule
+        WHERE deck = {_CONJUGATION} AND card_id = old.id
+          AND coalesce(new.hebrew, '') = '';
+        INSERT OR IGNORE INTO card_schedule ({_COLUMNS})
+        SELECT {_CONJUGATION}, new.id, {_NEW_CARD}
+        WHERE coalesce(new.hebrew, '') != '';
+    END
+    """,
+    f"""
+    CREATE TRIGGER card_schedule_conjugation_delete
+    AFTER DELETE ON conjugation
+    BEGIN
+        DELETE FROM card_schedule
+        WHERE deck = {_CONJUGATION} AND card_id = old.id;
+    END
+    """,
+    # Existing cards
+    f"""
+    INSERT INTO card_schedule ({_COLUMNS})
+    SELECT {_VOCABULARY}, id, {_NEW_CARD} FROM vocabulary ORDER BY id
+    """,
+    f"""
+    INSERT INTO card_schedule ({_COLUMNS})
+    SELECT {_CONJUGATION}, id, {_NEW_CARD} FROM conjugation
+    WHERE coalesce(hebrew, '') != '' ORDER BY id
+    """,
+)
+
+
+@event.listens_for(database.Model.metadata, "after_create")
+def _create_schedule_triggers(target, connection, tables=(), **kwargs):
+    """Creates the triggers once every table they refer to exists, if
+    the schedule table was just created (including on databases that
+    predate it).
+    """
+    if CardSchedule.__table__ not in tables:
+        return
+
+    for statement in SCHEDULE_DDL:
+        DDL(statement).execute_if(dialect="sqlite")(target, connection)
@@ -0,0 +1,143 @@
+"""Full-text search over the meanings of the words in the vocabulary.
+
+The 'vocabulary_fts' table is an SQLite FTS5 index over the description
+of every word, and the meanings of verbs in each (non-qal) binyan. It
+is an external content table: it stores no copy of the text, only the
+index, and triggers on the vocabulary table keep it in sync with every
+insert, update and delete (whether made by the ORM or not).
+
+The table and its triggers are created along with the vocabulary table
+(see the 'after_create' listener below), or by a migration on existing
+databases.
+"""
+
+import re
+from typing import List
+from typing import Optional
+
+from sqlalchemy import DDL
+from sqlalchemy import column
+from sqlalchemy import event
+from sqlalchemy import literal_column
+from sqlalchemy import table
+from sqlalchemy.orm import Query
+
+from limud.backend.models.vocabulary import Word
+from limud.extensions import database
+
+FTS_TABLE_NAME = "vocabulary_fts"
+
+# Columns of the vocabulary table that are indexed
+FTS_COLUMNS = (
+    "description", "nifal", "piel", "pual", "hifil", "hofal", "hitpael",
+)
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+# Prefix indexes of 2 and 3 characters keep prefix queries (e.g., while
+# the user is still typing a word) as fast as whole-word queries.
+FTS_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE_NAME} USING fts5(
+        {_columns},
+        content='vocabulary', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE_NAME}_insert AFTER INSERT ON vocabulary
+    BEGIN
+        INSERT INTO {FTS_TABLE_NAME} (rowid, {_columns})
+        VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE_NAME}_delete AFTER DELETE ON vocabulary
+    BEGIN
+        INSERT INTO {FTS_TABLE_NAME} ({FTS_TABLE_NAME}, rowid, {_columns})
+        VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE_NAME}_update
+    AFTER UPDATE OF {_columns} ON vocabulary
+    BEGIN
+        INSERT INTO {FTS_TABLE_NAME} ({FTS_TABLE_NAME}, rowid, {_columns})
+        VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE_NAME} (rowid, {_columns})
+        VALUES (new.id, {_new_values});
+    END
+    """,
+)
+
+for _statement in FTS_DDL:
+    event.listen(
+        Word.__table__, "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+
+event.listen(
+    Word.__table__, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE_NAME}").execute_if(
+        dialect="sqlite"),
+)
+
+# Hidden columns of the FTS5 table: 'rank' is the BM25 score of a
+# match, and lower is better.
+fts = table(FTS_TABLE_NAME, column("rowid"), column("rank"))
+
+# Words of a free-text query, as understood by the FTS5 tokenizer
+_regex_terms = re.compile(r"\w+")
+
+
+def as_fts_query(text: str) -> str:
+    """Converts free text into an FTS5 query matching words with all of
+    the given terms, the last one possibly incomplete.
+
+    Each term is quoted, so that user input can never be interpreted
+    as FTS5 syntax (e.g., 'NOT', '-', or unbalanced quotes).
+
+    Returns
+    -------
+    str
+        Query, or the empty string if the text contains no terms.
+    """
+    terms = [f'"{term}"' for term in _regex_terms.findall(text)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def match_words(query: Query, text: str) -> Query:
+    """Restricts a query on words to those whose meanings match some
+    free text (see as_fts_query()). Order the query by fts.c.rank to
+    get the best matches first.
+
+    Raises
+    ------
+    ValueError
+        If the text contains no terms to search for.
+    """
+    fts_query = as_fts_query(text)
+    if not fts_query:
+        raise ValueError(f"Nothing to search for in {text!r}")
+
+    return (
+        query
+            .join(fts, fts.c.rowid == Word.id)
+            .filter(literal_column(FTS_TABLE_NAME).match(fts_query))
+    )
+
+
+def search_word_ids(text: str, limit: Optional[int] = None) -> List[int]:
+    """IDs of the words whose meanings match some free text, best
+    matches first.
+    """
+    query = (
+        match_words(database.session.query(Word.id), text)
+            .order_by(fts.c.rank)
+            .limit(limit)
+    )
+    return [word_id for word_id, in query]
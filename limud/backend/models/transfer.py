@@ -0,0 +1,377 @@
+"""Bulk export and import of the vocabulary, as CSV or JSON Lines.
+
+Each word is a row (CSV) or a line (JSON Lines) holding the columns of
+the vocabulary table (see models.vocabulary), except those derived
+from the others (sort_key, version). Enums are written as their values
+(e.g., "noun"), and missing values as empty fields (CSV) or null.
+
+Both directions stream: exports fetch words in chunks (see
+stream_vocabulary(), which also serves other full scans of the
+vocabulary), and imports write them in batches, with one executemany
+statement for the new words and another for the existing ones (i.e.,
+whose id is in the vocabulary, which are updated), in one transaction
+per batch.
+"""
+
+import csv
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import TextIO
+from typing import Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy import select
+
+from limud.backend.collation import COLLATION_NAME
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import NounGender
+from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import invalidate_cached_words
+from limud.backend.models.vocabulary import invalidate_chapter_ids
+from limud.backend.models.vocabulary import remove_niqqudot
+from limud.extensions import database
+
+FORMATS = ("csv", "jsonl")
+
+# Columns of the vocabulary, in the order they are exported
+COLUMNS = (
+    "id", "hebrew", "description", "category", "chapter", "favorite",
+    # Nouns
+    "gender", "plabs", "sgcst", "plcst",
+    # Verbs
+    "nifal", "piel", "pual", "hifil", "hofal", "hitpael",
+    # Adjectives
+    "pladj", "femadj",
+)
+
+_TEXT_COLUMNS = (
+    "description", "plabs", "sgcst", "plcst", "nifal", "piel", "pual",
+    "hifil", "hofal", "hitpael", "pladj", "femadj",
+)
+
+_FORMATS_OF_SUFFIXES = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+@dataclass
+class TransferReport:
+    """Progress of an import.
+
+    Attributes
+    ----------
+    rows : int
+        Number of words read.
+    inserted : int
+        Number of new words.
+    updated : int
+        Number of existing words, which were overwritten.
+    elapsed_s : float
+        Seconds since the import started.
+    """
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    elapsed_s: float = 0.
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s else 0.
+
+
+def format_of_filename(filename: str) -> str:
+    """The format of a file, guessed from its extension.
+
+    Raises
+    ------
+    ValueError
+        If the extension is not that of a known format.
+    """
+    for suffix, format in _FORMATS_OF_SUFFIXES.items():
+        if filename.lower().endswith(suffix):
+            return format
+
+    raise ValueError(f"Unknown format for {filename}, expected one of "
+                     f"{', '.join(_FORMATS_OF_SUFFIXES)}")
+
+
+def export_vocabulary(file: TextIO,
+                      format: str,
+                      favorites: bool = False,
+                      alphabetical: bool = False,
+                      chunk_size: int = 1000) -> int:
+    """Writes out every word in the vocabulary, by increasing id.
+
+    Parameters
+    ----------
+    file : file-like object
+        Open in text mode (with newline="" for CSV).
+    format : str
+        One of FORMATS.
+    favorites : bool
+        Whether to write out favorites only.
+    alphabetical : bool
+        Whether to write out words in alphabetical order instead.
+    chunk_size : int
+        Number of words fetched from the database at once.
+
+    Returns
+    -------
+    int
+        Number of words written.
+    """
+    write = _record_writer(file, format)
+
+    count = 0
+    for record in stream_vocabulary(favorites, alphabetical, chunk_size):
+        write(record)
+        count += 1
+
+    return count
+
+
+def stream_vocabulary(favorites: bool = False,
+                      alphabetical: bool = False,
+                      chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Reads the exported fields of every word in the vocabulary, by
+    increasing id, a chunk at a time: unlike a query for the words,
+    memory usage does not depend on the size of the vocabulary, and
+    the first words come as soon as they are read.
+
+    Parameters
+    ----------
+    favorites : bool
+        Whether to read favorites only.
+    alphabetical : bool
+        Whether to read words in alphabetical order instead (which
+        is served by an index, so it does not delay the first words).
+    chunk_size : int
+        Number of words fetched from the database at once.
+
+    Yields
+    ------
+    dict
+        The fields of a word, keyed by column (see COLUMNS).
+    """
+    table = Word.__table__
+    query = select([table.c[column] for column in COLUMNS])
+
+    if favorites:
+        query = query.where(table.c.favorite.is_(True))
+    if alphabetical:
+        query = query.order_by(table.c.hebrew.collate(COLLATION_NAME))
+    query = query.order_by(table.c.id)
+
+    # The SQLite driver steps through the rows as they are fetched
+    result = database.session.execute(query)
+
+    while True:
+        rows = result.fetchmany(chunk_size)
+        if not rows:
+            return
+
+        for row in rows:
+            yield _as_record(row)
+
+
+def import_vocabulary(file: TextIO,
+                      format: str,
+                      batch_size: int = 10_000,
+                      chapter: int = -1) -> Iterator[TransferReport]:
+    """Reads words and writes them to the vocabulary: words with an id
+    that is already in the vocabulary replace the existing word, and
+    all other words are inserted.
+
+    Parameters
+    ----------
+    file : file-like object
+        Open in text mode (with newline="" for CSV).
+    format : str
+        One of FORMATS.
+    batch_size : int
+        Number of words written per transaction.
+    chapter : int
+        Chapter of the words without one (like words imported from
+        Wiktionary, by default).
+
+    Yields
+    ------
+    TransferReport
+        Progress so far, after each transaction. The last one is the
+        final report.
+
+    Raises
+    ------
+    ValueError
+        If a word is invalid (e.g., it has no category), or has the
+        same id as a previous word, in which case the words of the
+        previous batches were already written.
+    """
+    start = time.perf_counter()
+    report = TransferReport()
+    batch: List[Dict[str, Any]] = []
+    ids: Set[int] = set()
+
+    for line, record in _read_records(file, format):
+        row = _as_row(record, line, chapter)
+        if row["id"] is not None:
+            if row["id"] in ids:
+                raise ValueError(f"Line {line}: Duplicate id {row['id']}")
+            ids.add(row["id"])
+
+        batch.append(row)
+        if len(batch) == batch_size:
+            _write_batch(batch, report)
+            report.elapsed_s = time.perf_counter() - start
+            yield report
+            batch = []
+
+    if batch:
+        _write_batch(batch, report)
+    report.elapsed_s = time.perf_counter() - start
+    yield report
+
+
+def _record_writer(file: TextIO,
+                   format: str) -> Callable[[Dict[str, Any]], Any]:
+    if format == "csv":
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        return writer.writerow
+    elif format == "jsonl":
+        return lambda record: file.write(
+            json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        raise ValueError(f"Unknown format: {format}")
+
+
+def _read_records(file: TextIO,
+                  format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields the line number and fields of each word."""
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    elif format == "jsonl":
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                yield line, json.loads(text)
+    else:
+        raise ValueError(f"Unknown format: {format}")
+
+
+def _as_record(row) -> Dict[str, Any]:
+    """The exported fields of a word (a row of the vocabulary)."""
+    record = dict(zip(COLUMNS, row))
+    for column in ("category", "gender"):
+        if record[column] is not None:
+            record[column] = record[column].value
+    return record
+
+
+def _as_row(record: Dict[str, Any],
+            line: int,
+            chapter: int) -> Dict[str, Any]:
+    """The row of the vocabulary for some imported fields, which may
+    be strings (CSV) or typed values (JSON), in some chapter unless
+    they specify one.
+    """
+    def field(column: str) -> Optional[Any]:
+        value = record.get(column)
+        return None if value == "" else value
+
+    try:
+        hebrew = field("hebrew")
+        if hebrew is None:
+            raise ValueError("Missing hebrew")
+
+        category = GrammaticalCategory(field("category"))
+        if category is GrammaticalCategory.GENERIC:
+            raise ValueError("Missing category")
+
+        gender = field("gender")
+        if gender is not None:
+            gender = NounGender(gender)
+        elif category is GrammaticalCategory.NOUN:
+            gender = NounGender.infer_from_word(hebrew)
+
+        row = {
+            "id": _as_int(field("id")),
+            "hebrew": hebrew,
+            "category": category,
+            "chapter": chapter if field("chapter") is None
+                       else _as_int(field("chapter")),
+            "favorite": _as_bool(field("favorite")),
+            "gender": gender,
+            "sort_key": remove_niqqudot(hebrew),
+        }
+    except ValueError as e:
+        raise ValueError(f"Line {line}: {e}") from e
+
+    for column in _TEXT_COLUMNS:
+        row[column] = field(column)
+
+    return row
+
+
+def _as_int(value: Optional[Any]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def _as_bool(value: Optional[Any]) -> bool:
+    if isinstance(value, str):
+        if value.lower() not in ("0", "1", "false", "true"):
+            raise ValueError(f"Invalid boolean: {value}")
+        return value.lower() in ("1", "true")
+    return bool(value)
+
+
+def _write_batch(rows: List[Dict[str, Any]], report: TransferReport):
+    """Inserts new words and updates existing ones, in a transaction."""
+    table = Word.__table__
+    ids = [row["id"] for row in rows if row["id"] is not None]
+    existing = set()
+    if ids:
+        existing = {
+            word_id for word_id, in database.session.execute(
+                select([table.c.id]).where(table.c.id.in_(ids)))
+        }
+
+    new = []
+    updated = []
+    for row in rows:
+        if row["id"] in existing:
+            row = dict(row)
+            row["word_id"] = row.pop("id")
+            updated.append(row)
+        else:
+            new.append(row)
+
+    if new:
+        database.session.execute(table.insert(), new)
+    if updated:
+        # Invalidate cached renderings of the words (see Word.version)
+        database.session.execute(
+            table.update()
+            .where(table.c.id == bindparam("word_id"))
+            .values(version=table.c.version + 1),
+            updated,
+        )
+        invalidate_cached_words()
+
+    invalidate_chapter_ids()
+    database.session.commit()
+
+    report.rows += len(rows)
+    report.inserted += len(new)
+    report.updated += len(updated)
@@ -9,6 +9,10 @@ All words have the following attributes:
         See also the words.GrammaticalCategory Python enum.
     * chapter: Chapter in which the word was introduced.
     * favorite: Whether this is added to the favorites list.
+    * sort_key: The consonants of the word (without niqqudot), by
+        which words are sorted alphabetically.
+    * version: Incremented by the ORM whenever the row is updated
+        (e.g., to invalidate cached renderings of the word).
 
 Nouns have the following, additional attributes:
 
@@ -35,17 +39,33 @@ For verbs, the 'description' field has the meaning of the qal
 """
 
 import enum
+import re
+import time
+import unicodedata
+from typing import List
 
+from flask import current_app
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import Enum
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
 
+from limud.backend.collation import COLLATION_NAME
+from limud.backend.models.cache import bump_cache_version
+from limud.backend.models.cache import get_cache_version
 from limud.extensions import database
 
 QAMATS_HE_BYTES = b'\xd6\xb8\xd7\x94'
 
+# Name of the version counter of cached chapter IDs (see models.cache)
+CHAPTERS_CACHE_NAME = "chapters"
+
+# Name of the version counter of words cached by processes, e.g., the
+# prefetched cards of flashcard runs (see models.cache)
+WORDS_CACHE_NAME = "words"
+
 
 @enum.unique
 class GrammaticalCategory(enum.Enum):
@@ -99,6 +119,15 @@ class Word(database.Model):  # type: ignore
     category = Column(Enum(GrammaticalCategory), nullable=False)
     chapter = Column(Integer)
     favorite = Column(Boolean, default=False)
+    sort_key = Column(String, nullable=False, index=True)
+    # Incremented whenever the word is updated, as cached renderings of
+    # the word are keyed by it (see flashcards.formatting)
+    version = Column(Integer, nullable=False, server_default="1")
+
+    __table_args__ = (
+        # Serves 'ORDER BY hebrew COLLATE HEBREW' (see collation.py)
+        Index("ix_vocabulary_hebrew_collated", hebrew.collate(COLLATION_NAME)),
+    )
 
     __mapper_args__ = {
         "polymorphic_on": category,
@@ -219,6 +248,7 @@ def create_word_from_form_dict(*,
             category=category,
             chapter=int(chapter),
             favorite=False,
+            sort_key=remove_niqqudot(hebrew),
             gender=gender,
             plabs=plabs,
             sgcst=sgcst,
@@ -231,6 +261,7 @@ def create_word_from_form_dict(*,
             category=category,
             chapter=int(chapter),
             favorite=False,
+            sort_key=remove_niqqudot(hebrew),
             nifal=_capitalize(nifal),
             piel=_capitalize(piel),
             pual=_capitalize(pual),
@@ -245,6 +276,7 @@ def create_word_from_form_dict(*,
             category=category,
             chapter=int(chapter),
             favorite=False,
+            sort_key=remove_niqqudot(hebrew),
             pladj=pladj,
             femadj=femadj,
         )
@@ -255,6 +287,7 @@ def create_word_from_form_dict(*,
             category=category,
             chapter=int(chapter),
             favorite=False,
+            sort_key=remove_niqqudot(hebrew),
         )
     elif category is GrammaticalCategory.PARTICLE:
         return Particle(
@@ -263,6 +296,7 @@ def create_word_from_form_dict(*,
             category=category,
             chapter=int(chapter),
             favorite=False,
+            sort_key=remove_niqqudot(hebrew),
         )
     else:
         raise TypeError
@@ -285,7 +319,8 @@ def update_word_from_form_dict(word: Word,
                                hitpael: str,
                                pladj: str,
                                femadj: str):
-    """Updates an existing Word, based on a request's form.
+    """Updates an existing Word, based on a request's form, and
+    increments its version.
 
     Important: this merely updates the Python object, it does not
     affect the database state (e.g., it does not call commit() or
@@ -297,7 +332,9 @@ def update_word_from_form_dict(word: Word,
     See the documentation for Word. Note inputs to this function are
     all strings and need to be cast to the appropriate type.
     """
+    word.version = Word.version + 1
     word.hebrew = hebrew
+    word.sort_key = remove_niqqudot(hebrew)
     word.description = _capitalize(description)
     word.category = GrammaticalCategory(category)
     word.chapter = int(chapter)
@@ -326,6 +363,81 @@ def update_word_from_form_dict(word: Word,
         word.hitpael = _capitalize(hitpael)
 
 
+def get_chapter_ids() -> List[int]:
+    """Retrieves the IDs of all chapters with words, in sorted order.
+
+    Each process caches them in memory (they are needed to render the
+    main menu of every page). Their version counter in the database is
+    checked at most every CHAPTERS_CACHE_CHECK_INTERVAL seconds, so
+    another process may take that long to see a new chapter, whereas
+    the process that wrote it sees it right away.
+    """
+    cache = current_app.extensions.setdefault(CHAPTERS_CACHE_NAME, {})
+    interval = current_app.config["CHAPTERS_CACHE_CHECK_INTERVAL"]
+    now = time.monotonic()
+
+    if "chapter_ids" in cache:
+        if now - cache["checked_at"] < interval:
+            return cache["chapter_ids"]
+
+        if get_cache_version(CHAPTERS_CACHE_NAME) == cache["version"]:
+            cache["checked_at"] = now
+            return cache["chapter_ids"]
+
+    version = get_cache_version(CHAPTERS_CACHE_NAME)
+    query = database.session.query(Word.chapter).distinct()
+    chapter_ids = sorted(chapter_id for chapter_id, in query)
+
+    cache.update(chapter_ids=chapter_ids, version=version, checked_at=now)
+    return chapter_ids
+
+
+def invalidate_chapter_ids():
+    """Marks the chapter IDs cached by every process as stale. Call this
+    whenever words are added, deleted, or moved to another chapter.
+
+    Important: like bump_cache_version(), this does not commit. The
+    parent caller is responsible for committing.
+    """
+    bump_cache_version(CHAPTERS_CACHE_NAME)
+    current_app.extensions.get(CHAPTERS_CACHE_NAME, {}).clear()
+
+
+def invalidate_cached_words():
+    """Marks the words cached by every process (e.g., prefetched
+    flashcards) as stale. Call this whenever existing words are
+    modified or deleted.
+
+    Important: like bump_cache_version(), this does not commit. The
+    parent caller is responsible for committing.
+    """
+    bump_cache_version(WORDS_CACHE_NAME)
+
+
+# Matches anything but Hebrew consonants, once decomposed (see below)
+_regex_not_consonant = re.compile(r"[^\u05d0-\u05f4]")
+
+def remove_niqqudot(hebrew: str) -> str:
+    """Helper method that removes niqqudot, to enable sorting Hebrew
+    words alphabetically.
+
+    The data must be normalized since a consonant followed by a niqqud
+    may very well be represented by a single character.
+
+    Parameters
+    ----------
+    hebrew : str
+        String with diacritics.
+
+    Returns
+    -------
+    str
+        String without diacritics.
+    """
+    normalized = unicodedata.normalize("NFD", hebrew)
+    return _regex_not_consonant.sub("", normalized)
+
+
 def _capitalize(string: str) -> str:
     """Capitalize first letter of string without modifying the rest.
     """
@@ -0,0 +1,172 @@
+"""Budgets of SQL queries, to catch N+1 query patterns early.
+
+Views declare how many statements serving a request may execute, e.g.:
+
+    @vocabulary.route("/review/", methods=["GET", "POST"])
+    @query_budget(3)
+    def review():
+        ...
+
+A budget covers every action of the view, in the worst case: including
+the periodic checks of the versions of cached data, the loading of cold
+or stale caches (see limud.backend.models.cache), and the statements of
+the flashcard run store, whichever its backend.
+
+When ENFORCE_QUERY_BUDGETS is set (e.g., in tests, see limud.testing),
+the statements of each such view (including those of its templates and
+context processors) are recorded, and the view fails with
+QueryBudgetExceeded if they exceed its budget, listing the statements
+that were repeated: typically, a query issued once per row of a result
+instead of once overall. Otherwise, budgets cost nothing.
+
+Any block of code can also be held to a budget (see
+assert_query_budget()), e.g., a request made by a test client, to
+check a tighter budget for some action of a view.
+
+Only the statements of the current thread are counted, and not those of
+background threads sharing the engine (e.g., the card prefetcher).
+"""
+
+import collections
+import contextlib
+import functools
+import threading
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from flask import current_app as app
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from limud.extensions import database
+
+# How many repeated statements, and how much of each, to report
+_REPORTED_STATEMENTS = 5
+_REPORTED_LENGTH = 200
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code executes more SQL statements than its
+    budget allows.
+    """
+    def __init__(self, what: str, budget: int, statements: Sequence[str]):
+        self.budget = budget
+        self.statements = list(statements)
+
+        lines = [
+            f"{what} executed {len(statements)} SQL statement(s), over its "
+            f"budget of {budget}"
+        ]
+        for statement, count in repeated_statements(statements)[
+                :_REPORTED_STATEMENTS]:
+            lines.append(f"  {count} x {_abbreviate(statement)}")
+
+        super().__init__("\n".join(lines))
+
+
+class QueryRecorder:
+    """Records the SQL statements executed on an engine by the current
+    thread, while in use as a context manager.
+    """
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+        self._thread = threading.get_ident()
+
+    def __enter__(self) -> "QueryRecorder":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+
+def repeated_statements(statements: Sequence[str]) -> List[Tuple[str, int]]:
+    """The statements executed more than once (whatever their
+    parameters), with their number of executions, most frequent first.
+    """
+    counts = collections.Counter(statements)
+    return [
+        (statement, count)
+        for statement, count in counts.most_common()
+        if count > 1
+    ]
+
+
+@contextlib.contextmanager
+def assert_query_budget(budget: int,
+                        what: str = "Block",
+                        engine: Optional[Engine] = None) \
+                        -> Iterator[QueryRecorder]:
+    """Fails if the enclosed block executes more SQL statements than a
+    budget allows (unless it raises an exception first).
+
+    Parameters
+    ----------
+    budget : int
+        Maximum number of statements.
+    what : str
+        Description of the block, for the error message.
+    engine : sqlalchemy.engine.Engine | None
+        Engine executing the statements. Defaults to that of the
+        current application.
+
+    Yields
+    ------
+    QueryRecorder
+        The statements executed so far.
+
+    Raises
+    ------
+    QueryBudgetExceeded
+    """
+    if engine is None:
+        engine = database.get_engine(app)
+
+    with QueryRecorder(engine) as recorder:
+        yield recorder
+
+    if len(recorder) > budget:
+        raise QueryBudgetExceeded(what, budget, recorder.statements)
+
+
+def query_budget(budget: int) -> Callable[[Callable], Callable]:
+    """Declares the budget of SQL statements of a view, enforced if
+    ENFORCE_QUERY_BUDGETS is set (see the module's docs).
+
+    The budget is available as the 'query_budget' attribute of the view.
+    """
+    def decorator(view: Callable) -> Callable:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not app.config["ENFORCE_QUERY_BUDGETS"]:
+                return view(*args, **kwargs)
+
+            what = f"{request.method} {request.path} ({request.endpoint})"
+            with assert_query_budget(budget, what=what):
+                return view(*args, **kwargs)
+
+        wrapper.query_budget = budget  # type: ignore
+        return wrapper
+
+    return decorator
+
+
+def _abbreviate(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > _REPORTED_LENGTH:
+        statement = statement[:_REPORTED_LENGTH - 3] + "..."
+    return statement
@@ -0,0 +1,22 @@
+from .cache import PARSER_VERSION
+from .cache import CachedPage
+from .cache import PageCache
+from .client import TokenBucket
+from .client import WiktionaryClient
+from .client import get_wiktionary_client
+from .client import init_wiktionary_client
+from .dump import DumpReport
+from .dump import ingest_dump
+from .dump import read_dump
+from .importer import ImportFailure
+from .importer import ImportReport
+from .importer import import_words
+from .prefetch import WordPrefetcher
+from .prefetch import get_wotm_prefetcher
+from .prefetch import init_wotm_prefetcher
+from .scraper import RECEIVABLE_H3_TAGS
+from .scraper import UnparsablePageError
+from .scraper import WiktionaryWordParse
+from .scraper import get_response_from_wiktionary
+from .scraper import parse_response_from_wiktionary
+from .scraper import scrape_page_from_wiktionary
\ No newline at end of file
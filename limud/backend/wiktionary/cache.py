@@ -0,0 +1,340 @@
+"""Persistent cache of the pages scraped from Wiktionary.
+
+Each page is kept, keyed by its URL, in a standalone SQLite database
+(by default in the instance folder), along with:
+
+    * The validators of the response (ETag, Last-Modified), so that a
+      stale page can be revalidated with a conditional request, which
+      Wiktionary answers with a bodyless 304 if the page is unchanged.
+    * The words parsed from the page, so that a hit skips both the
+      network and the parser. Parses made by an older version of the
+      parser (see PARSER_VERSION) are redone from the stored page.
+
+Pages are fresh for WIKTIONARY_CACHE_FRESHNESS seconds after they were
+last fetched or revalidated, and evicted WIKTIONARY_CACHE_TTL seconds
+after they were last used, or as soon as the cache grows beyond
+WIKTIONARY_CACHE_MAX_BYTES (least recently used pages first).
+
+Lookups of fresh pages (hits), stale pages and absent pages (misses),
+and revalidations which found the page unchanged, are counted in the
+database itself, so that they add up across processes and restarts
+(see stats()).
+"""
+
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from requests import Response
+
+# Increment whenever the parser changes its output, so that cached
+# parses are redone
+PARSER_VERSION = 1
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS page (
+        url TEXT PRIMARY KEY,
+        body BLOB NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        parses TEXT NOT NULL,
+        parser_version INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        validated_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_page_accessed_at ON page (accessed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS counter (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+)
+
+COUNTERS = ("hits", "stale", "misses", "not_modified", "evictions")
+
+
+@dataclass
+class CachedPage:
+    """A page from the cache.
+
+    Attributes
+    ----------
+    url : str
+    html : str
+        Contents of the page.
+    etag : str | None
+    last_modified : str | None
+        Validators of the response, if the server sent any.
+    parses : [dict] | None
+        Fields of the words parsed from the page, or None if they were
+        parsed by an older version of the parser.
+    fresh : bool
+        Whether the page can be used without revalidation.
+    """
+    url: str
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    parses: Optional[List[dict]]
+    fresh: bool
+
+    def as_response(self) -> Response:
+        """The page, as if it had just been retrieved."""
+        response = Response()
+        response.status_code = 200
+        response.url = self.url
+        response.encoding = "utf-8"
+        response._content = self.html.encode()
+        return response
+
+    def validators(self) -> Dict[str, str]:
+        """Headers of a conditional request for the page."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Cache of pages and of their parses, in an SQLite database.
+
+    The database is created on first use. Thread-safe, and safe to
+    share between processes.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Location of the database.
+    freshness : float
+        Seconds during which a page is used without revalidation.
+    ttl : float
+        Seconds after its last use when a page is evicted.
+    max_bytes : int
+        Maximum total size of the (compressed) pages.
+    """
+    def __init__(self,
+                 path: pathlib.Path,
+                 freshness: float,
+                 ttl: float,
+                 max_bytes: int):
+        self.path = pathlib.Path(path)
+        self.freshness = freshness
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Looks up a page, and counts the lookup as a hit (fresh page),
+        a stale lookup, or a miss (absent page).
+        """
+        now = time.time()
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                row = connection.execute(
+                    "SELECT body, etag, last_modified, parses, "
+                    "parser_version, validated_at FROM page WHERE url = ?",
+                    (url,),
+                ).fetchone()
+
+                if row is None:
+                    self._count(connection, "misses")
+                    return None
+
+                body, etag, last_modified, parses, parser_version, \
+                    validated_at = row
+
+                fresh = now - validated_at < self.freshness
+                self._count(connection, "hits" if fresh else "stale")
+                connection.execute(
+                    "UPDATE page SET accessed_at = ? WHERE url = ?",
+                    (now, url),
+                )
+
+        return CachedPage(
+            url=url,
+            html=zlib.decompress(body).decode(),
+            etag=etag,
+            last_modified=last_modified,
+            parses=(json.loads(parses)
+                    if parser_version == PARSER_VERSION else None),
+            fresh=fresh,
+        )
+
+    def put(self, url: str, response: Response, parses: List) -> None:
+        """Stores a page and the words parsed from it (dataclasses), and
+        evicts pages as needed.
+        """
+        body = zlib.compress(response.text.encode())
+        now = time.time()
+
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO page VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        body,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                        json.dumps([asdict(parse) for parse in parses]),
+                        PARSER_VERSION,
+                        len(body),
+                        now,
+                        now,
+                    ),
+                )
+                self._evict(connection, now)
+
+    def revalidated(self, url: str) -> None:
+        """Marks a stale page as fresh again, after the server confirmed
+        it did not change (counted as not_modified).
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "UPDATE page SET validated_at = ? WHERE url = ?",
+                    (time.time(), url),
+                )
+                self._count(connection, "not_modified")
+
+    def set_parses(self, url: str, parses: List) -> None:
+        """Replaces the words parsed from a page (dataclasses), e.g.,
+        after parsing it again with a newer version of the parser.
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "UPDATE page SET parses = ?, parser_version = ? "
+                    "WHERE url = ?",
+                    (json.dumps([asdict(parse) for parse in parses]),
+                     PARSER_VERSION, url),
+                )
+
+    def evict(self) -> int:
+        """Evicts expired pages, and pages beyond the maximum size.
+
+        Returns
+        -------
+        int
+            Number of pages evicted.
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                return self._evict(connection, time.time())
+
+    def purge(self) -> int:
+        """Empties the cache, and resets its counters.
+
+        Returns
+        -------
+        int
+            Number of pages removed.
+        """
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                removed = connection.execute("DELETE FROM page").rowcount
+                connection.execute("DELETE FROM counter")
+
+        with self._lock:
+            self._connect().execute("VACUUM")
+
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            connection = self._connect()
+            pages, size, oldest = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(accessed_at) "
+                "FROM page"
+            ).fetchone()
+            counters = dict(connection.execute(
+                "SELECT name, value FROM counter").fetchall())
+
+        stats = {name: counters.get(name, 0) for name in COUNTERS}
+        lookups = stats["hits"] + stats["stale"] + stats["misses"]
+        stats.update(
+            pages=pages,
+            bytes=size,
+            idle_s=0. if oldest is None else time.time() - oldest,
+            hit_rate=stats["hits"] / lookups if lookups else 0.,
+        )
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """The connection to the database, created on first use. The
+        caller must hold the lock.
+        """
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None,
+                check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            connection.isolation_level = "DEFERRED"
+            self._connection = connection
+
+        return self._connection
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> int:
+        expired = connection.execute(
+            "DELETE FROM page WHERE accessed_at < ?", (now - self.ttl,),
+        ).rowcount
+
+        # Most recently used pages first, until they no longer fit
+        oversized = connection.execute(
+            """
+            DELETE FROM page WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (
+                        ORDER BY accessed_at DESC, url
+                    ) AS total
+                    FROM page
+                ) WHERE total > ?
+            )
+            """,
+            (self.max_bytes,),
+        ).rowcount
+
+        evicted = expired + oversized
+        if evicted:
+            self._count(connection, "evictions", evicted)
+        return evicted
+
+    @staticmethod
+    def _count(connection: sqlite3.Connection, name: str, n: int = 1):
+        connection.execute(
+            "INSERT INTO counter VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
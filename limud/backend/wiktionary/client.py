@@ -0,0 +1,322 @@
+"""HTTP client for Wiktionary.
+
+All requests to Wiktionary go through a shared WiktionaryClient, which:
+
+    * Keeps connections alive in a pool (a requests.Session), so that
+      consecutive scrapes do not pay for TCP and TLS setup again.
+    * Times out requests that take too long to connect or to respond.
+    * Spaces requests out with a token bucket (WIKTIONARY_RATE requests
+      per second on average, in bursts of at most WIKTIONARY_BURST).
+    * Retries failed requests (connection errors, timeouts, and
+      responses such as 429 or 503) after an exponential backoff with
+      full jitter, or after the delay requested by Wiktionary.
+    * Runs speculative (hedged) requests in parallel on a thread pool
+      (see first_of()).
+
+It also holds the persistent cache of scraped pages, if enabled (see
+wiktionary.cache), which the scraper consults before any request.
+"""
+
+import logging
+import pathlib
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+import requests
+from flask import Flask
+from flask import current_app as app
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from limud.backend.wiktionary.cache import PageCache
+
+# Key of the client in the application's extensions
+_EXTENSION_KEY = "wiktionary_client"
+
+# Responses worth retrying: the server is overloaded or rate limiting
+RETRIABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Rate limiter allowing bursts of at most `burst` operations, and
+    `rate` operations per second on average. Thread-safe.
+    """
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Invalid rate {rate} or burst {burst}")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, waiting for one to be available if needed.
+
+        Returns
+        -------
+        float
+            Number of seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated_at) * self.rate,
+            )
+            self._updated_at = now
+
+            # Take the token right away, even if it is yet to be earned,
+            # so that concurrent callers queue up behind each other
+            self._tokens -= 1
+            delay = max(0., -self._tokens / self.rate)
+
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class WiktionaryClient:
+    """Shared, rate-limited HTTP client for Wiktionary.
+
+    Parameters
+    ----------
+    base_url : str
+        Origin of Wiktionary (or of a stand-in server).
+    timeout : (float, float)
+        Seconds to wait for a connection, and then for a response.
+    rate : float
+        Average number of requests per second.
+    burst : int
+        Maximum number of requests sent at once.
+    retries : int
+        Number of times a failed request is retried.
+    backoff : float
+        Base delay before retrying, in seconds. The n-th retry waits a
+        random delay of up to backoff * 2^n seconds, or the delay
+        requested by the server (in Retry-After), of at most
+        backoff * 2^retries seconds.
+    pool_size : int
+        Maximum number of concurrent connections (and of concurrent
+        hedged requests).
+    hedge : int
+        Default number of speculative requests for random pages.
+    cache : PageCache | None
+        Persistent cache of scraped pages, if any.
+    """
+    def __init__(self,
+                 base_url: str,
+                 timeout: Tuple[float, float] = (3.05, 10.),
+                 rate: float = 5.,
+                 burst: int = 10,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 pool_size: int = 8,
+                 hedge: int = 3,
+                 cache: Optional[PageCache] = None):
+        if hedge < 1:
+            raise ValueError(f"Invalid number of hedged requests: {hedge}")
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.cache = cache
+        self.requests = 0
+        self.retried = 0
+        self.throttled_s = 0.
+        self._bucket = TokenBucket(rate=rate, burst=burst)
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+        # Block rather than open extra connections beyond the pool size
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="wiktionary")
+
+    def get(self, url: str, **kwargs) -> Response:
+        """Retrieves a page (see request() for the arguments)."""
+        return self.request("GET", url, **kwargs)
+
+    def random_page(self) -> Response:
+        """Retrieves a random Hebrew lemma, following the redirection
+        from Special:RandomInCategory.
+        """
+        url = f"{self.base_url}/wiki/Special:RandomInCategory"
+
+        headers = {
+            "Referer": url,
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Origin": self.base_url,
+        }
+
+        payload = {
+            "wpcategory": "Hebrew lemmas",
+            "wpEditToken": "+\\",
+            "title": "Special:RandomInCategory",
+            "redirectparams": "",
+        }
+
+        response = self.request(
+            "POST", url, headers=headers, data=payload, allow_redirects=True)
+        logging.info("Redirected to: %s", response.url)
+
+        return response
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        """Sends a request, retrying it if it fails transiently.
+
+        Returns
+        -------
+        requests.Response
+            The response, which may still have a retriable status (e.g.,
+            503) once all retries were exhausted.
+
+        Raises
+        ------
+        requests.RequestException
+            If the last attempt failed to connect, or timed out.
+        """
+        error: Optional[requests.RequestException] = None
+
+        for attempt in range(self.retries + 1):
+            throttled_s = self._bucket.acquire()
+            with self._lock:
+                self.requests += 1
+                self.throttled_s += throttled_s
+
+            try:
+                response = self._session.request(
+                    method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                if attempt == self.retries:
+                    break
+                delay = self._backoff(attempt)
+                logging.warning("%s %s failed (%s), retrying in %.2f s",
+                                method, url, e, delay)
+            else:
+                if (response.status_code not in RETRIABLE_STATUS_CODES
+                        or attempt == self.retries):
+                    return response
+                delay = self._backoff(attempt, response)
+                logging.warning("%s %s returned %i, retrying in %.2f s",
+                                method, url, response.status_code, delay)
+
+            with self._lock:
+                self.retried += 1
+            time.sleep(delay)
+
+        if error is None:
+            raise ValueError(f"Invalid number of retries: {self.retries}")
+        raise error
+
+    def first_of(self, task: Callable[[], T], k: int) -> T:
+        """Runs a task k times in parallel, and returns the first result
+        of a run that did not raise. The other runs are abandoned (their
+        results are discarded).
+
+        Raises
+        ------
+        Exception
+            Whatever the last run raised, if they all did.
+        """
+        if k == 1:
+            return task()
+
+        pending = {self._executor.submit(task) for _ in range(k)}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+
+        if error is None:
+            raise ValueError(f"Invalid number of runs: {k}")
+        raise error
+
+    def close(self):
+        """Stops the hedged requests in progress, and closes the pool of
+        connections.
+        """
+        self._executor.shutdown(wait=False)
+        self._session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "throttled_s": self.throttled_s,
+        }
+
+    def _backoff(self, attempt: int, response: Optional[Response] = None) \
+            -> float:
+        """Delay before retrying: as requested by the server, if it did
+        (within the longest backoff, backoff * 2^retries), or else a
+        random delay under an exponentially growing cap.
+        """
+        if response is not None:
+            try:
+                delay = float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                pass
+            else:
+                # Negative or NaN delays are not worth waiting for
+                if not delay >= 0:
+                    delay = 0.
+                return min(delay, self.backoff * 2 ** self.retries)
+
+        with self._lock:
+            return self._rng.uniform(0, self.backoff * 2 ** attempt)
+
+
+def init_wiktionary_client(app: Flask):
+    """Creates the Wiktionary client of an application, as configured."""
+    cache = None
+    if app.config["WIKTIONARY_CACHE_PATH"] is not None:
+        cache = PageCache(
+            path=pathlib.Path(app.config["WIKTIONARY_CACHE_PATH"]),
+            freshness=app.config["WIKTIONARY_CACHE_FRESHNESS"],
+            ttl=app.config["WIKTIONARY_CACHE_TTL"],
+            max_bytes=app.config["WIKTIONARY_CACHE_MAX_BYTES"],
+        )
+
+    app.extensions[_EXTENSION_KEY] = WiktionaryClient(
+        base_url=app.config["WIKTIONARY_URL"],
+        timeout=app.config["WIKTIONARY_TIMEOUT"],
+        rate=app.config["WIKTIONARY_RATE"],
+        burst=app.config["WIKTIONARY_BURST"],
+        retries=app.config["WIKTIONARY_RETRIES"],
+        backoff=app.config["WIKTIONARY_BACKOFF"],
+        pool_size=app.config["WIKTIONARY_POOL_SIZE"],
+        hedge=app.config["WIKTIONARY_HEDGE"],
+        cache=cache,
+    )
+
+
+def get_wiktionary_client() -> WiktionaryClient:
+    """The Wiktionary client of the current application."""
+    return app.extensions[_EXTENSION_KEY]
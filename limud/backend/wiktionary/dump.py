@@ -0,0 +1,301 @@
+"""Ingestion of offline dumps of Wiktionary into the vocabulary.
+
+Dumps are read as a stream, one page at a time, so that memory usage
+does not depend on the size of the dump. Two layouts are supported:
+
+    * Archives of rendered pages (.tar, .tar.gz, .tar.bz2, .tar.xz),
+      one page per <title>.html file.
+    * Newline-delimited JSON, possibly compressed (.ndjson.gz, ...) or
+      archived, one page per line, as in Wikimedia's HTML dumps:
+      {"name": <title>, "url": <URL>, "article_body": {"html": <HTML>}}
+
+Pages without a Hebrew section are skipped right away. The others are
+sent, in chunks, to a pool of processes which parse them (see
+parse_response_from_wiktionary()), with a bounded number of chunks in
+flight. The words parsed from them are then deduplicated against the
+vocabulary (see wiktionary.importer), and inserted in large batches.
+"""
+
+import bz2
+import gzip
+import io
+import json
+import logging
+import lzma
+import os
+import pathlib
+import resource
+import sys
+import tarfile
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Dict
+from typing import IO
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from requests import Response
+
+from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import invalidate_chapter_ids
+from limud.backend.wiktionary.importer import ImportFailure
+from limud.backend.wiktionary.importer import known_words
+from limud.backend.wiktionary.importer import new_words
+from limud.backend.wiktionary.scraper import UnparsablePageError
+from limud.backend.wiktionary.scraper import WiktionaryWordParse
+from limud.backend.wiktionary.scraper import has_hebrew_section
+from limud.backend.wiktionary.scraper import parse_response_from_wiktionary
+from limud.extensions import database
+
+# A page: its URL, and its HTML
+Page = Tuple[str, str]
+
+_OPENERS: Dict[str, Callable[..., IO]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+@dataclass
+class DumpReport:
+    """Progress of the ingestion of a dump.
+
+    Attributes
+    ----------
+    pages : int
+        Number of pages read from the dump.
+    hebrew_pages : int
+        Number of those pages with a Hebrew section, i.e., parsed.
+    imported : int
+        Number of words inserted into the vocabulary.
+    duplicates : int
+        Number of words skipped, as they were already in the
+        vocabulary.
+    failures : [ImportFailure]
+    elapsed_s : float
+        Seconds since the ingestion started.
+    rss_mib : float
+        Peak resident memory of the ingesting process (excluding the
+        pool of processes), in MiB.
+    """
+    pages: int = 0
+    hebrew_pages: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    failures: List[ImportFailure] = field(default_factory=list)
+    elapsed_s: float = 0.
+    rss_mib: float = 0.
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages / self.elapsed_s if self.elapsed_s else 0.
+
+
+def ingest_dump(path: pathlib.Path,
+                base_url: str = "https://en.wiktionary.org",
+                processes: Optional[int] = None,
+                chunk_size: int = 16,
+                batch_size: int = 2000,
+                chapter: int = -1) -> Iterator[DumpReport]:
+    """Imports the words of the Hebrew pages of a dump into the
+    vocabulary. Requires an application context.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Location of the dump (see the module for its layout).
+    base_url : str
+        Origin of the URLs of pages which do not have one in the dump.
+    processes : int | None
+        Number of processes parsing pages. Defaults to the number of
+        CPUs.
+    chunk_size : int
+        Number of pages sent at once to a process.
+    batch_size : int
+        Number of words inserted per transaction.
+    chapter : int
+        Chapter of the imported words.
+
+    Yields
+    ------
+    DumpReport
+        Progress so far, after each transaction. The last one is the
+        final report.
+    """
+    start = time.perf_counter()
+    report = DumpReport()
+    known = known_words()
+    processes = processes or os.cpu_count() or 1
+    words: List[Word] = []
+
+    def hebrew_pages() -> Iterator[Page]:
+        for url, html in read_dump(path, base_url):
+            report.pages += 1
+            if has_hebrew_section(html):
+                report.hebrew_pages += 1
+                yield url, html
+
+    for results in _parse_in_pool(hebrew_pages(), processes, chunk_size):
+        for url, parses, error in results:
+            if error is not None:
+                report.failures.append(ImportFailure(url, error))
+            words.extend(new_words(parses, known, chapter, url, report))
+
+        if len(words) >= batch_size:
+            _insert(words, report)
+            _update(report, start)
+            yield report
+
+    _insert(words, report)
+    _update(report, start)
+    yield report
+
+
+def read_dump(path: pathlib.Path,
+              base_url: str = "https://en.wiktionary.org") \
+              -> Iterator[Page]:
+    """Reads the pages of a dump one at a time.
+
+    Yields
+    ------
+    (str, str)
+        The URL of a page, and its HTML.
+    """
+    path = pathlib.Path(path)
+
+    if tarfile.is_tarfile(path):
+        # Read members in order, without seeking back (or listing them)
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                file = archive.extractfile(member) \
+                    if member.isfile() else None
+                if file is None:
+                    continue
+
+                name = pathlib.PurePosixPath(member.name)
+                if name.suffix == ".html":
+                    title = urllib.parse.quote(name.stem)
+                    html = file.read().decode("utf-8")
+                    yield f"{base_url}/wiki/{title}", html
+                elif name.suffix == ".ndjson":
+                    yield from _read_ndjson(
+                        io.TextIOWrapper(file, encoding="utf-8"), base_url)
+        return
+
+    opener = _OPENERS.get(path.suffix, open)
+    with opener(path, "rt", encoding="utf-8") as file:
+        yield from _read_ndjson(file, base_url)
+
+
+def _read_ndjson(file: IO[str], base_url: str) -> Iterator[Page]:
+    for line in file:
+        if not line.strip():
+            continue
+
+        record = json.loads(line)
+        url = record.get("url")
+        if url is None:
+            title = urllib.parse.quote(record["name"].replace(" ", "_"))
+            url = f"{base_url}/wiki/{title}"
+
+        yield url, record["article_body"]["html"]
+
+
+def _parse_in_pool(pages: Iterable[Page],
+                   processes: int,
+                   chunk_size: int) \
+                   -> Iterator[List[Tuple[str, List, Optional[str]]]]:
+    """Parses pages on a pool of processes, in chunks, with at most
+    twice as many chunks in flight as there are processes, and yields
+    the results of each chunk as they complete (see _parse_pages()).
+    """
+    pages = iter(pages)
+    pending: Set[Future] = set()
+
+    with ProcessPoolExecutor(max_workers=processes,
+                             initializer=_init_process) as executor:
+        while True:
+            while len(pending) < 2 * processes:
+                chunk = [page for _, page in zip(range(chunk_size), pages)]
+                if not chunk:
+                    break
+                pending.add(executor.submit(_parse_pages, chunk))
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def _init_process():
+    # The parser logs every page, and every heading it skips
+    logging.disable(logging.WARNING)
+
+
+def _parse_pages(pages: List[Page]) \
+        -> List[Tuple[str, List[WiktionaryWordParse], Optional[str]]]:
+    """Parses pages (in a process of the pool).
+
+    Returns
+    -------
+    [(str, [WiktionaryWordParse], str | None)]
+        For each page, its URL, the words parsed from it, and why it
+        could not be parsed, if it could not.
+    """
+    results: List[Tuple[str, List[WiktionaryWordParse], Optional[str]]] = []
+
+    for url, html in pages:
+        response = Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = html.encode()
+
+        try:
+            parses = parse_response_from_wiktionary(response)
+        except UnparsablePageError as e:
+            results.append((url, [], f"Unparsable {e}"))
+        except Exception as e:
+            # Pages laid out in ways the parser does not expect
+            results.append((url, [], f"{type(e).__name__}: {e}"))
+        else:
+            results.append((url, parses, None))
+
+    return results
+
+
+def _insert(words: List[Word], report: DumpReport):
+    """Inserts words in one transaction (with one statement per
+    category), and empties the list.
+    """
+    if words:
+        database.session.bulk_save_objects(words)
+        invalidate_chapter_ids()
+        database.session.commit()
+
+    report.imported += len(words)
+    words.clear()
+
+
+def _update(report: DumpReport, start: float):
+    report.elapsed_s = time.perf_counter() - start
+
+    # Kilobytes on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        maxrss /= 1024
+    report.rss_mib = maxrss / 1024
@@ -0,0 +1,293 @@
+"""Bulk import of words from Wiktionary into the vocabulary.
+
+Pages are scraped concurrently by a bounded pool of threads, through
+the shared Wiktionary client (so that imports are rate limited and
+cached like any other scrape), and the words parsed from them are
+inserted in batches, one transaction per batch of pages.
+
+Words that are already in the vocabulary are skipped: that is, words
+with the same consonants (see remove_niqqudot()) and the same
+grammatical category, so that e.g. a noun and a verb sharing their
+consonants are both kept.
+
+Lemmas are appended to a journal once the words of their pages are
+committed, and skipped when importing the same list again, so that an
+interrupted import resumes where it left off. Pages that could not be
+retrieved for a transient reason (e.g., a timeout) are not journaled,
+so that they are tried again when resuming.
+"""
+
+import logging
+import pathlib
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import requests
+
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import invalidate_chapter_ids
+from limud.backend.wiktionary.client import RETRIABLE_STATUS_CODES
+from limud.backend.wiktionary.client import WiktionaryClient
+from limud.backend.wiktionary.scraper import UnparsablePageError
+from limud.backend.wiktionary.scraper import WiktionaryWordParse
+from limud.backend.wiktionary.scraper import scrape_page_from_wiktionary
+from limud.extensions import database
+
+
+@dataclass
+class ImportFailure:
+    """A page, or a word from a page, which could not be imported.
+
+    Attributes
+    ----------
+    lemma : str
+        The lemma (or URL) as listed.
+    reason : str
+    transient : bool
+        Whether importing the lemma again may succeed.
+    """
+    lemma: str
+    reason: str
+    transient: bool = False
+
+
+@dataclass
+class ImportReport:
+    """Progress of an import.
+
+    Attributes
+    ----------
+    pages : int
+        Number of pages processed (scraped, or failed).
+    imported : int
+        Number of words inserted into the vocabulary.
+    duplicates : int
+        Number of words skipped, as they were already in the
+        vocabulary.
+    resumed : int
+        Number of lemmas skipped, as they were already imported (or
+        listed twice).
+    failures : [ImportFailure]
+    elapsed_s : float
+        Seconds since the import started.
+    """
+    pages: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    resumed: int = 0
+    failures: List[ImportFailure] = field(default_factory=list)
+    elapsed_s: float = 0.
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages / self.elapsed_s if self.elapsed_s else 0.
+
+
+def import_words(lemmas: Iterable[str],
+                 client: WiktionaryClient,
+                 journal: Optional[pathlib.Path] = None,
+                 workers: int = 4,
+                 batch_size: int = 50,
+                 chapter: int = -1) -> Iterator[ImportReport]:
+    """Imports the words of some Wiktionary pages into the vocabulary.
+    Requires an application context.
+
+    Parameters
+    ----------
+    lemmas : iterable of str
+        Titles of the pages (e.g., "שלום"), or their URLs. Blank lines
+        and lines starting with '#' are ignored.
+    client : WiktionaryClient
+    journal : pathlib.Path | None
+        File listing the lemmas already imported, which are skipped,
+        and to which imported lemmas are appended. If None, nothing
+        is resumed.
+    workers : int
+        Number of pages scraped concurrently.
+    batch_size : int
+        Number of pages whose words are inserted per transaction.
+    chapter : int
+        Chapter of the imported words.
+
+    Yields
+    ------
+    ImportReport
+        Progress so far, after each transaction. The last one is the
+        final report.
+    """
+    start = time.perf_counter()
+    report = ImportReport()
+    done = _read_journal(journal)
+    known = known_words()
+
+    words: List[Word] = []
+    imported: List[str] = []
+
+    def scrape(lemma: str) -> List[WiktionaryWordParse]:
+        return scrape_page_from_wiktionary(
+            url=_url_of_lemma(lemma, client), client=client)
+
+    todo = []
+    for lemma in lemmas:
+        lemma = lemma.strip()
+        if not lemma or lemma.startswith("#"):
+            continue
+        if lemma in done:
+            report.resumed += 1
+            continue
+        done.add(lemma)
+        todo.append(lemma)
+
+    for lemma, future in _run_bounded(scrape, todo, workers):
+        report.pages += 1
+
+        try:
+            parses = future.result()
+        except UnparsablePageError as e:
+            report.failures.append(ImportFailure(lemma, f"Unparsable {e}"))
+            parses = []
+        except requests.HTTPError as e:
+            # Pages that do not exist will not exist when resuming, but
+            # rate limiting or overloads (that outlived the retries of
+            # the client) may be over by then
+            transient = e.response is not None \
+                and e.response.status_code in RETRIABLE_STATUS_CODES
+            report.failures.append(ImportFailure(lemma, str(e), transient))
+            if transient:
+                continue
+            parses = []
+        except requests.RequestException as e:
+            report.failures.append(ImportFailure(lemma, str(e), True))
+            continue
+        except Exception as e:
+            # Pages laid out in ways the parser does not expect
+            logging.exception("Could not parse the page of %s", lemma)
+            report.failures.append(
+                ImportFailure(lemma, f"{type(e).__name__}: {e}"))
+            parses = []
+
+        words.extend(new_words(parses, known, chapter, lemma, report))
+        imported.append(lemma)
+
+        if len(imported) >= batch_size:
+            _insert(words, imported, journal, report)
+            report.elapsed_s = time.perf_counter() - start
+            yield report
+
+    _insert(words, imported, journal, report)
+    report.elapsed_s = time.perf_counter() - start
+    yield report
+
+
+def new_words(parses: List[WiktionaryWordParse],
+              known: Set[Tuple[str, GrammaticalCategory]],
+              chapter: int,
+              lemma: str,
+              report) -> List[Word]:
+    """Converts the words parsed from a page, and keeps those that are
+    not known yet (adding them to the known words). Duplicates and
+    failures are counted in the report.
+    """
+    words = []
+
+    for parse in parses:
+        try:
+            word = parse.as_word()
+        except ValueError as e:
+            # e.g., unsupported binyanim
+            report.failures.append(ImportFailure(lemma, str(e)))
+            continue
+
+        key = (word.sort_key, word.category)
+        if key in known:
+            report.duplicates += 1
+            continue
+
+        known.add(key)
+        word.chapter = chapter
+        words.append(word)
+
+    return words
+
+
+def _url_of_lemma(lemma: str, client: WiktionaryClient) -> str:
+    if lemma.startswith(("http://", "https://")):
+        return lemma
+
+    title = urllib.parse.quote(lemma.replace(" ", "_"))
+    return f"{client.base_url}/wiki/{title}"
+
+
+def _run_bounded(task: Callable[[str], List[WiktionaryWordParse]],
+                 lemmas: Iterable[str],
+                 workers: int) -> Iterator[Tuple[str, Future]]:
+    """Runs a task on a pool of threads for each lemma, with at most
+    twice as many lemmas in flight as there are threads, and yields
+    the lemmas with their futures as they complete.
+    """
+    lemmas = iter(lemmas)
+    pending: Dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix="import") as executor:
+        while True:
+            for lemma in lemmas:
+                pending[executor.submit(task, lemma)] = lemma
+                if len(pending) >= 2 * workers:
+                    break
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+
+
+def _insert(words: List[Word],
+            lemmas: List[str],
+            journal: Optional[pathlib.Path],
+            report: ImportReport):
+    """Inserts words in one transaction, then journals the lemmas they
+    came from. Empties both lists.
+    """
+    if words:
+        database.session.add_all(words)
+        invalidate_chapter_ids()
+        database.session.commit()
+
+    if journal is not None and lemmas:
+        with journal.open("a", encoding="utf-8") as file:
+            file.writelines(f"{lemma}\n" for lemma in lemmas)
+
+    report.imported += len(words)
+    words.clear()
+    lemmas.clear()
+
+
+def known_words() -> Set[Tuple[str, GrammaticalCategory]]:
+    """Consonants and category of every word in the vocabulary."""
+    return set(database.session.query(Word.sort_key, Word.category))
+
+
+def _read_journal(journal: Optional[pathlib.Path]) -> Set[str]:
+    if journal is None or not journal.exists():
+        return set()
+
+    with journal.open(encoding="utf-8") as file:
+        return {line.strip() for line in file if line.strip()}
@@ -0,0 +1,216 @@
+"""Background prefetching of random Words Of The Moment.
+
+Scraping a random page from Wiktionary takes at least one round trip
+to Wiktionary, and possibly several (unparsable pages are skipped). A
+pool of worker threads instead keeps a bounded queue of pages that
+were already scraped and parsed, so that showing a new word is a
+constant-time pop from that queue.
+
+Whenever the number of queued (or currently scraping) pages drops
+below WOTM_PREFETCH_LOW_WATER, the queue is refilled up to
+WOTM_PREFETCH_CAPACITY pages. Workers only start on the first pop, so
+that creating the application (e.g., for a command-line tool) never
+reaches out to Wiktionary.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from flask import Flask
+from flask import current_app as app
+
+from limud.backend.wiktionary.client import get_wiktionary_client
+from limud.backend.wiktionary.scraper import WiktionaryWordParse
+from limud.backend.wiktionary.scraper import scrape_page_from_wiktionary
+
+# Key of the prefetcher in the application's extensions
+_EXTENSION_KEY = "wotm_prefetcher"
+
+
+class WordPrefetcher:
+    """Keeps a bounded queue of parsed random pages, refilled in the
+    background by a pool of threads.
+
+    Pops served from the queue are counted as hits, pops finding the
+    queue empty as misses, and pages that workers could not scrape as
+    failures (see stats()).
+
+    Parameters
+    ----------
+    scrape : callable
+        Scrapes and parses a random page. May raise any exception, in
+        which case the page is skipped.
+    capacity : int
+        Maximum number of pages in the queue. If zero, nothing is ever
+        prefetched (every pop misses).
+    low_water : int
+        The queue is refilled when fewer pages than this are queued or
+        being scraped.
+    workers : int
+        Number of worker threads.
+    """
+    def __init__(self,
+                 scrape: Callable[[], List[WiktionaryWordParse]],
+                 capacity: int,
+                 low_water: int,
+                 workers: int):
+        if capacity and not 0 < low_water <= capacity:
+            raise ValueError(
+                f"Invalid low-water mark {low_water} for a queue of "
+                f"capacity {capacity}"
+            )
+
+        self.capacity = capacity
+        self.low_water = low_water
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._scrape = scrape
+        self._queue: "queue.Queue[List[WiktionaryWordParse]]" = \
+            queue.Queue(maxsize=capacity)
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="wotm-prefetch")
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def pop(self, timeout: Optional[float] = None) \
+            -> Optional[List[WiktionaryWordParse]]:
+        """Takes the parsed words of the oldest page in the queue, and
+        refills the queue if needed.
+
+        Parameters
+        ----------
+        timeout : float | None
+            If specified, wait that many seconds at most for a page when
+            the queue is empty. Otherwise, do not wait.
+
+        Returns
+        -------
+        [WiktionaryWordParse] | None
+            Parsed words of the page, or None if the queue was empty.
+        """
+        try:
+            if timeout is None:
+                parses = self._queue.get_nowait()
+            else:
+                self.fill()
+                parses = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            parses = None
+
+        with self._lock:
+            if parses is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        self.fill()
+        return parses
+
+    def fill(self):
+        """Starts scraping pages in the background if the queue (counting
+        pages being scraped) is below its low-water mark.
+        """
+        with self._lock:
+            if self._closed or not self.capacity:
+                return
+
+            level = self._queue.qsize() + self._pending
+            if level >= self.low_water:
+                return
+
+            missing = self.capacity - level
+            self._pending += missing
+
+        for _ in range(missing):
+            self._executor.submit(self._work)
+
+    def close(self):
+        """Stops the workers, abandoning the pages not yet scraped."""
+        with self._lock:
+            self._closed = True
+
+        self._executor.shutdown(wait=False)
+
+    @property
+    def hit_rate(self) -> float:
+        pops = self.hits + self.misses
+        return self.hits / pops if pops else 0.
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": len(self),
+            "pending": self._pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "hit_rate": self.hit_rate,
+        }
+
+    def _work(self):
+        with self._lock:
+            if self._closed:
+                self._pending -= 1
+                return
+
+        try:
+            parses = self._scrape()
+        except Exception:
+            logging.exception("Could not prefetch a random page")
+            parses = []
+
+        with self._lock:
+            self._pending -= 1
+            if not parses:
+                self.failures += 1
+                return
+
+            # Pages in the queue and pending never exceed the capacity
+            self._queue.put_nowait(parses)
+
+
+def init_wotm_prefetcher(app: Flask):
+    """Creates the Word Of The Moment prefetcher of an application, as
+    configured. Its workers are started on demand.
+
+    Workers share the application's Wiktionary client (see
+    init_wiktionary_client()), but do not hedge their requests: nobody
+    is waiting on them.
+    """
+    with app.app_context():
+        client = get_wiktionary_client()
+
+    scrape = partial(
+        scrape_page_from_wiktionary,
+        retry=True,
+        max_attempts=app.config["WOTM_PREFETCH_MAX_ATTEMPTS"],
+        hedge=1,
+        client=client,
+    )
+
+    prefetcher = WordPrefetcher(
+        scrape=scrape,
+        capacity=app.config["WOTM_PREFETCH_CAPACITY"],
+        low_water=app.config["WOTM_PREFETCH_LOW_WATER"],
+        workers=app.config["WOTM_PREFETCH_WORKERS"],
+    )
+
+    app.extensions[_EXTENSION_KEY] = prefetcher
+    atexit.register(prefetcher.close)
+
+
+def get_wotm_prefetcher() -> WordPrefetcher:
+    """The Word Of The Moment prefetcher of the current application."""
+    return app.extensions[_EXTENSION_KEY]
@@ -1,6 +1,5 @@
 import logging
 import re
-import requests
 from dataclasses import dataclass
 from dataclasses import field
 from requests import Response
@@ -10,6 +9,8 @@ from typing import List
 from bidi.algorithm import get_display
 import click
 from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from bs4 import Tag
 
 from limud.backend.models.vocabulary import Adjective
 from limud.backend.models.vocabulary import Adverb
@@ -19,6 +20,11 @@ from limud.backend.models.vocabulary import NounGender
 from limud.backend.models.vocabulary import Particle
 from limud.backend.models.vocabulary import Verb
 from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import remove_niqqudot
+from limud.backend.wiktionary.cache import CachedPage
+from limud.backend.wiktionary.cache import PageCache
+from limud.backend.wiktionary.client import WiktionaryClient
+from limud.backend.wiktionary.client import get_wiktionary_client
 
 logging.basicConfig(level=logging.INFO)
 
@@ -49,7 +55,8 @@ class UnparsablePageError(Exception):
     """
     def __init__(self, original: Exception, response: Response = None):
         try:
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(
+                response.text, "html.parser", parse_only=SoupStrainer("title"))
             title = soup.find("title").text
             url = response.url
         except Exception:
@@ -120,6 +127,7 @@ class WiktionaryWordParse:
                 description=description,
                 category=category,
                 chapter=-1,
+                sort_key=remove_niqqudot(self.word),
                 gender=gender,
             )
         elif category is GrammaticalCategory.VERB:
@@ -128,6 +136,7 @@ class WiktionaryWordParse:
                 description="",
                 category=category,
                 chapter=-1,
+                sort_key=remove_niqqudot(self.word),
             )
 
             # We need to carefully map the way Wiktionary spells the
@@ -159,6 +168,7 @@ class WiktionaryWordParse:
                 description=description,
                 category=category,
                 chapter=-1,
+                sort_key=remove_niqqudot(self.word),
             )
         elif category is GrammaticalCategory.ADVERB:
             return Adverb(
@@ -166,6 +176,7 @@ class WiktionaryWordParse:
                 description=description,
                 category=category,
                 chapter=-1,
+                sort_key=remove_niqqudot(self.word),
             )
         elif category is GrammaticalCategory.PARTICLE:
             return Particle(
@@ -173,15 +184,24 @@ class WiktionaryWordParse:
                 description=description,
                 category=category,
                 chapter=-1,
+                sort_key=remove_niqqudot(self.word),
             )
 
 
 def scrape_page_from_wiktionary(url: Optional[str] = None,
                                 retry: bool = True,
+                                max_attempts: Optional[int] = None,
+                                hedge: Optional[int] = None,
+                                client: Optional[WiktionaryClient] = None,
                                 ) -> List[WiktionaryWordParse]:
     """Scrapes a random (Hebrew lemma) page from Wiktionary for words,
     or the page at a custom URL if specified.
 
+    Random pages are requested several at a time (hedged requests), and
+    the first one that can be parsed wins. This makes skipping
+    unparsable pages, and slow responses, much cheaper than trying
+    random pages one after the other.
+
     Parameters
     ----------
     url : str | None
@@ -190,6 +210,14 @@ def scrape_page_from_wiktionary(url: Optional[str] = None,
     retry : bool
         Whether to try a different random page if parsing the current
         page fails. Ignored if an URL argument was passed.
+    max_attempts : int | None
+        If specified, give up after parsing that many random pages
+        failed. Otherwise, retry indefinitely.
+    hedge : int | None
+        Number of random pages requested at once. Defaults to the
+        client's setting.
+    client : WiktionaryClient | None
+        Defaults to the client of the current application.
 
     Returns
     -------
@@ -199,25 +227,43 @@ def scrape_page_from_wiktionary(url: Optional[str] = None,
     Raises
     ------
     limud.wiktionary.UnparsablePageError
-        If the page is unparsable and retry is disabled.
+        If the page is unparsable and retry is disabled, or if no page
+        could be parsed within the maximum number of attempts.
+    requests.RequestException
+        If the page at the URL could not be retrieved (e.g., it does
+        not exist).
     """
+    if client is None:
+        client = get_wiktionary_client()
+
+    if url is not None:
+        return _scrape_page(url, client)
+
+    def scrape_random_page() -> List[WiktionaryWordParse]:
+        return parse_response_from_wiktionary(client.random_page())
+
+    if not retry:
+        return scrape_random_page()
+
+    hedge = client.hedge if hedge is None else hedge
+    attempts = 0
+
     while True:
-        response = get_response_from_wiktionary(url)
+        if max_attempts is not None:
+            hedge = min(hedge, max_attempts - attempts)
+
         try:
-            return parse_response_from_wiktionary(response)
+            return client.first_of(scrape_random_page, hedge)
         except UnparsablePageError:
-            # When the page is not random, there is no point in retrying
-            if url is not None:
+            attempts += hedge
+            if max_attempts is not None and attempts >= max_attempts:
                 raise
-            # Otherwise, the URL is None and a new page will get sampled
-            if retry:
-                logging.info("Could not parse page, trying another one")
-                continue
-            # If the URL is None but we do not retry, just fail
-            raise
+            logging.info("Could not parse %i page(s), trying others", hedge)
 
 
-def get_response_from_wiktionary(url: Optional[str]) -> Response:
+def get_response_from_wiktionary(url: Optional[str],
+                                 client: Optional[WiktionaryClient] = None,
+                                 ) -> Response:
     """Retrieves a random Hebrew lemma (word) from Wiktionary. If a
     URL is specified, retrieve the contents of that page instead.
 
@@ -226,41 +272,79 @@ def get_response_from_wiktionary(url: Optional[str]) -> Response:
     url : str | None
         If specified, do not sample a random page, but retrieve that
         page instead.
+    client : WiktionaryClient | None
+        Defaults to the client of the current application.
 
     Returns
     -------
     requests.Response
     """
+    if client is None:
+        client = get_wiktionary_client()
+
     if url is not None:
         logging.debug("Retrieving word from page.")
-        return requests.get(url)
+        return client.get(url)
     
     logging.debug("Requesting random word.")
-    url = 'https://en.wiktionary.org/wiki/Special:RandomInCategory'
+    return client.random_page()
+
+
+def _scrape_page(url: str,
+                 client: WiktionaryClient) -> List[WiktionaryWordParse]:
+    """Scrapes the page at some URL, through the client's cache if any:
+    fresh pages are not requested at all, and stale pages are only
+    downloaded again if they changed.
+    """
+    cache = client.cache
+    if cache is None:
+        response = client.get(url)
+        response.raise_for_status()
+        return parse_response_from_wiktionary(response)
+
+    page = cache.get(url)
+    if page is not None and page.fresh:
+        return _parses_of_cached_page(page, cache)
+
+    headers = {} if page is None else page.validators()
+    response = client.get(url, headers=headers)
+
+    if page is not None and response.status_code == 304:
+        cache.revalidated(url)
+        return _parses_of_cached_page(page, cache)
+
+    # Do not parse (and cache) error pages
+    response.raise_for_status()
+    parses = parse_response_from_wiktionary(response)
+    cache.put(url, response, parses)
+    return parses
 
-    headers = {
-        'Referer': 'https://en.wiktionary.org/wiki/Special:RandomInCategory',
-        'Content-Type': 'application/x-www-form-urlencoded',
-        'Origin': 'https://en.wiktionary.org',
-    }
 
-    payload = {
-        'wpcategory': 'Hebrew lemmas',
-        'wpEditToken': '+\\',
-        'title': 'Special:RandomInCategory',
-        'redirectparams': '',
-    }
+def _parses_of_cached_page(page: CachedPage,
+                           cache: PageCache) -> List[WiktionaryWordParse]:
+    if page.parses is not None:
+        return [WiktionaryWordParse(**fields) for fields in page.parses]
+
+    # Parsed by an older version of the parser
+    parses = parse_response_from_wiktionary(page.as_response())
+    cache.set_parses(page.url, parses)
+    return parses
 
-    response = requests.post(
-        url,
-        headers=headers,
-        data=payload,
-        allow_redirects=True,
-    )
 
-    logging.info("Redirected to: %s", response.url)
+# Heading of the Hebrew section, e.g.,
+# <h2><span class="mw-headline" id="Hebrew">Hebrew</span>...</h2>
+_regex_hebrew_heading = re.compile(
+    r"<h2\b[^>]*>\s*<span\b[^>]*>Hebrew</span>")
 
-    return response
+# Where the section ends: at the next language, or else at the end of
+# the article
+_regex_section_end = re.compile(r'<h2\b|<div class="printfooter"')
+
+# Subsections below parts of speech (conjugation tables, derived terms,
+# translations...), down to the next part of speech
+_regex_subsection = re.compile(r"<h[4-6]\b.*?(?=<h[2-4]\b|\Z)", re.DOTALL)
+
+_regex_page_title = re.compile(r"<h1\b[^>]*>.*?</h1>", re.DOTALL)
 
 
 def parse_response_from_wiktionary(
@@ -268,6 +352,12 @@ def parse_response_from_wiktionary(
     """Scrapes an HTTP response containing a Wiktionary page, and
     returns a list of words parsed from that page.
 
+    Only the parts of speech of the Hebrew section are parsed: they are
+    sliced out of the HTML beforehand, which spares building a tree for
+    the rest of the page (scripts, navigation, other languages,
+    conjugation tables...), i.e., most of it. Pages where the section
+    cannot be found that way are parsed whole, as a fallback.
+
     Parameters
     ----------
     response: requests.Response
@@ -284,10 +374,50 @@ def parse_response_from_wiktionary(
         When the page is completely unparsable. Partially parsable
         pages will not cause this exception to be raised.
     """
-    soup = BeautifulSoup(response.text, 'html.parser')
-    page_title = soup.find("h1").text
+    html = response.text
+    title_match = _regex_page_title.search(html)
+    heading_matches = list(_regex_hebrew_heading.finditer(html))
+
+    section: Tag
+    if title_match is not None and len(heading_matches) == 1:
+        heading_match, = heading_matches
+        end_match = _regex_section_end.search(html, heading_match.end())
+        end = len(html) if end_match is None else end_match.start()
+
+        page_title = BeautifulSoup(title_match[0], "html.parser").text
+        section = BeautifulSoup(
+            _regex_subsection.sub("", html[heading_match.start():end]),
+            "html.parser",
+        )
+    else:
+        # Make sure that the page has a Hebrew section before parsing
+        # it whole, which only takes parsing its headings
+        headings = BeautifulSoup(
+            html, "html.parser", parse_only=SoupStrainer("h2"))
+        _find_hebrew_heading(headings, response)
+
+        soup = BeautifulSoup(html, "html.parser")
+        page_title = soup.find("h1").text
+
+        # The parent of that <h2> is a <div> that contains
+        # various meanings under <h3>s (and so on)
+        h2_tag = _find_hebrew_heading(soup, response)
+        assert h2_tag.parent is not None
+        section = h2_tag.parent
+
     logging.info(get_display(f"Page title: {page_title}"))
+    return _parse_hebrew_section(section, response)
 
+
+def has_hebrew_section(html: str) -> bool:
+    """Whether a Wiktionary page (its HTML) has a Hebrew section, as
+    far as can be told without parsing it.
+    """
+    return _regex_hebrew_heading.search(html) is not None
+
+
+def _find_hebrew_heading(soup: BeautifulSoup, response: Response) -> Tag:
+    """The <h2> tag heading the Hebrew section of a page."""
     # Get the <span> within an <h2> that specifies "Hebrew"
     # This is to avoid Aramaic, Yiddish meanings
     try:
@@ -299,11 +429,12 @@ def parse_response_from_wiktionary(
     except ValueError as e:
         raise UnparsablePageError(e, response=response)
 
-    # The parent of that <h2> is a <div> that contains
-    # various meanings under <h3>s (and so on)
-    h2_tag = span_tag.parent
-    div_tag = h2_tag.parent
+    assert span_tag.parent is not None
+    return span_tag.parent
 
+
+def _parse_hebrew_section(div_tag: Tag,
+                          response: Response) -> List[WiktionaryWordParse]:
     # Each <h3> corresponds to a grammatical type, e.g., verb or noun
     h3_tags = div_tag.find_all("h3")
     parses = []
@@ -324,6 +455,9 @@ def parse_response_from_wiktionary(
         # Each <p> contains a possible spelling with niqqudot
         # The actual word is in <strong>
         p_tag = h3_tag.find_next_sibling("p")
+        if p_tag is None:
+            continue
+
         try:
             strong_tag, = p_tag.find_all("strong", lang="he")
         except ValueError:
@@ -0,0 +1,5 @@
+"""Benchmarks for the hot paths of the application.
+
+Each benchmark runs against a scratch (in-memory) database, never the
+actual vocabulary, and is exposed through the 'run bench' command.
+"""
@@ -0,0 +1,166 @@
+"""Benchmark for sorting the vocabulary alphabetically.
+
+Fills a scratch database with synthetic words, and times retrieving
+all IDs in the order of the abjad: sorted in Python (as runs used to
+be), sorted by SQLite in the HEBREW collation, and read from the index
+built on that collation.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Iterator
+from typing import List
+
+from sqlalchemy import text
+
+from limud.backend.collation import COLLATION_NAME
+from limud.backend.collation import hebrew_collation_key
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import remove_niqqudot
+from limud.extensions import database
+from limud.factory import create_app
+
+_INDEX_NAME = "ix_vocabulary_hebrew_collated"
+_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+_FINAL_FORMS = {"כ": "ך", "מ": "ם", "נ": "ן", "פ": "ף", "צ": "ץ"}
+_NIQQUDOT = ("", "\u05b0", "\u05b4", "\u05b5", "\u05b6", "\u05b7",
+             "\u05b8", "\u05b9", "\u05bb", "\u05bc")
+
+_SQL_SORT = text(
+    f'SELECT id FROM vocabulary NOT INDEXED '
+    f'ORDER BY hebrew COLLATE "{COLLATION_NAME}", id'
+)
+
+_INDEX_SCAN = text(
+    f'SELECT id FROM vocabulary INDEXED BY {_INDEX_NAME} '
+    f'ORDER BY hebrew COLLATE "{COLLATION_NAME}", id'
+)
+
+
+@dataclass
+class SortTiming:
+    """Time taken to list the IDs of all words in alphabetical order.
+
+    Attributes
+    ----------
+    words : int
+        Number of words in the vocabulary.
+    python_ms : float
+        Milliseconds to fetch IDs and Hebrew forms, and sort in Python.
+    sql_sort_ms : float
+        Milliseconds for SQLite to sort in the HEBREW collation,
+        without using the index.
+    index_scan_ms : float
+        Milliseconds to read the IDs from the collated index.
+    index_build_ms : float
+        Milliseconds to build the collated index.
+    """
+    words: int
+    python_ms: float
+    sql_sort_ms: float
+    index_scan_ms: float
+    index_build_ms: float
+
+
+def synthetic_hebrew(rng: random.Random) -> str:
+    """A random word with niqqudot, ending with a final form if the last
+    letter has one.
+    """
+    letters = [rng.choice(_LETTERS) for _ in range(rng.randint(2, 6))]
+    letters[-1] = _FINAL_FORMS.get(letters[-1], letters[-1])
+    return "".join(letter + rng.choice(_NIQQUDOT) for letter in letters)
+
+
+def benchmark_alphabetical_sort(words: int = 100_000,
+                                seed: int = 0) -> Iterator[SortTiming]:
+    """Grows a scratch vocabulary tenfold at a time, up to the given
+    number of words, and times sorting it after each step.
+
+    Parameters
+    ----------
+    words : int
+        Final number of words.
+    seed : int
+        Seed for generating the words.
+
+    Yields
+    ------
+    SortTiming
+
+    Raises
+    ------
+    AssertionError
+        If the three methods do not agree on the order.
+    """
+    rng = random.Random(seed)
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    table = Word.__table__
+
+    with app.app_context():
+        size = 0
+        step = 1000
+
+        while size < words:
+            count = min(step, words) - size
+            hebrew = [synthetic_hebrew(rng) for _ in range(count)]
+
+            database.session.execute(text(f"DROP INDEX {_INDEX_NAME}"))
+            database.session.execute(table.insert(), [
+                {
+                    "hebrew": h,
+                    "sort_key": remove_niqqudot(h),
+                    "description": "",
+                    "category": GrammaticalCategory.PARTICLE,
+                    "chapter": 1,
+                    "favorite": False,
+                }
+                for h in hebrew
+            ])
+            database.session.commit()
+            size += count
+            step *= 10
+
+            start = time.perf_counter()
+            database.session.execute(text(
+                f'CREATE INDEX {_INDEX_NAME} '
+                f'ON vocabulary (hebrew COLLATE "{COLLATION_NAME}")'
+            ))
+            database.session.commit()
+            index_build_ms = _milliseconds_since(start)
+
+            hebrew_collation_key.cache_clear()
+            start = time.perf_counter()
+            rows = database.session.execute(
+                text("SELECT id, hebrew FROM vocabulary")).fetchall()
+            rows.sort(key=lambda row: (hebrew_collation_key(row[1]), row[0]))
+            python_order = [row[0] for row in rows]
+            python_ms = _milliseconds_since(start)
+
+            hebrew_collation_key.cache_clear()
+            start = time.perf_counter()
+            sql_order = _ids(_SQL_SORT)
+            sql_sort_ms = _milliseconds_since(start)
+
+            start = time.perf_counter()
+            index_order = _ids(_INDEX_SCAN)
+            index_scan_ms = _milliseconds_since(start)
+
+            assert python_order == sql_order == index_order
+
+            yield SortTiming(
+                words=size,
+                python_ms=python_ms,
+                sql_sort_ms=sql_sort_ms,
+                index_scan_ms=index_scan_ms,
+                index_build_ms=index_build_ms,
+            )
+
+
+def _ids(statement) -> List[int]:
+    return [row[0] for row in database.session.execute(statement)]
+
+
+def _milliseconds_since(start: float) -> float:
+    return 1e3 * (time.perf_counter() - start)
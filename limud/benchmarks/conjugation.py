@@ -0,0 +1,165 @@
+"""Benchmark for looking up single cells of conjugation tables.
+
+Fills a scratch database with an increasing number of complete
+paradigms, and times a raw lookup probing the unique index on
+(binyan, bitfield) against the same lookup forced to scan the table,
+as was the case before that index existed. For reference, it also
+times get_conjugation(), which is served from the paradigm cache.
+"""
+
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from sqlalchemy import text
+
+from limud.backend.models.cache import bump_cache_version
+from limud.backend.models.conjugation import Binyan
+from limud.backend.models.conjugation import ConjugatedVerb
+from limud.backend.models.conjugation import Gender
+from limud.backend.models.conjugation import Number
+from limud.backend.models.conjugation import Person
+from limud.backend.models.conjugation import Tense
+from limud.backend.models.conjugation import get_conjugation
+from limud.backend.models.conjugation import PARADIGM_CACHE_NAME
+from limud.backend.models.conjugation import pack
+from limud.extensions import database
+from limud.factory import create_app
+
+_SCAN = text(
+    "SELECT id, hebrew FROM conjugation NOT INDEXED "
+    "WHERE binyan = :binyan AND tense = :tense AND person = :person "
+    "AND gender = :gender AND number = :number"
+)
+
+_PROBE = text(
+    "SELECT id, hebrew FROM conjugation "
+    "WHERE binyan = :binyan AND bitfield = :bitfield"
+)
+
+
+@dataclass
+class LookupTiming:
+    """Average cost of a single lookup for a given table size.
+
+    Attributes
+    ----------
+    paradigms : int
+        Number of complete paradigms (binyanim) stored.
+    rows : int
+        Number of rows in the conjugation table.
+    cached_us : float
+        Microseconds per call to get_conjugation(), once cached.
+    probe_us : float
+        Microseconds per raw SQL lookup on (binyan, bitfield).
+    scan_us : float
+        Microseconds per raw SQL lookup forced to scan the table.
+    plan : str
+        SQLite's query plan for the indexed lookup.
+    """
+    paradigms: int
+    rows: int
+    cached_us: float
+    probe_us: float
+    scan_us: float
+    plan: str
+
+
+def all_conjugations() -> List[Tuple[Tense, Person, Gender, Number]]:
+    """Every combination of tense, person, gender and number, whether
+    or not it exists in Hebrew.
+    """
+    return list(itertools.product(Tense, Person, Gender, Number))
+
+
+def benchmark_conjugation_lookups(lookups: int = 2000,
+                                  seed: int = 0) -> Iterator[LookupTiming]:
+    """Adds one complete paradigm at a time to a scratch database and
+    times random lookups after each addition.
+
+    Parameters
+    ----------
+    lookups : int
+        Number of lookups to time per table size.
+    seed : int
+        Seed for sampling which cells are looked up.
+
+    Yields
+    ------
+    LookupTiming
+    """
+    rng = random.Random(seed)
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    conjugations = all_conjugations()
+
+    with app.app_context():
+        stored: List[Binyan] = []
+
+        for binyan in Binyan:
+            database.session.execute(ConjugatedVerb.__table__.insert(), [
+                {
+                    "hebrew": f"{binyan.value}-{pack(t, p, g, n)}",
+                    "binyan": binyan,
+                    "bitfield": pack(t, p, g, n),
+                    "tense": t,
+                    "person": p,
+                    "gender": g,
+                    "number": n,
+                }
+                for t, p, g, n in conjugations
+            ])
+            bump_cache_version(PARADIGM_CACHE_NAME)
+            database.session.commit()
+            stored.append(binyan)
+
+            sample = [
+                (rng.choice(stored), *rng.choice(conjugations))
+                for _ in range(lookups)
+            ]
+
+            # Warm up the paradigm cache
+            for b in stored:
+                get_conjugation(b, Tense.PERFECT, Person.FIRST,
+                                Gender.COMMON, Number.SINGULAR)
+
+            start = time.perf_counter()
+            for b, t, p, g, n in sample:
+                get_conjugation(b, t, p, g, n)
+            cached_us = _microseconds_per_call(start, lookups)
+
+            start = time.perf_counter()
+            for b, t, p, g, n in sample:
+                database.session.execute(_PROBE, {
+                    "binyan": b.name, "bitfield": pack(t, p, g, n),
+                }).fetchall()
+            probe_us = _microseconds_per_call(start, lookups)
+
+            start = time.perf_counter()
+            for b, t, p, g, n in sample:
+                database.session.execute(_SCAN, {
+                    "binyan": b.name, "tense": t.name, "person": p.name,
+                    "gender": g.name, "number": n.name,
+                }).fetchall()
+            scan_us = _microseconds_per_call(start, lookups)
+
+            plan = database.session.execute(
+                text(f"EXPLAIN QUERY PLAN {_PROBE.text}"),
+                {"binyan": Binyan.QAL.name, "bitfield": 0},
+            ).fetchall()
+
+            yield LookupTiming(
+                paradigms=len(stored),
+                rows=ConjugatedVerb.query.count(),
+                cached_us=cached_us,
+                probe_us=probe_us,
+                scan_us=scan_us,
+                plan="; ".join(row[-1] for row in plan),
+            )
+
+
+def _microseconds_per_call(start: float, calls: int) -> float:
+    return 1e6 * (time.perf_counter() - start) / calls
@@ -0,0 +1,198 @@
+"""Benchmark for rendering the backs of flashcards.
+
+Renders a corpus of synthetic nouns, verbs and adjectives with the
+current formatter and with the formatter as it was before its HTML
+fragments were prepared at import time (see legacy_formatting.py),
+after checking that both produce identical output. Descriptions are
+rendered from scratch, bypassing the cache of descriptions.
+"""
+
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+from limud.backend.flashcards.formatting import render_description_as_html
+from limud.backend.models.vocabulary import Adjective
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Noun
+from limud.backend.models.vocabulary import NounGender
+from limud.backend.models.vocabulary import Verb
+from limud.backend.models.vocabulary import Word
+from limud.benchmarks import legacy_formatting
+from limud.factory import create_app
+
+_HEBREW_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+_NIQQUDOT = "\u05b0\u05b4\u05b5\u05b6\u05b7\u05b8\u05b9\u05bb\u05bc"
+_ENGLISH_WORDS = (
+    "to", "go", "walk", "the", "house", "of", "a", "king", "write",
+    "book", "great", "small", "holy", "day", "word", "be", "say",
+)
+
+
+@dataclass
+class RenderTiming:
+    """Average cost of rendering the back of a single card.
+
+    Attributes
+    ----------
+    formatter : str
+        Either "legacy" or "precompiled".
+    category : str
+        Grammatical category of the cards, or "all".
+    cards : int
+        Number of cards rendered.
+    render_us : float
+        Microseconds per card.
+    alloc_kib : float
+        Peak memory allocated while rendering a card, in KiB.
+    """
+    formatter: str
+    category: str
+    cards: int
+    render_us: float
+    alloc_kib: float
+
+
+def synthetic_words(count: int, seed: int = 0) -> List[Word]:
+    """Generates nouns, verbs and adjectives (in equal proportions) with
+    single or numbered meanings, stray Hebrew in some descriptions, and
+    irregular forms. The words are not added to the database.
+    """
+    rng = random.Random(seed)
+
+    def hebrew() -> str:
+        return "".join(
+            rng.choice(_HEBREW_LETTERS) + rng.choice(_NIQQUDOT)
+            for _ in range(rng.randint(2, 5))
+        )
+
+    def meaning() -> str:
+        words = rng.choices(_ENGLISH_WORDS, k=rng.randint(1, 5))
+        if rng.random() < 0.2:
+            words.append(hebrew())
+        return " ".join(words)
+
+    def description() -> str:
+        if rng.random() < 0.5:
+            return meaning()
+        return " ".join(
+            f"{number}. {meaning()}"
+            for number in range(1, rng.randint(2, 4) + 1)
+        )
+
+    def maybe(make: Callable[[], str]) -> str:
+        return make() if rng.random() < 0.5 else ""
+
+    words: List[Word] = []
+    for i in range(count):
+        common = {"hebrew": hebrew(), "description": description(),
+                  "chapter": 1}
+
+        if i % 3 == 0:
+            words.append(Noun(
+                category=GrammaticalCategory.NOUN,
+                gender=rng.choice(list(NounGender)),
+                plabs=maybe(hebrew), sgcst=maybe(hebrew),
+                plcst=maybe(hebrew), **common,
+            ))
+        elif i % 3 == 1:
+            words.append(Verb(
+                category=GrammaticalCategory.VERB,
+                nifal=maybe(description), piel=maybe(description),
+                pual=maybe(description), hifil=maybe(description),
+                hofal=maybe(description), hitpael=maybe(description),
+                **common,
+            ))
+        else:
+            words.append(Adjective(
+                category=GrammaticalCategory.ADJECTIVE,
+                pladj=maybe(hebrew), femadj=maybe(hebrew), **common,
+            ))
+
+    return words
+
+
+def benchmark_description_rendering(cards: int = 3000,
+                                    seed: int = 0) \
+                                    -> Iterator[RenderTiming]:
+    """Times the legacy and precompiled formatters on the same corpus of
+    synthetic words, for each grammatical category and overall.
+
+    Parameters
+    ----------
+    cards : int
+        Number of synthetic words to render.
+    seed : int
+        Seed for generating the words.
+
+    Yields
+    ------
+    RenderTiming
+
+    Raises
+    ------
+    AssertionError
+        If both formatters do not produce identical output.
+    """
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    formatters = {
+        "legacy": legacy_formatting.description_as_html,
+        "precompiled": render_description_as_html,
+    }
+
+    with app.app_context():
+        words = synthetic_words(cards, seed=seed)
+
+        for word in words:
+            expected = legacy_formatting.description_as_html(word)
+            assert render_description_as_html(word) == expected, word
+
+        groups = {
+            category.value: [w for w in words if w.category is category]
+            for category in (GrammaticalCategory.NOUN,
+                             GrammaticalCategory.VERB,
+                             GrammaticalCategory.ADJECTIVE)
+        }
+        groups["all"] = words
+
+        for category, group in groups.items():
+            for name, render in formatters.items():
+                yield _time_rendering(name, category, group, render)
+
+
+def _time_rendering(formatter: str,
+                    category: str,
+                    words: List[Word],
+                    render: Callable[[Word], str]) -> RenderTiming:
+    # Warm up, then time without tracing allocations
+    for word in words[:100]:
+        render(word)
+
+    start = time.perf_counter()
+    for word in words:
+        render(word)
+    render_us = 1e6 * (time.perf_counter() - start) / len(words)
+
+    peak_bytes = 0
+    tracemalloc.start()
+    try:
+        for word in words:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            render(word)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes += peak - before
+    finally:
+        tracemalloc.stop()
+
+    return RenderTiming(
+        formatter=formatter,
+        category=category,
+        cards=len(words),
+        render_us=render_us,
+        alloc_kib=peak_bytes / len(words) / 1024,
+    )
@@ -0,0 +1,133 @@
+"""The parser of limud.backend.wiktionary.scraper as it was before it
+sliced the Hebrew section out of pages, kept verbatim as the baseline
+of the parsing benchmark.
+"""
+
+import logging
+from requests import Response
+from typing import List
+
+from bidi.algorithm import get_display
+from bs4 import BeautifulSoup
+
+from limud.backend.wiktionary.scraper import RECEIVABLE_H3_TAGS
+from limud.backend.wiktionary.scraper import UnparsablePageError
+from limud.backend.wiktionary.scraper import WiktionaryWordParse
+from limud.backend.wiktionary.scraper import _extract_binyan
+from limud.backend.wiktionary.scraper import _remove_ktiv_male
+from limud.backend.wiktionary.scraper import _split_meaning_example
+
+
+def parse_response_from_wiktionary(
+        response: Response) -> List[WiktionaryWordParse]:
+    """Scrapes an HTTP response containing a Wiktionary page, and
+    returns a list of words parsed from that page.
+
+    Parameters
+    ----------
+    response: requests.Response
+        HTTP response containing the page to be scraped.
+
+    Returns
+    -------
+    [limud.wiktionary.WiktionaryWordParse]
+        Parsed words from the page.
+
+    Raises
+    ------
+    limud.wiktionary.UnparsablePageError
+        When the page is completely unparsable. Partially parsable
+        pages will not cause this exception to be raised.
+    """
+    soup = BeautifulSoup(response.text, 'html.parser')
+    page_title = soup.find("h1").text
+    logging.info(get_display(f"Page title: {page_title}"))
+
+    # Get the <span> within an <h2> that specifies "Hebrew"
+    # This is to avoid Aramaic, Yiddish meanings
+    try:
+        span_tag, = soup.find_all(
+            lambda tag: tag.name == "span" and
+                        tag.text == "Hebrew" and
+                        tag.parent.name == "h2"
+        )
+    except ValueError as e:
+        raise UnparsablePageError(e, response=response)
+
+    # The parent of that <h2> is a <div> that contains
+    # various meanings under <h3>s (and so on)
+    h2_tag = span_tag.parent
+    div_tag = h2_tag.parent
+
+    # Each <h3> corresponds to a grammatical type, e.g., verb or noun
+    h3_tags = div_tag.find_all("h3")
+    parses = []
+
+    for h3_tag in h3_tags:
+        # Each <h3> contains a <span> that has the grammatical type
+        category = h3_tag.find_next("span").text.lower()
+
+        # If this is not the case, the page is likely not formatted in
+        # the recommended style. If so, we give up.
+        if category not in RECEIVABLE_H3_TAGS:
+            logging.warn(
+                "Ill-formed page %s with category %s. Skipping this tag.",
+                response.url, category,
+            )
+            continue
+
+        # Each <p> contains a possible spelling with niqqudot
+        # The actual word is in <strong>
+        p_tag = h3_tag.find_next_sibling("p")
+        try:
+            strong_tag, = p_tag.find_all("strong", lang="he")
+        except ValueError:
+            # This case also covers when a word has multiple <h2> tags,
+            # as when there are multiple languages like Hebrew, Ladino...
+            continue
+
+        # If it's a verb its binyan should be annotated
+        binyan = None
+        if category == "verb":
+            a_tag, = p_tag.find_all("a", href="/wiki/Appendix:Hebrew_verbs")
+            binyan = _extract_binyan(a_tag.text)
+
+        word = _remove_ktiv_male(strong_tag.text)
+        parse = WiktionaryWordParse(
+            url=response.url,
+            word=word,
+            category=category,
+            binyan=binyan,
+        )
+        
+        # Each <ol> contains a list of possible meanings
+        ol_tag = p_tag.find_next_sibling("ol")
+
+        # ... and each <li> is one meaning
+        li_tags = ol_tag.find_all("li", recursive=False)
+
+        for li_tag in li_tags:
+            # Skip spurious <li> tags that are empty
+            if not li_tag.text:
+                continue
+
+            # Remove any transliteration from the meaning,
+            # because users really should know how to read
+            transliteration = li_tag.find_all(lambda tag:
+                tag.name == "span" and
+                set(tag.get("class", [])) & {
+                    "mention-gloss-paren",
+                    "mention-tr",
+                }
+            )
+
+            for tag in transliteration:
+                tag.decompose()
+
+            meaning, example = _split_meaning_example(li_tag)
+            parse.meanings.append(meaning)        
+            parse.examples.append(example)
+        
+        parses.append(parse)
+
+    return parses
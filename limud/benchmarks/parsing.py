@@ -0,0 +1,144 @@
+"""Benchmark for parsing Wiktionary pages.
+
+Parses the fixture pages of fixtures/wiktionary/ with the current
+parser, which only parses the Hebrew section of each page, and with
+the parser as it was before, which parsed whole pages (see
+legacy_wiktionary.py), after checking that both produce identical
+output.
+"""
+
+import logging
+import pathlib
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+from requests import Response
+
+from limud.backend.wiktionary import UnparsablePageError
+from limud.backend.wiktionary import parse_response_from_wiktionary
+from limud.benchmarks import legacy_wiktionary
+from limud.benchmarks.standin import FIXTURES_DIR
+
+
+@dataclass
+class ParseTiming:
+    """Throughput and memory usage of a parser.
+
+    Attributes
+    ----------
+    parser : str
+        Either "legacy" or "sliced".
+    pages : int
+        Number of pages parsed.
+    pages_per_s : float
+        Pages parsed per second.
+    peak_kib : float
+        Peak memory allocated while parsing a page, in KiB, for the
+        most demanding page.
+    mean_peak_kib : float
+        Same, on average over the pages.
+    """
+    parser: str
+    pages: int
+    pages_per_s: float
+    peak_kib: float
+    mean_peak_kib: float
+
+
+def benchmark_parsing(rounds: int = 20,
+                      pages_dir: pathlib.Path = FIXTURES_DIR) \
+                      -> Iterator[ParseTiming]:
+    """Times the legacy and sliced parsers on the same pages.
+
+    Parameters
+    ----------
+    rounds : int
+        Number of times each page is parsed.
+    pages_dir : pathlib.Path
+        Directory of the pages, named <name>.html.
+
+    Yields
+    ------
+    ParseTiming
+
+    Raises
+    ------
+    AssertionError
+        If both parsers do not produce identical output.
+    """
+    responses = [
+        _response(path) for path in sorted(pages_dir.glob("*.html"))
+    ]
+    parsers = {
+        "legacy": legacy_wiktionary.parse_response_from_wiktionary,
+        "sliced": parse_response_from_wiktionary,
+    }
+
+    # Parsers log every page, and every heading they skip
+    logging.disable(logging.WARNING)
+    try:
+        for response in responses:
+            expected = _parse(parsers["legacy"], response)
+            assert _parse(parsers["sliced"], response) == expected, \
+                response.url
+
+        for name, parse in parsers.items():
+            yield _time_parsing(name, responses, rounds, parse)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def _response(path: pathlib.Path) -> Response:
+    """A page, as if it had just been retrieved from Wiktionary."""
+    response = Response()
+    response.status_code = 200
+    response.url = f"https://en.wiktionary.org/wiki/{path.stem}"
+    response.encoding = "utf-8"
+    response._content = path.read_bytes()
+    return response
+
+
+def _parse(parse: Callable[[Response], List], response: Response):
+    try:
+        return parse(response)
+    except UnparsablePageError:
+        return None
+
+
+def _time_parsing(parser: str,
+                  responses: List[Response],
+                  rounds: int,
+                  parse: Callable[[Response], List]) -> ParseTiming:
+    # Warm up, then time without tracing allocations
+    for response in responses:
+        _parse(parse, response)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for response in responses:
+            _parse(parse, response)
+    elapsed_s = time.perf_counter() - start
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for response in responses:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            _parse(parse, response)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+
+    return ParseTiming(
+        parser=parser,
+        pages=len(responses) * rounds,
+        pages_per_s=len(responses) * rounds / elapsed_s,
+        peak_kib=max(peaks) / 1024,
+        mean_peak_kib=sum(peaks) / len(peaks) / 1024,
+    )
@@ -0,0 +1,139 @@
+"""Benchmark for picking and rescheduling the cards due for review.
+
+Fills a scratch vocabulary with synthetic words (each of which gets a
+schedule, see limud.backend.models.schedule), spreads their due dates
+over two months around now, so that about half of them are due, and
+times picking the next due card and answering it, for increasing
+numbers of cards.
+
+For comparison, also times loading the identifiers of every word of
+the deck, as flashcard runs do when they start or reshuffle.
+"""
+
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterator
+from typing import Sequence
+
+from sqlalchemy import text
+
+from limud.backend.models.schedule import CardSchedule
+from limud.backend.models.schedule import Deck
+from limud.backend.models.schedule import Grade
+from limud.backend.models.schedule import next_due_card
+from limud.backend.models.schedule import review_card
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Word
+from limud.extensions import database
+from limud.factory import create_app
+
+# Due dates within a month either way of now
+_SPREAD_DUE_DATES = text(
+    "UPDATE card_schedule SET due_at = datetime('now', "
+    "(abs(random()) % 5184000 - 2592000) || ' seconds')"
+)
+
+
+@dataclass
+class ScheduleTiming:
+    """Latency of an operation on a deck of some size.
+
+    Attributes
+    ----------
+    operation : str
+        Description of the operation.
+    cards : int
+        Number of cards in the deck.
+    median_ms : float
+        Median milliseconds per operation.
+    p95_ms : float
+        95th percentile of milliseconds per operation.
+    """
+    operation: str
+    cards: int
+    median_ms: float
+    p95_ms: float
+
+
+def benchmark_schedule(sizes: Sequence[int] = (1000, 10_000, 100_000),
+                       reviews: int = 500,
+                       seed: int = 0) -> Iterator[ScheduleTiming]:
+    """Times operations on scratch decks of increasing sizes.
+
+    Parameters
+    ----------
+    sizes : sequence of int
+        Numbers of cards in the deck, in increasing order.
+    reviews : int
+        Number of cards picked and answered per size.
+    seed : int
+        Seed for answering cards.
+
+    Yields
+    ------
+    ScheduleTiming
+    """
+    rng = random.Random(seed)
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+    with app.app_context():
+        cards = 0
+        for size in sizes:
+            _add_words(size - cards)
+            cards = size
+
+            database.session.execute(_SPREAD_DUE_DATES)
+            database.session.commit()
+
+            def answer():
+                card = next_due_card(Deck.VOCABULARY)
+                review_card(card.id, rng.choice(list(Grade)))
+
+            yield _time("next due card",
+                        lambda: next_due_card(Deck.VOCABULARY),
+                        size, reviews)
+            yield _time("pick and answer", answer, size, reviews)
+            yield _time("load the deck (runs)",
+                        lambda: Word.query.with_entities(Word.id).all(),
+                        size, max(2, reviews // 50))
+
+            # Drop the identity map, to keep timings independent
+            database.session.expunge_all()
+
+
+def _add_words(count: int, batch: int = 10_000):
+    for start in range(0, count, batch):
+        database.session.execute(Word.__table__.insert(), [
+            {
+                "hebrew": "",
+                "sort_key": "",
+                "category": GrammaticalCategory.PARTICLE,
+                "chapter": 1,
+                "favorite": False,
+            }
+            for _ in range(min(batch, count - start))
+        ])
+    database.session.commit()
+
+
+def _time(operation: str,
+          function: Callable[[], object],
+          cards: int,
+          repeats: int) -> ScheduleTiming:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(1e3 * (time.perf_counter() - start))
+
+    assert CardSchedule.query.count() == cards, "Schedule out of sync"
+
+    return ScheduleTiming(
+        operation=operation,
+        cards=cards,
+        median_ms=statistics.median(timings),
+        p95_ms=statistics.quantiles(timings, n=20)[-1],
+    )
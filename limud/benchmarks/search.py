@@ -0,0 +1,138 @@
+"""Benchmark for full-text search over the vocabulary.
+
+Fills a scratch database with synthetic words, whose descriptions draw
+their terms from a large lexicon with Zipf-distributed frequencies
+(as in natural language), and times searches for terms of decreasing
+frequency, as well as prefix searches.
+
+Ranking is linear in the number of matching words: searches for the
+most common terms are the slowest, and are reported separately.
+"""
+
+import itertools
+import random
+import statistics
+import string
+import time
+from dataclasses import dataclass
+from typing import Iterator
+from typing import List
+from typing import Set
+
+from limud.backend.models.search import search_word_ids
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Word
+from limud.extensions import database
+from limud.factory import create_app
+
+
+@dataclass
+class SearchTiming:
+    """Latency of searches for a class of queries.
+
+    Attributes
+    ----------
+    queries : str
+        Description of the class of queries.
+    words : int
+        Number of words in the vocabulary.
+    matches : float
+        Average number of words matching a query.
+    median_ms : float
+        Median milliseconds per query.
+    p95_ms : float
+        95th percentile of milliseconds per query.
+    """
+    queries: str
+    words: int
+    matches: float
+    median_ms: float
+    p95_ms: float
+
+
+def synthetic_lexicon(size: int, rng: random.Random) -> List[str]:
+    """Distinct pseudo-English terms, most frequent first."""
+    lexicon: Set[str] = set()
+    while len(lexicon) < size:
+        lexicon.add("".join(
+            rng.choice(string.ascii_lowercase)
+            for _ in range(rng.randint(3, 9))
+        ))
+    return sorted(lexicon, key=lambda term: rng.random())
+
+
+def benchmark_search(words: int = 200_000,
+                     lexicon: int = 50_000,
+                     queries: int = 200,
+                     limit: int = 50,
+                     seed: int = 0) -> Iterator[SearchTiming]:
+    """Times searches on a scratch vocabulary.
+
+    Parameters
+    ----------
+    words : int
+        Number of words in the vocabulary.
+    lexicon : int
+        Number of distinct terms in descriptions.
+    queries : int
+        Number of queries per class of queries.
+    limit : int
+        Maximum number of results per query.
+    seed : int
+        Seed for generating the words and queries.
+
+    Yields
+    ------
+    SearchTiming
+    """
+    rng = random.Random(seed)
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    terms = synthetic_lexicon(lexicon, rng)
+    cum_weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, lexicon + 1)))
+
+    with app.app_context():
+        batch = 10_000
+        for offset in range(0, words, batch):
+            database.session.execute(Word.__table__.insert(), [
+                {
+                    "hebrew": "",
+                    "sort_key": "",
+                    "description": " ".join(rng.choices(
+                        terms, cum_weights=cum_weights, k=rng.randint(2, 8))),
+                    "category": GrammaticalCategory.PARTICLE,
+                    "chapter": 1,
+                    "favorite": False,
+                }
+                for _ in range(min(batch, words - offset))
+            ])
+        database.session.commit()
+
+        classes = {
+            "terms ranked 1-10": terms[:10],
+            "terms ranked 10-100": terms[10:100],
+            "terms ranked 100-1k": terms[100:1000],
+            "terms ranked 1k+": terms[1000:],
+            "2 terms ranked 10+": [
+                f"{a} {b}" for a, b in zip(terms[10:], terms[20:])
+            ],
+            "prefixes (3 chars)": [term[:3] for term in terms[100:]],
+        }
+
+        for name, candidates in classes.items():
+            sample = [rng.choice(candidates) for _ in range(queries)]
+            matches = [len(search_word_ids(text)) for text in sample]
+            timings = []
+
+            for text in sample:
+                start = time.perf_counter()
+                search_word_ids(text, limit=limit)
+                timings.append(1e3 * (time.perf_counter() - start))
+
+            yield SearchTiming(
+                queries=name,
+                words=words,
+                matches=statistics.mean(matches),
+                median_ms=statistics.median(timings),
+                p95_ms=statistics.quantiles(timings, n=20)[-1],
+            )
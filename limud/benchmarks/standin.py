@@ -0,0 +1,162 @@
+"""Local HTTP server standing in for Wiktionary.
+
+Serves the fixture pages of fixtures/wiktionary/ (or any directory of
+HTML pages) the way Wiktionary serves its own, so that scraping can be
+exercised and timed without reaching out to Wiktionary:
+
+    * POST /wiki/Special:RandomInCategory redirects to a random page.
+    * GET /wiki/<name> and GET /w/index.php?title=<name> serve the page
+      <name>.html, with an ETag. Conditional requests for a page that
+      did not change get a 304 (Not Modified).
+
+Point WIKTIONARY_URL (or the base_url of a WiktionaryClient) to the
+server's URL to use it.
+"""
+
+import hashlib
+import pathlib
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+
+FIXTURES_DIR = pathlib.Path(__file__).parent / "fixtures" / "wiktionary"
+
+
+class StandInWiktionary:
+    """Serves fixture pages on localhost, from a background thread, for
+    the duration of a `with` block.
+
+    Parameters
+    ----------
+    pages_dir : pathlib.Path
+        Directory of the pages to serve, named <name>.html.
+    latency : float
+        Seconds to wait before answering each request, to emulate the
+        round trip to Wiktionary.
+    tail_latency : float
+        Seconds to wait instead, for a fraction of the requests (to
+        emulate a slow server or network).
+    tail_probability : float
+        Fraction of the requests waiting for tail_latency seconds.
+    seed : int
+        Seed for picking random pages.
+
+    Attributes
+    ----------
+    url : str
+        Origin of the server, e.g., "http://127.0.0.1:8000".
+    requests : int
+        Number of requests served so far.
+    """
+    def __init__(self,
+                 pages_dir: pathlib.Path = FIXTURES_DIR,
+                 latency: float = 0.,
+                 tail_latency: float = 0.,
+                 tail_probability: float = 0.,
+                 seed: int = 0):
+        self.pages: Dict[str, bytes] = {
+            path.stem: path.read_bytes()
+            for path in sorted(pages_dir.glob("*.html"))
+        }
+        if not self.pages:
+            raise ValueError(f"No pages to serve in {pages_dir}")
+
+        self.latency = latency
+        self.tail_latency = tail_latency
+        self.tail_probability = tail_probability
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "StandInWiktionary":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def random_page(self) -> str:
+        with self._lock:
+            return self._rng.choice(list(self.pages))
+
+    def wait(self):
+        """Waits for as long as answering a request takes."""
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.tail_probability:
+                latency = self.tail_latency
+            else:
+                latency = self.latency
+
+        if latency:
+            time.sleep(latency)
+
+
+def _make_handler(standin: StandInWiktionary):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive, as Wiktionary does. Headers and body
+        # are sent separately, so disable Nagle's algorithm to avoid
+        # stalling on delayed acknowledgements.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            standin.wait()
+            if self.path != "/wiki/Special:RandomInCategory":
+                return self.send_error(404)
+
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+
+            self.send_response(302)
+            self.send_header(
+                "Location", f"/wiki/{standin.random_page()}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            standin.wait()
+            url = urllib.parse.urlsplit(self.path)
+
+            if url.path == "/w/index.php":
+                name = urllib.parse.parse_qs(url.query).get("title", [""])[0]
+            elif url.path.startswith("/wiki/"):
+                name = urllib.parse.unquote(url.path[len("/wiki/"):])
+            else:
+                name = ""
+
+            page = standin.pages.get(name)
+            if page is None:
+                return self.send_error(404)
+
+            etag = f'"{hashlib.sha1(page).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=UTF-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
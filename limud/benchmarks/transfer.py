@@ -0,0 +1,177 @@
+"""Benchmark for exporting and importing the vocabulary in bulk.
+
+Writes synthetic words to CSV and JSON Lines files, then times, for
+each format, importing them into an empty scratch vocabulary (all
+inserts), importing them again (all updates), and exporting the
+vocabulary back. The export must match the imported file.
+
+For comparison, also times adding words one at a time the way the
+edit form does (one transaction per word), on a sample of the words.
+"""
+
+import csv
+import io
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+
+from limud.backend.models.transfer import COLUMNS
+from limud.backend.models.transfer import export_vocabulary
+from limud.backend.models.transfer import import_vocabulary
+from limud.backend.models.vocabulary import create_word_from_form_dict
+from limud.backend.models.vocabulary import invalidate_chapter_ids
+from limud.extensions import database
+from limud.factory import create_app
+
+_HEBREW_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+_NIQQUDOT = "ְִֵֶַָֹֻּ"
+_ENGLISH_WORDS = (
+    "to", "go", "walk", "the", "house", "of", "a", "king", "write",
+    "book", "great", "small", "holy", "day", "word", "be", "say",
+)
+_CATEGORIES = ("noun", "verb", "adjective", "adverb", "particle")
+_CATEGORY_COLUMNS = {
+    "noun": ("plabs", "sgcst", "plcst"),
+    "verb": ("nifal", "piel", "pual", "hifil", "hofal", "hitpael"),
+    "adjective": ("pladj", "femadj"),
+}
+
+
+@dataclass
+class TransferTiming:
+    """Throughput of a bulk operation on the vocabulary.
+
+    Attributes
+    ----------
+    operation : str
+        What was timed.
+    format : str
+        Either "csv", "jsonl", or "form".
+    rows : int
+        Number of words read or written.
+    elapsed_s : float
+        Seconds taken.
+    """
+    operation: str
+    format: str
+    rows: int
+    elapsed_s: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed_s
+
+
+def synthetic_records(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Exported fields of synthetic words, with ids from 1."""
+    rng = random.Random(seed)
+
+    def hebrew() -> str:
+        return "".join(
+            rng.choice(_HEBREW_LETTERS) + rng.choice(_NIQQUDOT)
+            for _ in range(rng.randint(2, 5))
+        )
+
+    def description() -> str:
+        return " ".join(rng.choices(_ENGLISH_WORDS, k=rng.randint(1, 6)))
+
+    records = []
+    for word_id in range(1, count + 1):
+        category = rng.choice(_CATEGORIES)
+        record = dict.fromkeys(COLUMNS)
+        record.update(
+            id=word_id,
+            hebrew=hebrew(),
+            description=description().capitalize(),
+            category=category,
+            chapter=rng.randint(1, 30),
+            favorite=rng.random() < 0.1,
+        )
+        if category == "noun":
+            record["gender"] = rng.choice(("masculine", "feminine"))
+        for column in _CATEGORY_COLUMNS.get(category, ()):
+            if rng.random() < 0.3:
+                record[column] = description()
+
+        records.append(record)
+
+    return records
+
+
+def benchmark_transfer(words: int = 100_000,
+                       form_words: int = 1000,
+                       seed: int = 0) -> Iterator[TransferTiming]:
+    """Times bulk imports and exports, and adding words one at a time.
+
+    Parameters
+    ----------
+    words : int
+        Number of words imported and exported.
+    form_words : int
+        Number of words added one at a time.
+    seed : int
+        Seed for generating the words.
+
+    Yields
+    ------
+    TransferTiming
+
+    Raises
+    ------
+    AssertionError
+        If an export does not match the file that was imported.
+    """
+    records = synthetic_records(words, seed=seed)
+
+    for format in ("csv", "jsonl"):
+        source = _write(records, format)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+
+        with app.app_context():
+            for operation in ("import (insert)", "import (update)"):
+                start = time.perf_counter()
+                for _ in import_vocabulary(io.StringIO(source), format):
+                    pass
+                yield TransferTiming(
+                    operation, format, words, time.perf_counter() - start)
+
+            output = io.StringIO()
+            start = time.perf_counter()
+            export_vocabulary(output, format)
+            yield TransferTiming(
+                "export", format, words, time.perf_counter() - start)
+
+            assert output.getvalue() == source, f"Export differs ({format})"
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        start = time.perf_counter()
+        for record in records[:form_words]:
+            fields = {
+                column: "" if value is None else str(value)
+                for column, value in record.items()
+                if column not in ("id", "favorite")
+            }
+            database.session.add(create_word_from_form_dict(**fields))
+            invalidate_chapter_ids()
+            database.session.commit()
+
+        yield TransferTiming(
+            "add", "form", form_words, time.perf_counter() - start)
+
+
+def _write(records: List[Dict[str, Any]], format: str) -> str:
+    file = io.StringIO(newline="")
+    if format == "csv":
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return file.getvalue()
@@ -0,0 +1,229 @@
+"""Benchmarks for showing new Words Of The Moment.
+
+Both run against a local stand-in for Wiktionary (see standin.py),
+which waits some latency before answering each request, as Wiktionary
+would.
+
+    * benchmark_wotm() times requests to /wotm/new, with pages either
+      scraped on demand or prefetched in the background (see
+      WordPrefetcher). Between requests, the user takes some time to
+      read the word.
+    * benchmark_wiktionary_client() times fetching pages with and
+      without a pool of connections, scraping a page with and without
+      the persistent cache of pages, and scraping random pages with an
+      increasing number of hedged requests, while a fraction of the
+      responses are very slow.
+"""
+
+import pathlib
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+import requests as http
+
+from limud.backend.wiktionary import PageCache
+from limud.backend.wiktionary import WiktionaryClient
+from limud.backend.wiktionary import get_wotm_prefetcher
+from limud.backend.wiktionary import scrape_page_from_wiktionary
+from limud.benchmarks.standin import StandInWiktionary
+from limud.factory import create_app
+
+
+@dataclass
+class WotmTiming:
+    """Latency of requests for a new Word Of The Moment.
+
+    Attributes
+    ----------
+    mode : str
+        Either "on demand" or "prefetched".
+    requests : int
+        Number of requests timed.
+    median_ms : float
+        Median milliseconds per request.
+    p95_ms : float
+        95th percentile of milliseconds per request.
+    hit_rate : float
+        Fraction of requests served from the queue of prefetched pages.
+    upstream_requests : int
+        Number of requests made to the stand-in server.
+    """
+    mode: str
+    requests: int
+    median_ms: float
+    p95_ms: float
+    hit_rate: float
+    upstream_requests: int
+
+
+def benchmark_wotm(requests: int = 40,
+                   latency: float = 0.1,
+                   think_time: float = 0.2) -> Iterator[WotmTiming]:
+    """Times requests for new Words Of The Moment, with and without
+    prefetching.
+
+    Parameters
+    ----------
+    requests : int
+        Number of requests per mode.
+    latency : float
+        Seconds the stand-in server waits before each response.
+    think_time : float
+        Seconds between requests.
+
+    Yields
+    ------
+    WotmTiming
+    """
+    for mode, capacity in (("on demand", 0), ("prefetched", 8)):
+        with StandInWiktionary(latency=latency) as standin:
+            app = create_app({
+                "SQLALCHEMY_DATABASE_URI": "sqlite://",
+                "WIKTIONARY_URL": standin.url,
+                "WOTM_PREFETCH_CAPACITY": capacity,
+            })
+            client = app.test_client()
+            timings = []
+
+            try:
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.get("/wotm/new")
+                    timings.append(1e3 * (time.perf_counter() - start))
+                    assert response.status_code == 302, response.status
+
+                    time.sleep(think_time)
+
+                with app.app_context():
+                    hit_rate = get_wotm_prefetcher().hit_rate
+            finally:
+                with app.app_context():
+                    get_wotm_prefetcher().close()
+
+            yield WotmTiming(
+                mode=mode,
+                requests=requests,
+                median_ms=statistics.median(timings),
+                p95_ms=statistics.quantiles(timings, n=20)[-1],
+                hit_rate=hit_rate,
+                upstream_requests=standin.requests,
+            )
+
+
+@dataclass
+class ClientTiming:
+    """Latency of calls to Wiktionary (or rather, its stand-in).
+
+    Attributes
+    ----------
+    mode : str
+        What was called.
+    calls : int
+        Number of calls timed.
+    median_ms : float
+        Median milliseconds per call.
+    p95_ms : float
+        95th percentile of milliseconds per call.
+    upstream_per_call : float
+        Average number of requests made to the stand-in per call.
+    """
+    mode: str
+    calls: int
+    median_ms: float
+    p95_ms: float
+    upstream_per_call: float
+
+
+def benchmark_wiktionary_client(calls: int = 40,
+                                latency: float = 0.05,
+                                tail_latency: float = 1.,
+                                tail_probability: float = 0.1) \
+                                -> Iterator[ClientTiming]:
+    """Times fetching pages with and without a pool of connections, and
+    scraping a page with and without the cache (with no latency), then
+    scraping random pages with 1 to 3 hedged requests (with the given
+    latencies, and no rate limit).
+
+    Parameters
+    ----------
+    calls : int
+        Number of calls per mode.
+    latency : float
+        Seconds the stand-in server usually waits before a response.
+    tail_latency : float
+        Seconds it waits for a fraction of the responses instead.
+    tail_probability : float
+        That fraction.
+
+    Yields
+    ------
+    ClientTiming
+    """
+    with StandInWiktionary() as standin, \
+            tempfile.TemporaryDirectory() as directory:
+        url = f"{standin.url}/wiki/shalom"
+        cache = PageCache(
+            path=pathlib.Path(directory) / "wiktionary.sqlite3",
+            freshness=3600, ttl=3600, max_bytes=1 << 20)
+        client = WiktionaryClient(base_url=standin.url, rate=1e6, burst=1)
+        cached_client = WiktionaryClient(
+            base_url=standin.url, rate=1e6, burst=1, cache=cache)
+
+        try:
+            yield _time_calls("requests.get", calls, standin,
+                              lambda: http.get(url))
+            yield _time_calls("pooled session", calls, standin,
+                              lambda: client.get(url))
+            yield _time_calls(
+                "uncached scrape", calls, standin,
+                lambda: scrape_page_from_wiktionary(url=url, client=client))
+
+            scrape_page_from_wiktionary(url=url, client=cached_client)
+            yield _time_calls(
+                "cached scrape", calls, standin,
+                lambda: scrape_page_from_wiktionary(
+                    url=url, client=cached_client))
+        finally:
+            client.close()
+            cached_client.close()
+
+    with StandInWiktionary(latency=latency,
+                           tail_latency=tail_latency,
+                           tail_probability=tail_probability) as standin:
+        client = WiktionaryClient(base_url=standin.url, rate=1e6, burst=1)
+
+        try:
+            for hedge in (1, 2, 3):
+                yield _time_calls(
+                    f"hedge={hedge}", calls, standin,
+                    lambda: scrape_page_from_wiktionary(
+                        hedge=hedge, client=client),
+                )
+        finally:
+            client.close()
+
+
+def _time_calls(mode: str,
+                calls: int,
+                standin: StandInWiktionary,
+                call: Callable[[], object]) -> ClientTiming:
+    timings: List[float] = []
+    upstream = standin.requests
+
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        timings.append(1e3 * (time.perf_counter() - start))
+
+    return ClientTiming(
+        mode=mode,
+        calls=calls,
+        median_ms=statistics.median(timings),
+        p95_ms=statistics.quantiles(timings, n=20)[-1],
+        upstream_per_call=(standin.requests - upstream) / calls,
+    )
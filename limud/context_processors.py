@@ -1,3 +1,4 @@
+from typing import Dict
 from typing import Union
 
 from flask import current_app as app
@@ -10,13 +11,11 @@ from limud.backend.models.conjugation import Gender
 from limud.backend.models.conjugation import Number
 from limud.backend.models.conjugation import Person
 from limud.backend.models.conjugation import Tense
-from limud.backend.models.conjugation import get_conjugation
 from limud.backend.models.conjugation import label_pronouns
 from limud.backend.models.conjugation import label_tense
 from limud.backend.models.conjugation import translate_pronouns
 from limud.backend.models.vocabulary import GrammaticalCategory
-from limud.backend.models.vocabulary import Word
-from limud.extensions import database 
+from limud.backend.models.vocabulary import get_chapter_ids
 
 
 @app.context_processor
@@ -27,13 +26,17 @@ def add_all_chapters():
     contains a drop-down menu referencing each chapter that exists in
     the database.
 
-    The query below implements:
-        SELECT DISTINCT vocabulary.chapter AS <?> FROM vocabulary
+    The IDs are cached by each process (see get_chapter_ids()), so this
+    does not usually query the database at all.
     """
-    query = database.session.query(Word.chapter).distinct()
-    chapter_ids = sorted(chapter_id for chapter_id, in query.all())
+    return {"all_chapters_ids": get_chapter_ids()}
 
-    return {"all_chapters_ids": chapter_ids}
+
+# Grammatical categories never change while the app is running
+_all_grammatical_categories = [
+    gc.value for gc in GrammaticalCategory
+    if gc is not GrammaticalCategory.GENERIC
+]
 
 
 @app.context_processor
@@ -43,10 +46,7 @@ def add_all_categories():
     This is necessary because the main menu of the application
     contains a drop-down menu referencing each category.
     """
-    return {"all_grammatical_categories": [
-        gc.value for gc in GrammaticalCategory
-        if gc is not GrammaticalCategory.GENERIC
-    ]}
+    return {"all_grammatical_categories": _all_grammatical_categories}
 
 
 @app.context_processor
@@ -73,22 +73,21 @@ def add_true_length_of_hebrew_string():
     }
 
 
-def get_conjugation_str(binyan: Union[Binyan, str],
+def get_conjugation_str(paradigm: Dict[int, ConjugatedVerb],
                         tense: Union[Tense, str],
                         person: Union[Person, str],
                         gender: Union[Gender, str],
                         number: Union[Number, str]) -> str:
-    """Type-tolerant wrapper for get_conjugation() that returns the
-    empty string if no conjugation is found (appropriate for an HTML
-    form).
+    """Type-tolerant lookup into a paradigm (see get_paradigm()) that
+    returns the empty string if no conjugation is found (appropriate
+    for an HTML form).
     """
-    conjugation = get_conjugation(
-        binyan=Binyan(binyan),
-        tense=Tense(tense),
-        person=Person(person),
-        gender=Gender(gender),
-        number=Number(number),
-    )
+    conjugation = paradigm.get(pack(
+        Tense(tense),
+        Person(person),
+        Gender(gender),
+        Number(number),
+    ))
 
     if conjugation is None:
         return ""
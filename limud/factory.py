@@ -1,12 +1,30 @@
 import random
+from typing import Any
+from typing import Mapping
+from typing import Optional
 
 from flask import Flask
 
+from limud.backend.flashcards.events import init_review_log
+from limud.backend.flashcards.formatting import init_description_cache
+from limud.backend.flashcards.prefetch import init_prefetcher
+from limud.backend.flashcards.store import init_run_store
+from limud.backend.metrics import init_metrics
+from limud.backend.wiktionary import init_wiktionary_client
+from limud.backend.wiktionary import init_wotm_prefetcher
 from limud.extensions import database
 from limud.extensions import migrate
 from limud.routes import blueprints
 
-def create_app():
+def create_app(config: Optional[Mapping[str, Any]] = None):
+    """Creates the application.
+
+    Parameters
+    ----------
+    config : dict | None
+        If specified, overrides the default settings from config.Config
+        (e.g., to point SQLALCHEMY_DATABASE_URI to a scratch database).
+    """
     app = Flask(
         __name__,
         static_folder="static",
@@ -14,9 +32,19 @@ def create_app():
         instance_relative_config=False)
 
     app.config.from_object("config.Config")
+    if config is not None:
+        app.config.update(config)
+
     for bp in blueprints:
         app.register_blueprint(bp)
     database.init_app(app)
+    init_metrics(app)
+    init_run_store(app)
+    init_prefetcher(app)
+    init_description_cache(app)
+    init_review_log(app)
+    init_wiktionary_client(app)
+    init_wotm_prefetcher(app)
 
     try:
         seed = app.config["RANDOM_SEED"]
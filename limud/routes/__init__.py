@@ -1,5 +1,6 @@
 from .conjugation import conjugation as _conjugation
 from .home import home as _home
+from .metrics import metrics as _metrics
 from .vocabulary import vocabulary as _vocabulary
 from .wotm import wotm as _wotm
 
@@ -8,4 +9,5 @@ blueprints = (
     _conjugation,
     _vocabulary,
     _wotm,
+    _metrics,
 )
\ No newline at end of file
@@ -1,6 +1,7 @@
 import enum
 import http
 import random
+import secrets
 from typing import List
 
 from flask import current_app as app
@@ -10,27 +11,37 @@ from flask import redirect
 from flask import render_template
 from flask import session
 from flask import Blueprint
-from sqlalchemy import and_
-from sqlalchemy import or_
 
 from limud.backend.flashcards import format_any_stray_hebrew
 from limud.backend.flashcards import FlashcardRunState
 from limud.backend.flashcards import FlashcardSide
+from limud.backend.flashcards import FlashcardSorting
+from limud.backend.flashcards.due import DuePracticeState
+from limud.backend.flashcards.events import record_answer
+from limud.backend.flashcards.events import show_card
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
 from limud.backend.models.vocabulary import create_word_from_form_dict
 from limud.backend.models.vocabulary import update_word_from_form_dict
-from limud.backend.models.conjugation import get_conjugation
+from limud.backend.models.conjugation import get_paradigm
+from limud.backend.models.conjugation import save_paradigm
 from limud.backend.models.conjugation import label_pronouns
 from limud.backend.models.conjugation import label_tense
 from limud.backend.models.conjugation import translate_pronouns
-from limud.backend.models.conjugation import unpack
 from limud.backend.models.conjugation import Binyan
 from limud.backend.models.conjugation import Gender
 from limud.backend.models.conjugation import Number
 from limud.backend.models.conjugation import Person
 from limud.backend.models.conjugation import Tense
 from limud.backend.models.conjugation import ConjugatedVerb
+from limud.backend.models.events import ReviewMode
+from limud.backend.models.events import ReviewOutcome
+from limud.backend.models.schedule import Deck
+from limud.backend.models.schedule import Grade
+from limud.backend.models.schedule import count_due_cards
+from limud.backend.models.schedule import next_due_card
+from limud.backend.models.schedule import review_card
+from limud.backend.query_budget import query_budget
 from limud.extensions import database
 
 
@@ -47,6 +58,7 @@ class PronounLanguage(enum.Enum):
 
 
 @conjugation.route("/conjugation/<binyan>", methods=["GET", "POST"])
+@query_budget(7)
 def review(binyan: str):
     """Display a conjugation table given a binyan (stem).
 
@@ -68,6 +80,7 @@ def review(binyan: str):
             "table.html",
             edit=edit,
             binyan=binyan,
+            paradigm=get_paradigm(binyan),
             pronouns_lang=pronouns_lang.value,
         )
 
@@ -75,6 +88,7 @@ def review(binyan: str):
         if request.form["button_press"] == "save":
             app.logger.debug(f"Submitted fields: {request.form}")
 
+            cells = {}
             for key, hebrew in request.form.items():
                 try:
                     bitfield = int(key)
@@ -82,36 +96,13 @@ def review(binyan: str):
                     app.logger.debug("Skipping form item %s ", key)
                     continue
 
-                tense, person, gender, number = unpack(bitfield)
-
-                # First, check if this conjugation (combination of tense,
-                # person, gender, number) already exists in the database.
-                # 
-                # If so, we should retrieve that row and update its
-                # columns rather than create a new row.
-                conjugation = get_conjugation(
-                    binyan=binyan,
-                    tense=tense,
-                    person=person,
-                    gender=gender,
-                    number=number,
-                )
-
-                if conjugation is None:
-                    conjugation = ConjugatedVerb(
-                        hebrew=hebrew,
-                        binyan=binyan,
-                        tense=tense,
-                        person=person,
-                        gender=gender,
-                        number=number,
-                    )
-
-                    database.session.add(conjugation)
-                    app.logger.info("Adding new conjugation: %s", conjugation)
-                else:
-                    conjugation.hebrew = hebrew
-                    app.logger.info("Updating conjugation: %s", conjugation)
+                cells[bitfield] = hebrew
+
+            inserted, updated, deleted = save_paradigm(binyan, cells)
+            app.logger.info(
+                "Conjugations for %s: %i added, %i updated, %i deleted",
+                binyan, inserted, updated, deleted,
+            )
 
             database.session.commit()
             app.logger.info("Committed full conjugation table to DB.")
@@ -120,6 +111,7 @@ def review(binyan: str):
 
 
 @conjugation.route("/conjugation/practice/", methods=["GET", "POST"])
+@query_budget(6)
 def practice():
     state = FlashcardRunState.from_flask_session()
     pronouns_lang = PronounLanguage(request.args.get("pronouns_lang", "he"))
@@ -133,12 +125,12 @@ def practice():
             state.side = FlashcardSide.FRONT
 
         # User indicates they got the word right: Remove word from the set of 
-        # words being considered. No need to update the index since the length
-        # of the word list has changed. Display the prompt side again for the
-        # card next in line.
+        # words being considered, and move on to the next remaining word.
+        # Display the prompt side again for the card next in line.
         if request.form["button_press"] == "correct":
             app.logger.debug("Received request for correct")
-            state.words.pop(state.index)
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.CORRECT)
+            state.complete()
             state.progress[0] += 1
             state.side = FlashcardSide.BACK
             
@@ -146,60 +138,41 @@ def practice():
         # display the prompt side again for the card next in line.
         if request.form["button_press"] == "incorrect":
             app.logger.debug("Received request for incorrect")
-            state.index += 1
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.INCORRECT)
+            state.skip()
             state.progress[0] += 1
             state.side = FlashcardSide.BACK
 
-    if not state.words:
-        app.logger.info("Finished current run. Good job!")
-        return redirect(url_for("home.index"))
-
-    # New run: Make sure index is valid wrt. new word list length
-    if state.index == len(state.words):
-        app.logger.info("Finished a run, shuffling remaining words.")
-        random.shuffle(state.words)
-        state.progress = [0, len(state.words)]
-        state.index = 0
-
-    conjugation = ConjugatedVerb.query.get(state.words[state.index])
-    app.logger.info("Retrieved word: %s from database", conjugation)
+    while True:
+        if not state.remaining:
+            app.logger.info("Finished current run. Good job!")
+            return redirect(url_for("home.index"))
+
+        # New pass: Go through the remaining words again, in a new order
+        if state.index == state.size:
+            app.logger.info("Finished a run, shuffling remaining words.")
+            state.new_pass()
+
+        binyan, bitfield = state.current()
+        conjugation = get_paradigm(Binyan(binyan)).get(bitfield)
+        if conjugation is not None:
+            break
+
+        # The cell was emptied since the run started: there is nothing
+        # left to practice for it
+        app.logger.warning("Skipping emptied conjugation %s %i",
+                           binyan, bitfield)
+        state.complete()
+        state.progress[1] -= 1
+
+    app.logger.info("Retrieved word: %s from cache", conjugation)
+    show_card(Deck.CONJUGATION, conjugation.id)
         
     if state.side is FlashcardSide.FRONT:
         content = conjugation.hebrew
         app.logger.debug("Showing front of flashcard ")
     elif state.side is FlashcardSide.BACK:
-        query_text_parts = [
-            conjugation.binyan.value.capitalize(),
-            label_tense(conjugation.tense),
-        ]
-
-        if (conjugation.tense is Tense.INFINITIVE_ABSOLUTE or
-            conjugation.tense is Tense.INFINITIVE_CONSTRUCT):
-
-            # If the tense is an infinitive, we should disregard pronouns
-            # In fact, labeling/translating them will fail, because the
-            # null pronoun (person=0, gender=0, number=0) corresponds to
-            # a hypothetical 'first person masculine singular', which does
-            # not exist in Hebrew!
-            pass
-        elif pronouns_lang is PronounLanguage.ENGLISH:
-            pronouns_string = label_pronouns(
-                conjugation.person,
-                conjugation.gender,
-                conjugation.number,
-            )
-            pronouns_string = format_any_stray_hebrew(pronouns_string)
-            query_text_parts.append(pronouns_string)
-        elif pronouns_lang is PronounLanguage.HEBREW:
-            pronouns_string = translate_pronouns(
-                conjugation.person,
-                conjugation.gender,
-                conjugation.number,
-            )
-            pronouns_string = format_any_stray_hebrew(pronouns_string)
-            query_text_parts.append(pronouns_string)
-
-        content = ", ".join(query_text_parts) + "?"
+        content = describe_conjugation(conjugation, pronouns_lang)
         app.logger.debug("Showing back of flashcard")
     else:
         raise ValueError("Invalid value for session variable 'side'!")
@@ -224,6 +197,88 @@ def practice():
     )
 
 
+@conjugation.route("/conjugation/practice/due", methods=["GET", "POST"])
+@query_budget(7)
+def practice_due():
+    """Display the conjugations due for review as flashcards, the most
+    overdue first, and reschedule each one once answered (see
+    models.schedule).
+
+    Visiting this page starts a new session, of at most
+    SPACED_REPETITION_SESSION_SIZE conjugations. Tenses excluded from
+    practice by configuration are skipped.
+    """
+    pronouns_lang = PronounLanguage(request.args.get("pronouns_lang", "he"))
+    excluded_tenses = _excluded_tenses()
+
+    state = None
+    if request.method == "POST":
+        state = DuePracticeState.from_flask_session(Deck.CONJUGATION)
+
+    if state is None:
+        size = count_due_cards(
+            Deck.CONJUGATION,
+            excluded_tenses=excluded_tenses,
+            limit=app.config["SPACED_REPETITION_SESSION_SIZE"],
+        )
+        app.logger.info("Starting a session of %i due conjugation(s)", size)
+        state = DuePracticeState(
+            deck=Deck.CONJUGATION,
+            side=FlashcardSide.BACK,
+            progress=[0, size],
+        )
+    elif request.form["button_press"] == "flip":
+        app.logger.debug("Received request to flip")
+        state.side = FlashcardSide.FRONT
+    elif request.form["button_press"] in ("correct", "incorrect"):
+        correct = request.form["button_press"] == "correct"
+        app.logger.debug("Received request for %s",
+                         request.form["button_press"])
+        record_answer(
+            ReviewMode.DUE,
+            ReviewOutcome.CORRECT if correct else ReviewOutcome.INCORRECT,
+        )
+        schedule = review_card(
+            state.schedule_id, Grade.GOOD if correct else Grade.AGAIN)
+        app.logger.info("Rescheduled %s", schedule)
+        state.answer(correct, FlashcardSide.BACK)
+
+    conjugation = None
+    if state.card_id is not None:
+        # The cell may have been emptied since it was picked
+        conjugation = ConjugatedVerb.query.get(state.card_id)
+
+    if conjugation is None and not state.finished:
+        schedule = next_due_card(
+            Deck.CONJUGATION, excluded_tenses=excluded_tenses)
+        if schedule is not None:
+            state.schedule_id = schedule.id
+            state.card_id = schedule.card_id
+            conjugation = ConjugatedVerb.query.get(state.card_id)
+
+    if conjugation is None:
+        app.logger.info("No more conjugations due for review. Good job!")
+        return redirect(url_for("home.index"))
+
+    app.logger.info("Retrieved due conjugation: %s", conjugation)
+    show_card(Deck.CONJUGATION, conjugation.id)
+
+    if state.side is FlashcardSide.FRONT:
+        content = conjugation.hebrew
+    else:
+        content = describe_conjugation(conjugation, pronouns_lang)
+
+    state.to_flask_session()
+
+    return render_template("practice.html",
+        content=content,
+        render_hebrew_large=state.side is FlashcardSide.FRONT,
+        render_reveal_button=state.side is FlashcardSide.BACK,
+        render_favorite_button=False,
+        progress_percent=100 * state.progress[0] / state.progress[1],
+    )
+
+
 @conjugation.route("/conjugation/practice/<binyan>", methods=["GET"])
 def practice_binyan(binyan: str):
     """Display conjugations for a binyan in random order as
@@ -234,13 +289,15 @@ def practice_binyan(binyan: str):
     """
     binyan = Binyan(binyan)
     verbs = query_binyan_and_shuffle(binyan)
-    ids = [verb.id for verb in verbs]
+    keys = [(verb.binyan.value, verb.bitfield) for verb in verbs]
 
     FlashcardRunState(
-        words=ids,
+        words=keys,
         index=0,
         side=FlashcardSide.BACK,
         progress=[0, len(verbs)],
+        sorting=FlashcardSorting.SHUFFLE,
+        seed=secrets.randbits(32),
     ).to_flask_session()
 
     return redirect(url_for(".practice"))
@@ -259,18 +316,59 @@ def practice_all():
     shuffle()' below.
     """
     verbs = query_representative_forms_and_shuffle()
-    ids = [verb.id for verb in verbs]
+    keys = [(verb.binyan.value, verb.bitfield) for verb in verbs]
 
     FlashcardRunState(
-        words=ids,
+        words=keys,
         index=0,
         side=FlashcardSide.BACK,
         progress=[0, len(verbs)],
+        sorting=FlashcardSorting.SHUFFLE,
+        seed=secrets.randbits(32),
     ).to_flask_session()
 
     return redirect(url_for(".practice"))
 
 
+def describe_conjugation(conjugation: ConjugatedVerb,
+                         pronouns_lang: PronounLanguage) -> str:
+    """The prompt for a conjugation (the back of its flashcard): its
+    binyan, tense and pronouns.
+    """
+    query_text_parts = [
+        conjugation.binyan.value.capitalize(),
+        label_tense(conjugation.tense),
+    ]
+
+    if (conjugation.tense is Tense.INFINITIVE_ABSOLUTE or
+        conjugation.tense is Tense.INFINITIVE_CONSTRUCT):
+
+        # If the tense is an infinitive, we should disregard pronouns
+        # In fact, labeling/translating them will fail, because the
+        # null pronoun (person=0, gender=0, number=0) corresponds to
+        # a hypothetical 'first person masculine singular', which does
+        # not exist in Hebrew!
+        pass
+    elif pronouns_lang is PronounLanguage.ENGLISH:
+        pronouns_string = label_pronouns(
+            conjugation.person,
+            conjugation.gender,
+            conjugation.number,
+        )
+        pronouns_string = format_any_stray_hebrew(pronouns_string)
+        query_text_parts.append(pronouns_string)
+    elif pronouns_lang is PronounLanguage.HEBREW:
+        pronouns_string = translate_pronouns(
+            conjugation.person,
+            conjugation.gender,
+            conjugation.number,
+        )
+        pronouns_string = format_any_stray_hebrew(pronouns_string)
+        query_text_parts.append(pronouns_string)
+
+    return ", ".join(query_text_parts) + "?"
+
+
 def query_representative_forms_and_shuffle() -> List[ConjugatedVerb]:
     """Generates the 'representative forms' across all binyanim, and
     shuffles the results.
@@ -283,22 +381,12 @@ def query_representative_forms_and_shuffle() -> List[ConjugatedVerb]:
     can generally be derived morphologically from them. For a longer
     explanation, see 'Learning Biblical Hebrew', Kutz & Josberger.
     """
-    verbs = ConjugatedVerb.query.filter(or_(
-        ConjugatedVerb.tense == Tense.INFINITIVE_ABSOLUTE,  # Inf. Abs.
-        ConjugatedVerb.tense == Tense.INFINITIVE_CONSTRUCT,  # Inf. Cst.
-        and_(  # 3 m.s. perfect
-            ConjugatedVerb.person == Person.THIRD,
-            ConjugatedVerb.gender == Gender.MASCULINE,
-            ConjugatedVerb.number == Number.SINGULAR,
-            ConjugatedVerb.tense == Tense.PERFECT,
-        ),
-        and_(  # (active) participle
-            ConjugatedVerb.person == Person.SECOND,
-            ConjugatedVerb.gender == Gender.MASCULINE,
-            ConjugatedVerb.number == Number.SINGULAR,
-            ConjugatedVerb.tense == Tense.PARTICIPLE_ACTIVE,
-        ),
-    )).all()
+    verbs = [
+        verb
+        for binyan in Binyan
+        for verb in get_paradigm(binyan).values()
+        if _is_representative_form(verb)
+    ]
 
     # Randomize order
     random.shuffle(verbs)
@@ -307,10 +395,34 @@ def query_representative_forms_and_shuffle() -> List[ConjugatedVerb]:
     return verbs
 
 
+def _is_representative_form(verb: ConjugatedVerb) -> bool:
+    """See query_representative_forms_and_shuffle()."""
+    if verb.tense in (Tense.INFINITIVE_ABSOLUTE, Tense.INFINITIVE_CONSTRUCT):
+        return True
+
+    # 3 m.s. perfect
+    if (verb.tense is Tense.PERFECT and
+        verb.person is Person.THIRD and
+        verb.gender is Gender.MASCULINE and
+        verb.number is Number.SINGULAR):
+        return True
+
+    # (active) participle
+    if (verb.tense is Tense.PARTICIPLE_ACTIVE and
+        verb.person is Person.SECOND and
+        verb.gender is Gender.MASCULINE and
+        verb.number is Number.SINGULAR):
+        return True
+
+    return False
+
+
 def query_binyan_and_shuffle(binyan: Binyan) -> List[ConjugatedVerb]:
+    """Retrieves the conjugations of a binyan that are worth practicing
+    (see the configuration flags CONJUGATION_PRACTICE_EXCLUDE_*), and
+    shuffles the results.
     """
-    """
-    verbs = ConjugatedVerb.query.filter_by(binyan=binyan).all()
+    verbs = list(get_paradigm(binyan).values())
     
     # We expect non-sensical conjugations (e.g., a "first-person
     # infinitive") to be represented by an empty string or None.
@@ -336,4 +448,20 @@ def query_binyan_and_shuffle(binyan: Binyan) -> List[ConjugatedVerb]:
     random.shuffle(verbs)
     app.logger.info("Got %i verbs for stem %s", len(verbs), binyan)
 
-    return verbs
\ No newline at end of file
+    return verbs
+
+
+def _excluded_tenses() -> List[Tense]:
+    """Tenses excluded from practice (see the configuration flags
+    CONJUGATION_PRACTICE_EXCLUDE_*).
+    """
+    tenses = []
+    if app.config["CONJUGATION_PRACTICE_EXCLUDE_WAW_CONSECUTIVES"]:
+        tenses += [
+            Tense.PERFECT_WAW_CONSECUTIVE,
+            Tense.IMPERFECT_WAW_CONSECUTIVE,
+        ]
+    if app.config["CONJUGATION_PRACTICE_EXCLUDE_JUSSIVE_AND_COHORTATIVES"]:
+        tenses.append(Tense.JUSSIVE_COHORTATIVE)
+
+    return tenses
@@ -0,0 +1,33 @@
+from flask import Blueprint
+from flask import Response
+
+from limud.backend.flashcards.events import get_review_log
+from limud.backend.flashcards.formatting import get_description_cache
+from limud.backend.flashcards.prefetch import get_prefetcher
+from limud.backend.metrics import PROMETHEUS_CONTENT_TYPE
+from limud.backend.metrics import get_metrics
+from limud.backend.wiktionary import get_wiktionary_client
+from limud.backend.wiktionary import get_wotm_prefetcher
+
+
+metrics = Blueprint("metrics", __name__)
+
+
+@metrics.route("/metrics")
+def index():
+    """Request metrics, and statistics of the caches and background
+    workers, in the Prometheus text format.
+    """
+    client = get_wiktionary_client()
+    stats = {
+        "card_prefetcher": get_prefetcher().stats(),
+        "description_cache": get_description_cache().stats(),
+        "review_events": get_review_log().stats(),
+        "wiktionary_client": client.stats(),
+        "wotm_prefetcher": get_wotm_prefetcher().stats(),
+    }
+    if client.cache is not None:
+        stats["wiktionary_cache"] = client.cache.stats()
+
+    return Response(get_metrics().render(stats),
+                    content_type=PROMETHEUS_CONTENT_TYPE)
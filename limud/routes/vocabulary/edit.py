@@ -6,8 +6,14 @@ from flask import render_template
 from flask import session
 from flask import Blueprint
 
+from limud.backend.flashcards import FlashcardRunState
+from limud.backend.flashcards import invalidate_description
+from limud.backend.flashcards.prefetch import get_prefetcher
+from limud.backend.flashcards.store import get_run_store
 from limud.backend.models.vocabulary import create_word_from_form_dict
 from limud.backend.models.vocabulary import update_word_from_form_dict
+from limud.backend.models.vocabulary import invalidate_cached_words
+from limud.backend.models.vocabulary import invalidate_chapter_ids
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
 from limud.extensions import database
@@ -26,6 +32,7 @@ def add_word():
         
         word = create_word_from_form_dict(**request.form)
         database.session.add(word)
+        invalidate_chapter_ids()
         database.session.commit()
         
         app.logger.info("Added word: %s to database", word)
@@ -111,29 +118,47 @@ def edit_word(word_id: str):
 
     if request.method == "POST":
         if "delete_button_press" in request.form:
-            word_id = word.id
+            deleted_id = word.id
 
+            invalidate_description(word)
             database.session.delete(word)
+            invalidate_chapter_ids()
+            invalidate_cached_words()
             database.session.commit()
             app.logger.warn("Deleted word.")
 
+            # Drop the prefetched cards of this process right away (other
+            # processes drop theirs within FLASHCARD_PREFETCH_CHECK_INTERVAL)
+            get_prefetcher().check_version()
+
             # Upon successful delete, remove the reference to the deleted word
-            # from the current run...
-            session["word_ids"].remove(word_id)
-            num_remaining_words = len(session["word_ids"])
-
-            if num_remaining_words:
-                # If there is 1 or more word left, also update the index
-                # and go back to the preceding flashcard
-                session["index"] = (session["index"] - 1) % num_remaining_words
+            # from the current run (if any, as it may have expired)...
+            try:
+                state = FlashcardRunState.from_flask_session()
+            except KeyError:
+                app.logger.warning("No current run: going back to home.")
+                return redirect(url_for("home.index"))
+
+            state.remove_word(deleted_id)
+
+            if state.size:
+                # If there is 1 or more word left, the run also went back
+                # to the preceding flashcard
+                state.to_flask_session()
                 return redirect(referrer_url)
             else:
-                session.pop("index")
+                run_id = session.pop("run_id", None)
+                if run_id is not None:
+                    get_run_store().delete(run_id)
                 return redirect(url_for("home.index"))
 
         app.logger.debug(f"Submitted fields: {request.form}")        
+        invalidate_description(word)
         update_word_from_form_dict(word, **request.form)
+        invalidate_chapter_ids()
+        invalidate_cached_words()
         database.session.commit()
+        get_prefetcher().check_version()
 
         app.logger.info("Updated existing word: %s", word)
         return redirect(referrer_url)
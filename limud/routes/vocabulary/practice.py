@@ -1,5 +1,3 @@
-import random
-
 from flask import current_app as app
 from flask import redirect
 from flask import render_template
@@ -10,16 +8,30 @@ from flask import Blueprint
 
 from limud.backend.flashcards import FlashcardSide
 from limud.backend.flashcards import FlashcardSorting
+from limud.backend.flashcards import FlashcardRunSpec
 from limud.backend.flashcards import FlashcardRunState
 from limud.backend.flashcards import make_flashcard_run
-from limud.backend.flashcards import description_as_html
+from limud.backend.flashcards.due import DuePracticeState
+from limud.backend.flashcards.events import record_answer
+from limud.backend.flashcards.events import show_card
+from limud.backend.flashcards.prefetch import PrefetchedCard
+from limud.backend.flashcards.prefetch import get_prefetcher
+from limud.backend.models.events import ReviewMode
+from limud.backend.models.events import ReviewOutcome
+from limud.backend.models.schedule import Deck
+from limud.backend.models.schedule import Grade
+from limud.backend.models.schedule import count_due_cards
+from limud.backend.models.schedule import next_due_card
+from limud.backend.models.schedule import review_card
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
+from limud.backend.query_budget import query_budget
 from limud.extensions import database
 from limud.routes.vocabulary._blueprint import vocabulary
 
 
 @vocabulary.route("/practice/", methods=["GET", "POST"])
+@query_budget(7)
 def practice():
     state = FlashcardRunState.from_flask_session()
 
@@ -33,12 +45,12 @@ def practice():
             state.side = FlashcardSide.answer_side()
 
         # User indicates they got the word right: Remove word from the set of 
-        # words being considered. No need to update the index since the length
-        # of the word list has changed. Display the prompt side again for the
-        # card next in line.
+        # words being considered, and move on to the next remaining word.
+        # Display the prompt side again for the card next in line.
         if request.form["button_press"] == "correct":
             app.logger.debug("Received request for correct")
-            state.words.pop(state.index)
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.CORRECT)
+            state.complete()
             state.progress[0] += 1
             state.side = FlashcardSide.prompt_side()
             
@@ -46,29 +58,40 @@ def practice():
         # display the prompt side again for the card next in line.
         if request.form["button_press"] == "incorrect":
             app.logger.debug("Received request for incorrect")
-            state.index += 1
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.INCORRECT)
+            state.skip()
             state.progress[0] += 1
             state.side = FlashcardSide.prompt_side()
 
-    if not state.words:
-        app.logger.info("Finished current run. Good job!")
-        return redirect(url_for("home.index"))
+    while True:
+        if not state.remaining:
+            app.logger.info("Finished current run. Good job!")
+            return redirect(url_for("home.index"))
+
+        # New pass: Go through the remaining words again, in a new order
+        if state.index == state.size:
+            app.logger.info("Finished a run, shuffling remaining words.")
+            state.new_pass()
 
-    # New run: Make sure index is valid wrt. new word list length
-    if state.index == len(state.words):
-        app.logger.info("Finished a run, shuffling remaining words.")
-        random.shuffle(state.words)
-        state.progress = [0, len(state.words)]
-        state.index = 0
+        card = get_prefetcher().card(state)
+        if card is not None:
+            break
 
-    word = Word.query.get(state.words[state.index])
-    app.logger.info("Retrieved word: %s from database", word)
+        # The word was deleted since the run started (e.g., by another
+        # session): there is nothing left to practice for it
+        app.logger.warning("Skipping deleted word at rank %i of run %s",
+                           state.rank(), state.run_id)
+        state.complete()
+        state.progress[1] -= 1
+
+    app.logger.info("Retrieved word: %i from prefetched cards", card.id)
+    show_card(Deck.VOCABULARY, card.id)
         
     if state.side is FlashcardSide.FRONT:
-        content = word.hebrew
+        content = card.front
         app.logger.debug("Showing front of flashcard")
     elif state.side is FlashcardSide.BACK:
-        content = description_as_html(word)
+        content = card.back
         app.logger.debug("Showing back of flashcard ")
     else:
         raise ValueError("Invalid value for session variable 'side'!")
@@ -77,13 +100,17 @@ def practice():
     if request.method == "POST":
         if request.form["button_press"] == "favorite":
             app.logger.debug("Received request to favorite")
-            word.favorite = True
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.FAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": True})
             database.session.commit()
+            card.favorite = True
 
         if request.form["button_press"] == "unfavorite":
             app.logger.debug("Received request to unfavorite")
-            word.favorite = False
+            record_answer(ReviewMode.PRACTICE, ReviewOutcome.UNFAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": False})
             database.session.commit()
+            card.favorite = False
 
     # Save state before leaving function
     state.to_flask_session()
@@ -101,7 +128,97 @@ def practice():
         render_hebrew_large=state.side is FlashcardSide.FRONT,
         render_reveal_button=state.side is FlashcardSide.FRONT,
         render_favorite_button=True,
-        favorite=word.favorite,
+        favorite=card.favorite,
+        progress_percent=100 * state.progress[0] / state.progress[1],
+    )
+
+
+@vocabulary.route("/practice/due", methods=["GET", "POST"])
+@query_budget(7)
+def practice_due():
+    """Displays the words due for review, the most overdue first, and
+    reschedules each word once answered (see models.schedule).
+
+    Visiting this page starts a new session, of at most
+    SPACED_REPETITION_SESSION_SIZE words.
+    """
+    state = None
+    if request.method == "POST":
+        state = DuePracticeState.from_flask_session(Deck.VOCABULARY)
+
+    if state is None:
+        size = count_due_cards(
+            Deck.VOCABULARY,
+            limit=app.config["SPACED_REPETITION_SESSION_SIZE"],
+        )
+        app.logger.info("Starting a session of %i due word(s)", size)
+        state = DuePracticeState(
+            deck=Deck.VOCABULARY,
+            side=FlashcardSide.prompt_side(),
+            progress=[0, size],
+        )
+    elif request.form["button_press"] == "flip":
+        app.logger.debug("Received request to flip")
+        state.side = FlashcardSide.answer_side()
+    elif request.form["button_press"] in ("correct", "incorrect"):
+        correct = request.form["button_press"] == "correct"
+        app.logger.debug("Received request for %s",
+                         request.form["button_press"])
+        record_answer(
+            ReviewMode.DUE,
+            ReviewOutcome.CORRECT if correct else ReviewOutcome.INCORRECT,
+        )
+        schedule = review_card(
+            state.schedule_id, Grade.GOOD if correct else Grade.AGAIN)
+        app.logger.info("Rescheduled %s", schedule)
+        state.answer(correct, FlashcardSide.prompt_side())
+
+    word = None
+    if state.card_id is not None:
+        # The word may have been deleted since it was picked
+        word = Word.query.with_polymorphic("*") \
+            .filter_by(id=state.card_id).first()
+
+    if word is None and not state.finished:
+        schedule = next_due_card(Deck.VOCABULARY)
+        if schedule is not None:
+            state.schedule_id = schedule.id
+            state.card_id = schedule.card_id
+            word = Word.query.with_polymorphic("*") \
+            .filter_by(id=state.card_id).first()
+
+    if word is None:
+        app.logger.info("No more words due for review. Good job!")
+        return redirect(url_for("home.index"))
+
+    card = PrefetchedCard.from_word(word)
+    app.logger.info("Retrieved due word: %i", card.id)
+    show_card(Deck.VOCABULARY, card.id)
+
+    # Look at these requests at the end since we need to load the word first
+    if request.method == "POST":
+        if request.form["button_press"] == "favorite":
+            app.logger.debug("Received request to favorite")
+            record_answer(ReviewMode.DUE, ReviewOutcome.FAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": True})
+            database.session.commit()
+            card.favorite = True
+
+        if request.form["button_press"] == "unfavorite":
+            app.logger.debug("Received request to unfavorite")
+            record_answer(ReviewMode.DUE, ReviewOutcome.UNFAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": False})
+            database.session.commit()
+            card.favorite = False
+
+    state.to_flask_session()
+
+    return render_template("practice.html",
+        content=card.front if state.side is FlashcardSide.FRONT else card.back,
+        render_hebrew_large=state.side is FlashcardSide.FRONT,
+        render_reveal_button=state.side is FlashcardSide.prompt_side(),
+        render_favorite_button=True,
+        favorite=card.favorite,
         progress_percent=100 * state.progress[0] / state.progress[1],
     )
 
@@ -114,7 +231,7 @@ def practice_all():
     """
     return make_flashcard_run(
         endpoint=".practice",
-        query=Word.query,
+        spec=FlashcardRunSpec(),
         sorting=FlashcardSorting.SHUFFLE,
     )
 
@@ -127,7 +244,7 @@ def practice_all_favorites():
     """
     return make_flashcard_run(
         endpoint=".practice",
-        query=Word.query.filter_by(favorite=True),
+        spec=FlashcardRunSpec(favorites=True),
         sorting=FlashcardSorting.SHUFFLE,
     )
 
@@ -140,7 +257,7 @@ def practice_by_category(category: str):
     """
     return make_flashcard_run(
         endpoint=".practice",
-        query=Word.query.filter_by(category=GrammaticalCategory(category)),
+        spec=FlashcardRunSpec(category=GrammaticalCategory(category).value),
         sorting=FlashcardSorting.SHUFFLE,
     )
 
@@ -154,7 +271,7 @@ def practice_by_chapter(chapter_id: str):
     """
     return make_flashcard_run(
         endpoint=".practice",
-        query=Word.query.filter_by(chapter=int(chapter_id)),
+        spec=FlashcardRunSpec(chapter=int(chapter_id)),
         sorting=FlashcardSorting.SHUFFLE,
     )
     
\ No newline at end of file
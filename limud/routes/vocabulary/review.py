@@ -18,20 +18,29 @@ from flask import url_for
 from sqlalchemy.orm import Query
 from werkzeug import Response
 
-from limud.backend.flashcards import description_as_html
 from limud.backend.flashcards import make_flashcard_run
+from limud.backend.flashcards import FlashcardRunSpec
 from limud.backend.flashcards import FlashcardRunState
 from limud.backend.flashcards import FlashcardSide
 from limud.backend.flashcards import FlashcardSorting
+from limud.backend.flashcards.events import record_answer
+from limud.backend.flashcards.events import show_card
+from limud.backend.flashcards.prefetch import get_prefetcher
 from limud.backend.models.conjugation import ConjugatedVerb
+from limud.backend.models.events import ReviewMode
+from limud.backend.models.events import ReviewOutcome
+from limud.backend.models.schedule import Deck
+from limud.backend.models.search import as_fts_query
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
+from limud.backend.query_budget import query_budget
 from limud.backend.wiktionary import WiktionaryWordParse
 from limud.extensions import database
 from limud.routes.vocabulary._blueprint import vocabulary
 
 
 @vocabulary.route("/review/", methods=["GET", "POST"])
+@query_budget(7)
 def review():
     """Displays all cards in a given "run".
 
@@ -40,7 +49,7 @@ def review():
     """
     state = FlashcardRunState.from_flask_session()
 
-    if not state.words:
+    if not state.size:
         app.logger.error("Empty word list. Going back to home.")
         return redirect(url_for("home.index"))
     
@@ -54,7 +63,7 @@ def review():
         # the user is trying to guess (since they are practicing).
         if request.form["button_press"] == "previous":
             app.logger.debug("Received request for previous")
-            state.index = (state.index - 1) % len(state.words)
+            state.index = (state.index - 1) % state.size
             
             # Force switch back to the prompt side
             state.side = FlashcardSide.prompt_side()
@@ -63,41 +72,61 @@ def review():
         # the user is trying to guess (since they are practicing).
         if request.form["button_press"] == "next":
             app.logger.debug("Received request for next")
-            state.index = (state.index + 1) % len(state.words)
+            state.index = (state.index + 1) % state.size
 
             # Force switch back to the prompt side
             state.side = FlashcardSide.prompt_side()
 
-    word = Word.query.get(state.words[state.index])
-    app.logger.info("Retrieved word: %s from database", word)
+    card = get_prefetcher().card(state)
+    while card is None:
+        # The word was deleted since the run started (e.g., by another
+        # session): drop it, and show the next card instead
+        app.logger.warning("Dropping deleted word at rank %i of run %s",
+                           state.rank(), state.run_id)
+        state.remove(state.rank())
+        get_prefetcher().invalidate(state.run_id)
+
+        if not state.size:
+            app.logger.error("Empty word list. Going back to home.")
+            return redirect(url_for("home.index"))
+
+        state.index = (state.index + 1) % state.size
+        card = get_prefetcher().card(state)
+
+    app.logger.info("Retrieved word: %i from prefetched cards", card.id)
+    show_card(Deck.VOCABULARY, card.id)
 
     state.progress[0] = state.index + 1
-    state.progress[1] = len(state.words)
+    state.progress[1] = state.size
     app.logger.info("Progress: %i out of %i", *state.progress)
         
     if state.side is FlashcardSide.FRONT:
-        content = word.hebrew
+        content = card.front
         app.logger.debug("Showing front of flashcard")
    
     if state.side is FlashcardSide.BACK:
-        content = description_as_html(word)
+        content = card.back
         app.logger.debug("Showing back of flashcard")
 
     # Look at these requests at the end since we need to load the word first
     if request.method == "POST":
         if request.form["button_press"] == "favorite":
             app.logger.debug("Received request to favorite")
-            word.favorite = True
+            record_answer(ReviewMode.REVIEW, ReviewOutcome.FAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": True})
             database.session.commit()
+            card.favorite = True
 
         if request.form["button_press"] == "unfavorite":
             app.logger.debug("Received request to unfavorite")
-            word.favorite = False
+            record_answer(ReviewMode.REVIEW, ReviewOutcome.UNFAVORITE)
+            Word.query.filter_by(id=card.id).update({"favorite": False})
             database.session.commit()
+            card.favorite = False
 
         if request.form["button_press"] == "edit":
-            app.logger.debug("Received request to edit word %s", word)
-            return redirect(url_for("vocabulary.edit_word", word_id=word.id))
+            app.logger.debug("Received request to edit word %i", card.id)
+            return redirect(url_for("vocabulary.edit_word", word_id=card.id))
 
     # Save state before leaving function
     state.to_flask_session()
@@ -105,7 +134,7 @@ def review():
     return render_template("review.html",
         content=content,
         render_front_of_flashcard=state.side is FlashcardSide.FRONT,
-        favorite=word.favorite,
+        favorite=card.favorite,
         progress_percent=100 * state.progress[0] / state.progress[1],
     )
 
@@ -118,7 +147,7 @@ def review_all():
     """
     return make_flashcard_run(
         endpoint=".review",
-        query=Word.query,
+        spec=FlashcardRunSpec(),
         sorting=FlashcardSorting.ALPHABETICAL,
     )
 
@@ -131,7 +160,7 @@ def review_all_favorites():
     """
     return make_flashcard_run(
         endpoint=".review",
-        query=Word.query.filter_by(favorite=True),
+        spec=FlashcardRunSpec(favorites=True),
         sorting=FlashcardSorting.ALPHABETICAL,
     )
 
@@ -144,7 +173,7 @@ def review_by_category(category: str):
     """
     return make_flashcard_run(
         endpoint=".review",
-        query=Word.query.filter_by(category=GrammaticalCategory(category)),
+        spec=FlashcardRunSpec(category=GrammaticalCategory(category).value),
         sorting=FlashcardSorting.ALPHABETICAL,
     )
 
@@ -158,7 +187,7 @@ def review_by_chapter(chapter_id: str):
     """
     return make_flashcard_run(
         endpoint=".review",
-        query=Word.query.filter_by(chapter=int(chapter_id)),
+        spec=FlashcardRunSpec(chapter=int(chapter_id)),
         sorting=FlashcardSorting.ALPHABETICAL,
     )
     
@@ -171,7 +200,24 @@ def review_by_word(word_id: str):
     """
     return make_flashcard_run(
         endpoint=".review",
-        query=Word.query,
+        spec=FlashcardRunSpec(),
         sorting=FlashcardSorting.ALPHABETICAL,
         start_at_word_id=int(word_id),
     )
+
+
+@vocabulary.route("/search")
+def search():
+    """Displays the words whose meanings match the free text given in
+    the 'q' query parameter, best matches first.
+    """
+    text = request.args.get("q", "")
+
+    if not as_fts_query(text):
+        app.logger.error("Nothing to search for in %r", text)
+        return redirect(url_for("home.index"))
+
+    return make_flashcard_run(
+        endpoint=".review",
+        spec=FlashcardRunSpec(search=text),
+    )
@@ -16,6 +16,7 @@ from limud.backend.flashcards import description_as_html
 from limud.backend.models.vocabulary import GrammaticalCategory
 from limud.backend.models.vocabulary import Word
 from limud.backend.models.vocabulary import database
+from limud.backend.wiktionary import get_wotm_prefetcher
 from limud.backend.wiktionary import scrape_page_from_wiktionary
 from limud.backend.wiktionary import UnparsablePageError
 from limud.backend.wiktionary import WiktionaryWordParse
@@ -35,7 +36,7 @@ def display_wotm():
     session object. See also the docs of 'FlashcardRunState'.
     """
     state = FlashcardRunState.from_flask_session()
-    parse = WiktionaryWordParse(**state.words[state.index])
+    parse = WiktionaryWordParse(**state.current())
     word = parse.as_word()
     app.logger.debug("Current word: %s", word)
 
@@ -49,7 +50,8 @@ def display_wotm():
         content = word.hebrew
         app.logger.debug("Showing front of WOTM")
     elif state.side is FlashcardSide.BACK:
-        content = description_as_html(word)
+        content = description_as_html(
+            word, cache_key=("wotm", parse.url, state.rank()))
         app.logger.debug("Showing back of WOTM ")
     else:
         raise ValueError("Invalid value for session variable 'side'!")
@@ -72,8 +74,16 @@ def display_from_scrapping_random():
     via the FlashcardRunState helper object, and redirecting to the
     .display_wotm route (which assumes that state has been properly
     set up).
+
+    Pages are normally scraped in advance by background threads (see
+    WordPrefetcher). If none is ready, one is scraped right away.
     """
-    parses = scrape_page_from_wiktionary(retry=True)
+    parses = get_wotm_prefetcher().pop()
+
+    if parses is None:
+        app.logger.info("No prefetched page available, scraping one")
+        parses = scrape_page_from_wiktionary(retry=True)
+
     app.logger.debug("Parsed words: %s", *(p.word for p in parses))
 
     FlashcardRunState(
@@ -95,7 +105,7 @@ def display_from_scrapping_word(word: str):
     .display_wotm route (which assumes that state has been properly
     set up).
     """
-    url = f"https://en.wiktionary.org/w/index.php?title={word}"
+    url = f"{app.config['WIKTIONARY_URL']}/w/index.php?title={word}"
     parses = scrape_page_from_wiktionary(url=url)
     app.logger.debug("Parsed words: %s", *(p.word for p in parses))
 
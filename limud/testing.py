@@ -0,0 +1,76 @@
+"""Pytest fixtures for testing the application.
+
+Enable them in a conftest.py with:
+
+    pytest_plugins = ["limud.testing"]
+
+The application under test enforces the budgets of SQL statements of
+its views (see limud.backend.query_budget), so that any request to a
+view over its budget fails. Tighter budgets, e.g. for some action of a
+view, can be checked with the 'query_budget' fixture:
+
+    def test_flip(client, query_budget):
+        client.get("/vocabulary/review/all")
+        with query_budget(2):
+            client.post("/vocabulary/review/",
+                        data={"button_press": "flip"})
+
+Requires pytest, which the application itself does not.
+"""
+
+import shutil
+from typing import Callable
+from typing import ContextManager
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from config import Config
+from limud.backend.query_budget import QueryRecorder
+from limud.backend.query_budget import assert_query_budget
+from limud.extensions import database
+from limud.factory import create_app
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory: pytest.TempPathFactory) -> Flask:
+    """The application, on a scratch copy of the configured database.
+
+    There is one per test session, as context processors are registered
+    on the first application created (see limud.factory). It is
+    otherwise configured as by default, so that the budgets of views
+    are checked against the statements they actually execute, e.g.,
+    to check the versions of cached data or to load cold caches.
+    """
+    source = Config.SQLALCHEMY_DATABASE_URI[len("sqlite:///"):]
+    path = tmp_path_factory.mktemp("database") / "limud.sqlite3"
+    shutil.copyfile(source, path)
+
+    app = create_app({
+        "TESTING": True,
+        "ENFORCE_QUERY_BUDGETS": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "WIKTIONARY_CACHE_PATH": None,
+        "WOTM_PREFETCH_CAPACITY": 0,
+    })
+
+    return app
+
+
+@pytest.fixture
+def client(app: Flask) -> FlaskClient:
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget(app: Flask) \
+        -> Callable[[int], ContextManager[QueryRecorder]]:
+    """Checks that a block executes at most so many SQL statements on
+    the database of the application (see assert_query_budget()).
+    """
+    def check(budget: int, what: str = "Block"):
+        return assert_query_budget(
+            budget, what=what, engine=database.get_engine(app))
+
+    return check
@@ -0,0 +1,72 @@
+"""Add packed bitfield column and unique indexes to conjugation table
+
+Revision ID: 5c1f0e2a9b47
+Revises: 88e08d532d7e
+Create Date: 2026-10-16 09:12:31.804113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1f0e2a9b47'
+down_revision = '88e08d532d7e'
+branch_labels = None
+depends_on = None
+
+
+# Integer values of the enumerations in limud.backend.models.conjugation,
+# keyed by the names stored in the database. These are copied here so
+# that this migration does not depend on the current state of the models.
+_TENSES = {
+    'PERFECT': 0, 'IMPERFECT': 1, 'JUSSIVE_COHORTATIVE': 2, 'IMPERATIVE': 3,
+    'PARTICIPLE_ACTIVE': 4, 'PARTICIPLE_PASSIVE': 5,
+    'INFINITIVE_ABSOLUTE': 6, 'INFINITIVE_CONSTRUCT': 7,
+    'PERFECT_WAW_CONSECUTIVE': 8, 'IMPERFECT_WAW_CONSECUTIVE': 9,
+}
+_PERSONS = {'FIRST': 0, 'SECOND': 1, 'THIRD': 2}
+_GENDERS = {'MASCULINE': 0, 'FEMININE': 1, 'COMMON': 2}
+_NUMBERS = {'SINGULAR': 0, 'PLURAL': 1}
+
+
+def _pack(tense, person, gender, number):
+    """Same as limud.backend.models.conjugation.pack(), on names."""
+    return (
+        _TENSES[tense] << 0 |
+        _PERSONS.get(person, 0) << 4 |
+        _GENDERS.get(gender, 0) << 6 |
+        _NUMBERS.get(number, 0) << 8
+    )
+
+
+def upgrade():
+    op.add_column('conjugation', sa.Column('bitfield', sa.Integer(), nullable=True))
+
+    # Backfill the new column before the unique index is built on it
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        'SELECT id, tense, person, gender, number FROM conjugation'
+    )).fetchall()
+
+    if rows:
+        connection.execute(
+            sa.text('UPDATE conjugation SET bitfield = :bitfield WHERE id = :id'),
+            [{'id': id_, 'bitfield': _pack(t, p, g, n)} for id_, t, p, g, n in rows],
+        )
+
+    # Note: this fails if the table already holds duplicate conjugations,
+    # which then have to be removed by hand.
+    op.create_index(
+        'ix_conjugation_binyan_bitfield', 'conjugation',
+        ['binyan', 'bitfield'], unique=True)
+    op.create_index(
+        'ix_conjugation_binyan_tense_person_gender_number', 'conjugation',
+        ['binyan', 'tense', 'person', 'gender', 'number'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_conjugation_binyan_tense_person_gender_number', table_name='conjugation')
+    op.drop_index('ix_conjugation_binyan_bitfield', table_name='conjugation')
+    with op.batch_alter_table('conjugation') as batch_op:
+        batch_op.drop_column('bitfield')
@@ -0,0 +1,31 @@
+"""Add index on Hebrew forms in the HEBREW collation
+
+Revision ID: 7e2a5c0d9b18
+Revises: d41b8f6a2c93
+Create Date: 2026-10-17 13:48:19.027716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2a5c0d9b18'
+down_revision = 'd41b8f6a2c93'
+branch_labels = None
+depends_on = None
+
+
+# Note: the HEBREW collation is registered by limud.backend.collation on
+# every connection of the application. Once this index exists, SQLite
+# refuses any statement on the vocabulary table (even reads, e.g.,
+# 'SELECT count(*) FROM vocabulary') from connections that lack the
+# collation, such as the sqlite3 shell: see register_collation().
+def upgrade():
+    op.create_index(
+        'ix_vocabulary_hebrew_collated', 'vocabulary',
+        [sa.text('hebrew COLLATE "HEBREW"')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_vocabulary_hebrew_collated', table_name='vocabulary')
@@ -0,0 +1,27 @@
+"""Add row version column to vocabulary table
+
+Revision ID: a3d9e71c4f20
+Revises: 5c1f0e2a9b47
+Create Date: 2026-10-17 10:02:47.215930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9e71c4f20'
+down_revision = '5c1f0e2a9b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows all start at version 1
+    op.add_column('vocabulary', sa.Column(
+        'version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('vocabulary') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,71 @@
+"""Add full-text search index over vocabulary meanings
+
+Revision ID: b8c6f1e04a75
+Revises: 7e2a5c0d9b18
+Create Date: 2026-10-17 15:31:42.660148
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c6f1e04a75'
+down_revision = '7e2a5c0d9b18'
+branch_labels = None
+depends_on = None
+
+
+# Same as limud.backend.models.search.FTS_DDL at the time of writing
+_COLUMNS = 'description, nifal, piel, pual, hifil, hofal, hitpael'
+_NEW = ', '.join(f'new.{c}' for c in _COLUMNS.split(', '))
+_OLD = ', '.join(f'old.{c}' for c in _COLUMNS.split(', '))
+
+_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE vocabulary_fts USING fts5(
+        {_COLUMNS},
+        content='vocabulary', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER vocabulary_fts_insert AFTER INSERT ON vocabulary
+    BEGIN
+        INSERT INTO vocabulary_fts (rowid, {_COLUMNS})
+        VALUES (new.id, {_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER vocabulary_fts_delete AFTER DELETE ON vocabulary
+    BEGIN
+        INSERT INTO vocabulary_fts (vocabulary_fts, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, {_OLD});
+    END
+    """,
+    f"""
+    CREATE TRIGGER vocabulary_fts_update
+    AFTER UPDATE OF {_COLUMNS} ON vocabulary
+    BEGIN
+        INSERT INTO vocabulary_fts (vocabulary_fts, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, {_OLD});
+        INSERT INTO vocabulary_fts (rowid, {_COLUMNS})
+        VALUES (new.id, {_NEW});
+    END
+    """,
+)
+
+
+def upgrade():
+    for statement in _DDL:
+        op.execute(statement)
+
+    # Index the existing vocabulary
+    op.execute("INSERT INTO vocabulary_fts (vocabulary_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER vocabulary_fts_update')
+    op.execute('DROP TRIGGER vocabulary_fts_delete')
+    op.execute('DROP TRIGGER vocabulary_fts_insert')
+    op.execute('DROP TABLE vocabulary_fts')
@@ -0,0 +1,49 @@
+"""Add alphabetical sort key column to vocabulary table
+
+Revision ID: d41b8f6a2c93
+Revises: a3d9e71c4f20
+Create Date: 2026-10-17 11:26:05.583194
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b8f6a2c93'
+down_revision = 'a3d9e71c4f20'
+branch_labels = None
+depends_on = None
+
+
+def _remove_niqqudot(hebrew):
+    """Same as limud.backend.models.vocabulary.remove_niqqudot()."""
+    normalized = unicodedata.normalize('NFD', hebrew)
+    return re.sub(r'[^\u05d0-\u05f4]', '', normalized)
+
+
+def upgrade():
+    # SQLite can only add a non-nullable column with a default value
+    op.add_column('vocabulary', sa.Column(
+        'sort_key', sa.String(), nullable=False, server_default=''))
+
+    # Backfill the new column before it is indexed
+    connection = op.get_bind()
+    rows = connection.execute(sa.text('SELECT id, hebrew FROM vocabulary')).fetchall()
+
+    if rows:
+        connection.execute(
+            sa.text('UPDATE vocabulary SET sort_key = :sort_key WHERE id = :id'),
+            [{'id': id_, 'sort_key': _remove_niqqudot(hebrew)} for id_, hebrew in rows],
+        )
+
+    op.create_index('ix_vocabulary_sort_key', 'vocabulary', ['sort_key'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_vocabulary_sort_key', table_name='vocabulary')
+    with op.batch_alter_table('vocabulary') as batch_op:
+        batch_op.drop_column('sort_key')
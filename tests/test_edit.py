@@ -0,0 +1,104 @@
+import pytest
+
+from limud.backend.models.vocabulary import Word
+from limud.backend.models.vocabulary import update_word_from_form_dict
+from limud.extensions import database
+
+FORM = {
+    "hebrew": "בְּדִיקָה",
+    "description": "A test",
+    "category": "noun",
+    "chapter": "1001",
+    "gender": "feminine",
+    "plabs": "",
+    "sgcst": "",
+    "plcst": "",
+    "nifal": "",
+    "piel": "",
+    "pual": "",
+    "hifil": "",
+    "hofal": "",
+    "hitpael": "",
+    "pladj": "",
+    "femadj": "",
+}
+
+
+@pytest.fixture
+def word_id(app, client):
+    client.post("/vocabulary/edit/", data=FORM,
+                headers={"Referer": "http://localhost/"})
+
+    with app.app_context():
+        word_id = Word.query.filter_by(chapter=1001).one().id
+
+    yield word_id
+
+    with app.app_context():
+        Word.query.filter_by(id=word_id).delete()
+        database.session.commit()
+
+
+def delete(client, word_id):
+    return client.post(f"/vocabulary/edit/{word_id}",
+                       data=dict(FORM, delete_button_press="delete"))
+
+
+def test_delete_without_run(app, client, word_id):
+    response = delete(client, word_id)
+
+    assert response.status_code == 302
+    assert response.location.endswith("/")
+    with app.app_context():
+        assert Word.query.get(word_id) is None
+
+
+def test_delete_during_run(app, client, word_id):
+    client.get("/vocabulary/review/chapter/1001")
+
+    response = delete(client, word_id)
+
+    # The run had no other word
+    assert response.status_code == 302
+    assert response.location.endswith("/")
+    with client.session_transaction() as session:
+        assert "run_id" not in session
+    with app.app_context():
+        assert Word.query.get(word_id) is None
+
+
+def test_update(app, client, word_id):
+    with app.app_context():
+        version = Word.query.get(word_id).version
+
+    client.post(f"/vocabulary/edit/{word_id}",
+                data=dict(FORM, description="An updated test"))
+
+    with app.app_context():
+        word = Word.query.get(word_id)
+        assert word.description == "An updated test"
+        assert word.version == version + 1
+
+    client.get("/vocabulary/review/chapter/1001")
+    response = client.post("/vocabulary/review/",
+                           data={"button_press": "flip"})
+    assert "An updated test" in response.data.decode()
+
+
+def test_concurrent_updates(app, word_id):
+    with app.app_context():
+        word = Word.query.get(word_id)
+        version = word.version
+
+        # Updated by another request in the meantime: the last write wins
+        with database.engine.begin() as connection:
+            connection.execute(
+                Word.__table__.update()
+                    .where(Word.__table__.c.id == word_id)
+                    .values(version=Word.__table__.c.version + 1))
+
+        update_word_from_form_dict(word, **dict(FORM, description="Last"))
+        database.session.commit()
+
+        assert word.description == "Last"
+        assert word.version == version + 2
@@ -0,0 +1,62 @@
+import re
+
+from limud.backend.models.cache import bump_cache_version
+from limud.backend.models.conjugation import PARADIGM_CACHE_NAME
+from limud.backend.models.conjugation import Binyan
+from limud.backend.models.conjugation import ConjugatedVerb
+from limud.extensions import database
+
+
+def edit_form(client, binyan):
+    html = client.get(f"/conjugation/{binyan}?edit=1").data.decode()
+    return dict(re.findall(r'name="(\d+)"\s+value="([^"]*)"', html))
+
+
+def test_paradigms_are_cached_per_application(app, client):
+    client.get("/conjugation/piel")
+
+    cached_version, paradigm = app.extensions[PARADIGM_CACHE_NAME][
+        Binyan.PIEL]
+    assert paradigm
+    assert all(
+        conjugation.binyan is Binyan.PIEL
+        for conjugation in paradigm.values()
+    )
+
+
+def test_saving_a_table(client):
+    cells = edit_form(client, "qal")
+    bitfield = next(bitfield for bitfield, text in cells.items() if text)
+    client.get("/conjugation/qal")
+
+    try:
+        client.post("/conjugation/qal?edit=1",
+                    data=dict(cells, button_press="save",
+                              **{bitfield: "שָׁמַר"}))
+        assert "שָׁמַר" in client.get("/conjugation/qal").data.decode()
+    finally:
+        client.post("/conjugation/qal?edit=1",
+                    data=dict(cells, button_press="save"))
+
+    assert "שָׁמַר" not in client.get("/conjugation/qal").data.decode()
+
+
+def test_writes_of_other_processes(app, client):
+    client.get("/conjugation/hifil")
+
+    with app.app_context():
+        conjugation = ConjugatedVerb.query.filter_by(
+            binyan=Binyan.HIFIL).first()
+        conjugation_id, previous = conjugation.id, conjugation.hebrew
+        conjugation.hebrew = "הִשְׁמִיר"
+        bump_cache_version(PARADIGM_CACHE_NAME)
+        database.session.commit()
+
+    try:
+        assert "הִשְׁמִיר" in client.get("/conjugation/hifil").data.decode()
+    finally:
+        with app.app_context():
+            conjugation = ConjugatedVerb.query.get(conjugation_id)
+            conjugation.hebrew = previous
+            bump_cache_version(PARADIGM_CACHE_NAME)
+            database.session.commit()
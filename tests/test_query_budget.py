@@ -0,0 +1,111 @@
+import pytest
+
+from limud.backend.flashcards.prefetch import get_prefetcher
+from limud.backend.models.cache import bump_cache_version
+from limud.backend.models.conjugation import PARADIGM_CACHE_NAME
+from limud.backend.models.vocabulary import CHAPTERS_CACHE_NAME
+from limud.backend.models.vocabulary import WORDS_CACHE_NAME
+from limud.backend.query_budget import QueryBudgetExceeded
+from limud.extensions import database
+
+
+def test_review_flip(client, query_budget):
+    client.get("/vocabulary/review/all")
+    client.get("/vocabulary/review/")
+
+    with query_budget(2):
+        response = client.post("/vocabulary/review/",
+                               data={"button_press": "flip"})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("action", ["next", "previous", "favorite"])
+def test_review_actions(client, action):
+    client.get("/vocabulary/review/all")
+    client.get("/vocabulary/review/")
+
+    response = client.post("/vocabulary/review/",
+                           data={"button_press": action})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("binyan", ["qal", "piel", "hifil"])
+def test_conjugation_table(client, query_budget, binyan):
+    client.get("/")
+
+    with query_budget(3):
+        response = client.get(f"/conjugation/{binyan}")
+
+    assert response.status_code == 200
+
+
+def test_practice(client):
+    client.get("/vocabulary/practice/all")
+    client.get("/vocabulary/practice/")
+
+    for action in ["flip", "incorrect", "flip", "correct"]:
+        response = client.post("/vocabulary/practice/",
+                               data={"button_press": action})
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize("url", [
+    "/vocabulary/practice/due",
+    "/conjugation/practice/due",
+])
+def test_practice_due(client, url):
+    client.get(url)
+
+    for action in ["flip", "incorrect", "flip", "correct"]:
+        response = client.post(url, data={"button_press": action})
+        assert response.status_code == 200
+
+
+def test_budgets_hold_with_stale_caches(app, client, monkeypatch):
+    # Check the versions of cached data on every request, and change
+    # them all, as if another process wrote to the database
+    monkeypatch.setitem(app.config, "CHAPTERS_CACHE_CHECK_INTERVAL", 0)
+    with app.app_context():
+        monkeypatch.setattr(get_prefetcher(), "check_interval", 0)
+        for name in [CHAPTERS_CACHE_NAME, WORDS_CACHE_NAME,
+                     PARADIGM_CACHE_NAME]:
+            bump_cache_version(name)
+        database.session.commit()
+
+    responses = [
+        client.get("/conjugation/qal"),
+        client.get("/vocabulary/review/all"),
+        client.get("/vocabulary/review/"),
+        client.post("/vocabulary/review/", data={"button_press": "flip"}),
+        client.get("/vocabulary/practice/all"),
+        client.get("/vocabulary/practice/"),
+        client.post("/vocabulary/practice/", data={"button_press": "flip"}),
+        client.get("/conjugation/practice/qal"),
+        client.get("/conjugation/practice/"),
+        client.get("/vocabulary/practice/due"),
+        client.post("/vocabulary/practice/due",
+                    data={"button_press": "flip"}),
+        client.post("/vocabulary/practice/due",
+                    data={"button_press": "incorrect"}),
+        client.get("/conjugation/practice/due"),
+        client.post("/conjugation/practice/due",
+                    data={"button_press": "flip"}),
+        client.post("/conjugation/practice/due",
+                    data={"button_press": "incorrect"}),
+    ]
+
+    assert all(response.status_code in (200, 302) for response in responses)
+
+
+def test_budget_exceeded_reports_repeated_statements(client, query_budget):
+    client.get("/vocabulary/review/all")
+
+    with pytest.raises(QueryBudgetExceeded) as info:
+        with query_budget(0, what="Showing a card"):
+            client.get("/vocabulary/review/")
+
+    assert "Showing a card executed" in str(info.value)
+    assert info.value.budget == 0
+    assert info.value.statements
@@ -0,0 +1,47 @@
+import socket
+
+import pytest
+import requests
+
+from limud.backend.wiktionary import WiktionaryClient
+
+
+@pytest.fixture
+def client():
+    # Nothing listens on a port that was just released
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        host, port = s.getsockname()
+
+    client = WiktionaryClient(
+        base_url=f"http://{host}:{port}", rate=1e6, retries=2, backoff=0.)
+    yield client
+    client.close()
+
+
+def test_request_raises_last_error(client):
+    with pytest.raises(requests.ConnectionError):
+        client.request("GET", f"{client.base_url}/wiki/שלום")
+
+    assert client.requests == 3
+    assert client.retried == 2
+
+
+def test_first_of_returns_first_result(client):
+    results = iter([ValueError("First"), "Second", "Third"])
+
+    def task():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    assert client.first_of(task, k=3) in ("Second", "Third")
+
+
+def test_first_of_raises_last_error(client):
+    def task():
+        raise ValueError("Unparsable")
+
+    with pytest.raises(ValueError, match="Unparsable"):
+        client.first_of(task, k=3)
@@ -0,0 +1,65 @@
+import pathlib
+
+import pytest
+
+from limud.backend.models.search import search_word_ids
+from limud.backend.models.vocabulary import GrammaticalCategory
+from limud.backend.models.vocabulary import Word
+from limud.backend.wiktionary import ingest_dump
+
+DUMP = (
+    pathlib.Path(__file__).parent.parent
+    / "limud" / "benchmarks" / "fixtures" / "wiktionary-dump.ndjson.gz"
+)
+CHAPTER = 1000
+
+
+@pytest.fixture(scope="module")
+def report(app):
+    with app.app_context():
+        reports = list(ingest_dump(DUMP, processes=1, chapter=CHAPTER))
+
+    return reports[-1]
+
+
+def test_report(report):
+    assert report.pages == 10
+    assert report.hebrew_pages == 9
+    assert report.imported == 10
+    assert report.duplicates == 6
+    assert report.failures == []
+
+
+def test_imported_words(app, report):
+    with app.app_context():
+        words = Word.query.filter_by(chapter=CHAPTER).all()
+
+    assert len(words) == report.imported
+    assert {(word.sort_key, word.category) for word in words} == {
+        ("השליך", GrammaticalCategory.VERB),
+        ("התלבש", GrammaticalCategory.VERB),
+        ("כתב", GrammaticalCategory.VERB),
+        ("כתב", GrammaticalCategory.NOUN),
+        ("לחם", GrammaticalCategory.VERB),
+        ("נלחם", GrammaticalCategory.VERB),
+        ("מאוד", GrammaticalCategory.ADVERB),
+        ("שלום", GrammaticalCategory.PARTICLE),
+        ("טוב", GrammaticalCategory.NOUN),
+        ("טוב", GrammaticalCategory.ADVERB),
+    }
+
+
+def test_imported_words_are_searchable(app, report):
+    with app.app_context():
+        word = Word.query.filter_by(
+            chapter=CHAPTER, category=GrammaticalCategory.PARTICLE).one()
+
+        assert word.id in search_word_ids("goodbye")
+
+
+def test_ingesting_again_imports_nothing(app, report):
+    with app.app_context():
+        reports = list(ingest_dump(DUMP, processes=1, chapter=CHAPTER))
+
+    assert reports[-1].imported == 0
+    assert reports[-1].duplicates == report.duplicates + report.imported
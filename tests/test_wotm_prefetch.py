@@ -0,0 +1,144 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from limud.backend.wiktionary import WiktionaryClient
+from limud.backend.wiktionary import scrape_page_from_wiktionary
+from limud.backend.wiktionary.prefetch import WordPrefetcher
+from limud.benchmarks.standin import StandInWiktionary
+
+
+@pytest.fixture(scope="module")
+def standin():
+    with StandInWiktionary() as standin:
+        yield standin
+
+
+@pytest.fixture
+def scrape(standin):
+    client = WiktionaryClient(base_url=standin.url, rate=1e6, burst=1)
+    yield partial(
+        scrape_page_from_wiktionary,
+        retry=True,
+        max_attempts=10,
+        hedge=1,
+        client=client,
+    )
+    client.close()
+
+
+@pytest.fixture
+def make_prefetcher():
+    prefetchers = []
+
+    def make(scrape, capacity=4, low_water=2, workers=2):
+        prefetcher = WordPrefetcher(scrape, capacity, low_water, workers)
+        prefetchers.append(prefetcher)
+        return prefetcher
+
+    yield make
+
+    for prefetcher in prefetchers:
+        prefetcher.close()
+
+
+def wait_for(condition, timeout=10.):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_workers_start_on_first_pop(standin, scrape, make_prefetcher):
+    upstream = standin.requests
+    prefetcher = make_prefetcher(scrape)
+    time.sleep(0.1)
+
+    assert standin.requests == upstream
+    assert prefetcher.pop() is None
+    assert prefetcher.misses == 1
+
+    wait_for(lambda: len(prefetcher) == prefetcher.capacity)
+    assert standin.requests > upstream
+    assert prefetcher.stats()["pending"] == 0
+
+
+def test_pop(scrape, make_prefetcher):
+    prefetcher = make_prefetcher(scrape)
+
+    parses = prefetcher.pop(timeout=10.)
+
+    assert parses
+    assert prefetcher.hits == 1
+    assert prefetcher.misses == 0
+    assert prefetcher.hit_rate == 1.
+
+
+def test_refill_below_low_water(scrape, make_prefetcher):
+    prefetcher = make_prefetcher(scrape, capacity=4, low_water=2)
+    prefetcher.fill()
+    wait_for(lambda: len(prefetcher) == 4)
+
+    # 3 pages left: above the low-water mark, so no refill
+    assert prefetcher.pop()
+    assert prefetcher.stats()["pending"] == 0
+    assert len(prefetcher) == 3
+
+    assert prefetcher.pop()
+    assert prefetcher.stats()["pending"] == 0
+
+    # 1 page left: below the low-water mark, so refill up to capacity
+    assert prefetcher.pop()
+    wait_for(lambda: len(prefetcher) == 4)
+    assert prefetcher.hits == 3
+
+
+def test_failures(make_prefetcher):
+    def scrape():
+        raise ConnectionError("Wiktionary is down")
+
+    prefetcher = make_prefetcher(scrape, capacity=2, low_water=1)
+    prefetcher.fill()
+    wait_for(lambda: prefetcher.failures == 2)
+
+    assert prefetcher.pop() is None
+    assert prefetcher.misses == 1
+
+
+def test_close_abandons_queued_pages(make_prefetcher):
+    started = threading.Event()
+    release = threading.Event()
+    scrapes = []
+
+    def scrape():
+        scrapes.append(None)
+        started.set()
+        release.wait(10.)
+        return []
+
+    prefetcher = make_prefetcher(scrape, capacity=4, low_water=4, workers=1)
+    prefetcher.fill()
+    assert started.wait(10.)
+
+    prefetcher.close()
+    release.set()
+
+    wait_for(lambda: prefetcher.stats()["pending"] == 0)
+    assert len(scrapes) == 1
+
+
+def test_no_capacity(standin, scrape, make_prefetcher):
+    upstream = standin.requests
+    prefetcher = make_prefetcher(scrape, capacity=0, low_water=0)
+
+    assert prefetcher.pop() is None
+    assert prefetcher.pop(timeout=0.1) is None
+    assert prefetcher.misses == 2
+    assert standin.requests == upstream
+
+
+def test_invalid_low_water(scrape):
+    with pytest.raises(ValueError):
+        WordPrefetcher(scrape, capacity=4, low_water=5, workers=1)